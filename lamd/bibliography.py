@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Per-talk bibliography subsetting for citeproc.
+
+Every pandoc rule used to pass the full ``lawrence.bib``, ``other.bib`` and
+``zbooks.bib`` to ``--citeproc``, so pandoc parsed thousands of BibTeX
+entries for a talk citing twenty. ``lamd-bib subset`` instead:
+
+1. extracts the citation keys from the talk source and the files it includes,
+2. looks them up in the index of CSL-JSON copies of the ``.bib`` files,
+   converted once with ``pandoc -t csljson`` and cached by file hash, and
+3. writes only the cited entries to ``.lamd/<source>.bib.json``.
+
+When the source requests every entry (``nocite: '@*'``) every entry is
+written. The makefiles build the subset once per talk, as the target
+``.lamd/<base>.bib.json`` of the source, its includes and the ``.bib`` files,
+and pass it to every citeproc rule. Citing a key that is in no ``.bib`` file
+is left for pandoc to report, as before; a ``.bib`` file that cannot be
+converted is an error, since pandoc could not read it either.
+
+The CSL-JSON copies form a persistent :class:`BibIndex` shared by every build
+on the host, which other bibliography-aware tools can query without parsing
+BibTeX.
+
+Usage:
+    lamd-bib subset SOURCE BIBFILE... [--inputs FILE...] [-o OUTPUT]
+    lamd-bib index [--bibdir DIR | -b BIBFILE ...]
+    lamd-bib lookup KEY... [--bibdir DIR | -b BIBFILE ...]
+    lamd-bib list [--bibdir DIR | -b BIBFILE ...]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from lamd.cache import cache_dir, file_hash, write_atomic
+from lamd.paths import state_path
+
+# Pandoc citation syntax: @key or @{key}. Keys start with a letter, digit or
+# underscore and may contain internal punctuation; the @ must not follow a
+# word character (so e-mail addresses are not mistaken for citations).
+_CITATION = re.compile(r"(?<![\w@])@(?:\{(?P<braced>[^}]+)\}|(?P<key>[\w][\w:.#$%&\-+?<>~/]*))")
+_TRAILING_PUNCTUATION = ":.#$%&-+?<>~/"
+
+
+def cite_keys(text: str) -> Optional[Set[str]]:
+    """
+    Return the citation keys used in pandoc markdown.
+
+    Args:
+        text: The markdown source
+
+    Returns:
+        Set of keys, or None when every entry is cited (``@*`` in ``nocite``)
+    """
+    if re.search(r"(?<![\w@])@\*", text):
+        return None
+    keys = set()
+    for match in _CITATION.finditer(text):
+        key = match.group("braced") or match.group("key").rstrip(_TRAILING_PUNCTUATION)
+        if key:
+            keys.add(key)
+    return keys
+
+
+class BibIndex:
+    """
+    Persistent index of the entries in a set of BibTeX files.
+
+    Each ``.bib`` file is converted to CSL-JSON once and stored in the lamd
+    cache as a *segment* named by the file's SHA-256: ``<hash>.jsonl`` holds
+    one entry per line and ``<hash>.keys.json`` maps each key to the byte
+    offset and length of its line. Lookups read single lines through
+    ``mmap`` rather than loading whole bibliographies, and a changed file
+    only rebuilds its own segment. A manifest of (size, mtime) per path lets
+    unchanged files skip re-hashing.
+    """
+
+    def __init__(self, bibfiles: Iterable[str]):
+        """
+        Initialize the index.
+
+        Args:
+            bibfiles: BibTeX files in precedence order (the first definition of a key wins)
+        """
+        self.bibfiles = [os.path.abspath(bibfile) for bibfile in bibfiles]
+        self.directory = cache_dir("bib")
+        self.segments: Dict[str, str] = {}
+        self._keys: Dict[str, Dict[str, List[int]]] = {}
+        self.rebuilt: List[str] = []
+
+    @classmethod
+    def from_bibdir(cls, bibdir: str) -> "BibIndex":
+        """Return an index of every ``.bib`` file in *bibdir*, in name order."""
+        names = sorted(name for name in os.listdir(bibdir) if name.endswith(".bib"))
+        return cls(os.path.join(bibdir, name) for name in names)
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.directory, "manifest.json")
+
+    def _load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self._manifest_path()) as f:
+                manifest: Dict[str, Dict[str, Any]] = json.load(f)
+            return manifest
+        except (OSError, ValueError):
+            return {}
+
+    def _segment(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.directory, digest + suffix)
+
+    def _build_segment(self, bibfile: str, digest: str) -> None:
+        """Convert *bibfile* with pandoc and write its segment."""
+        result = subprocess.run(
+            ["pandoc", "--from", "bibtex", "--to", "csljson", bibfile],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        lines = bytearray()
+        keys: Dict[str, List[int]] = {}
+        for entry in json.loads(result.stdout):
+            line = json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+            keys.setdefault(str(entry.get("id")), [len(lines), len(line)])
+            lines += line
+        # The key table is written last: its presence marks a complete segment
+        write_atomic(self._segment(digest, ".jsonl"), bytes(lines))
+        write_atomic(self._segment(digest, ".keys.json"), json.dumps(keys))
+        self.rebuilt.append(bibfile)
+
+    def refresh(self) -> "BibIndex":
+        """
+        Bring the index up to date with the BibTeX files.
+
+        Returns:
+            The index itself
+
+        Raises:
+            OSError: If a file cannot be read or pandoc cannot be run
+            subprocess.CalledProcessError: If pandoc fails to parse a file
+        """
+        manifest = self._load_manifest()
+        changed = False
+        for bibfile in self.bibfiles:
+            stat = os.stat(bibfile)
+            known = manifest.get(bibfile)
+            if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                digest = known["hash"]
+            else:
+                digest = file_hash(bibfile)
+                manifest[bibfile] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest}
+                changed = True
+            if not os.path.exists(self._segment(digest, ".keys.json")):
+                self._build_segment(bibfile, digest)
+            self.segments[bibfile] = digest
+        if changed:
+            write_atomic(self._manifest_path(), json.dumps(manifest, indent=1))
+        self._keys = {}
+        return self
+
+    def _segment_keys(self, bibfile: str) -> Dict[str, List[int]]:
+        if not self.segments:
+            self.refresh()
+        digest = self.segments[bibfile]
+        if digest not in self._keys:
+            with open(self._segment(digest, ".keys.json")) as f:
+                self._keys[digest] = json.load(f)
+        return self._keys[digest]
+
+    def entry_count(self, bibfile: str) -> int:
+        """Return the number of entries indexed for *bibfile*."""
+        return len(self._segment_keys(os.path.abspath(bibfile)))
+
+    def keys(self) -> List[str]:
+        """Return every key in the index (each key once, in file order)."""
+        seen: Dict[str, None] = {}
+        for bibfile in self.bibfiles:
+            seen.update(dict.fromkeys(self._segment_keys(bibfile)))
+        return list(seen)
+
+    def entries(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up several keys.
+
+        Args:
+            keys: Citation keys (unknown keys are omitted from the result)
+
+        Returns:
+            Mapping of key to CSL-JSON entry
+        """
+        wanted = set(keys)
+        found: Dict[str, Dict[str, Any]] = {}
+        for bibfile in self.bibfiles:
+            if not wanted:
+                break
+            table = self._segment_keys(bibfile)
+            hits = [key for key in wanted if key in table]
+            if not hits:
+                continue
+            with open(self._segment(self.segments[bibfile], ".jsonl"), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    for key in hits:
+                        offset, length = table[key]
+                        found[key] = json.loads(data[offset : offset + length])
+            wanted.difference_update(hits)
+        return found
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the CSL-JSON entry for *key*, or None if it is not in the index."""
+        return self.entries([key]).get(key)
+
+
+def subset_entries(keys: Iterable[str], bibfiles: List[str]) -> List[Dict[str, Any]]:
+    """
+    Return the entries for *keys*, taking the first definition across *bibfiles*.
+
+    Args:
+        keys: Citation keys to look up (unknown keys are ignored, as pandoc
+            reports them itself)
+        bibfiles: BibTeX files in precedence order
+
+    Returns:
+        The matching CSL-JSON entries, sorted by key
+    """
+    found = BibIndex(bibfiles).refresh().entries(keys)
+    return [found[key] for key in sorted(found)]
+
+
+def subset_flags(source: str, bibfiles: List[str], output: Optional[str] = None, inputs: Iterable[str] = ()) -> str:
+    """
+    Write the per-talk bibliography for *source* and return the pandoc flag.
+
+    Args:
+        source: The talk source (or preprocessed markdown)
+        bibfiles: The full BibTeX files
+        output: Where to write the subset (default ``.lamd/<source>.bib.json``)
+        inputs: Further files whose citations count, such as the source's includes
+
+    Returns:
+        The ``--bibliography`` flag pandoc should use
+
+    Raises:
+        OSError: If a source cannot be read
+        subprocess.CalledProcessError: If a ``.bib`` file cannot be converted
+    """
+    keys: Optional[Set[str]] = set()
+    for path in [source, *inputs]:
+        with open(path, encoding="utf-8") as f:
+            found = cite_keys(f.read())
+        keys = None if found is None or keys is None else keys | found
+    if keys is None:
+        keys = set(BibIndex(bibfiles).refresh().keys())
+    entries = subset_entries(keys, bibfiles)
+
+    output = output or state_path(os.path.basename(source) + ".bib.json")
+    write_atomic(output, json.dumps(entries, indent=1))
+    return f"--bibliography={output}"
+
+
+def configured_bibfiles(bibdir: Optional[str] = None) -> List[str]:
+    """
+    Return the ``.bib`` files of *bibdir*, or of ``bibdir`` in ``_lamd.yml`` when not given.
+
+    Raises:
+        ValueError: If no bibliography directory is given or configured
+    """
+    if bibdir is None:
+        import lynguine.util.yaml as ny
+
+        try:
+            iface = ny.Interface.from_file(["_lamd.yml", "_config.yml"], directory=".")
+            bibdir = os.path.expandvars(str(iface["bibdir"])) if "bibdir" in iface else None
+        except (ny.FileFormatError, OSError):
+            bibdir = None
+    if not bibdir:
+        raise ValueError("no bibliography given: pass BIBFILEs or --bibdir, or set 'bibdir' in _lamd.yml")
+    return BibIndex.from_bibdir(bibdir).bibfiles
+
+
+def _subset(args: argparse.Namespace) -> int:
+    """Run ``lamd-bib subset``; an unreadable source or bibliography is an error, as it would be for pandoc."""
+    try:
+        print(subset_flags(args.source, args.bibfiles, args.output, args.inputs))
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error: cannot subset the bibliography for {args.source}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Subset, index and query the BibTeX bibliographies.
+
+    Returns:
+        int: 0 for success, 1 if a looked-up key is missing or the index or subset cannot be built
+    """
+    parser = argparse.ArgumentParser(
+        description="Per-talk bibliography subsetting and a persistent bibliography index.",
+        epilog="Examples:\n"
+        "  lamd-bib subset talk.slides.html.markdown ../_bibliography/*.bib\n"
+        "  lamd-bib index --bibdir ../_bibliography\n"
+        "  lamd-bib lookup Lawrence:gplvm05\n",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subset = subparsers.add_parser("subset", help="Write the cited entries and print the --bibliography flag")
+    subset.add_argument("source", type=str, help="Talk source or preprocessed markdown file")
+    subset.add_argument("bibfiles", nargs="+", help="BibTeX files, in precedence order")
+    subset.add_argument("--inputs", nargs="*", default=[], help="Files the source includes, whose citations count too")
+    subset.add_argument("-o", "--output", type=str, help="Output CSL-JSON file (default .lamd/<source>.bib.json)")
+
+    index = subparsers.add_parser("index", help="Build or refresh the index and report its size")
+    lookup = subparsers.add_parser("lookup", help="Print the CSL-JSON entries for KEYs")
+    lookup.add_argument("keys", nargs="+", help="Citation keys")
+    listing = subparsers.add_parser("list", help="Print every key in the index")
+    for sub in (index, lookup, listing):
+        sub.add_argument("--bibdir", type=str, help="Bibliography directory (default 'bibdir' from _lamd.yml)")
+        sub.add_argument("-b", "--bib", dest="bibfiles", action="append", help="BibTeX file (repeatable; overrides --bibdir)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "subset":
+        return _subset(args)
+
+    try:
+        bib_index = BibIndex(args.bibfiles or configured_bibfiles(args.bibdir)).refresh()
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.command == "index":
+        for bibfile in bib_index.bibfiles:
+            status = "rebuilt" if bibfile in bib_index.rebuilt else "up to date"
+            print(f"{bibfile}: {bib_index.entry_count(bibfile)} entries ({status})")
+    elif args.command == "lookup":
+        found = bib_index.entries(args.keys)
+        print(json.dumps([found[key] for key in args.keys if key in found], indent=2, ensure_ascii=False))
+        missing = [key for key in args.keys if key not in found]
+        if missing:
+            print(f"Error: not found: {', '.join(missing)}", file=sys.stderr)
+            return 1
+    elif args.command == "list":
+        print("\n".join(bib_index.keys()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
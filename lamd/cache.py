@@ -0,0 +1,52 @@
+"""
+User-level cache shared between lamd builds.
+
+Derived artefacts that depend only on the content of their inputs (parsed
+bibliographies, converted diagrams, ...) are stored under
+``$LAMD_CACHE_DIR`` or, when that is unset, ``$XDG_CACHE_HOME/lamd``
+(``~/.cache/lamd``), so every talk and every checkout on the host reuses them.
+"""
+
+import hashlib
+import os
+import tempfile
+from typing import Union
+
+
+def cache_dir(*parts: str) -> str:
+    """Return (and create) a directory inside the lamd cache."""
+    root = os.environ.get("LAMD_CACHE_DIR")
+    if not root:
+        root = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "lamd")
+    path = os.path.join(root, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def file_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_atomic(path: str, data: Union[str, bytes]) -> None:
+    """
+    Write *data* to *path* so that readers never see a partial file.
+
+    Concurrent builds may fill the same cache entry; each writes to its own
+    temporary file and the last rename wins.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.encode("utf-8") if isinstance(data, str) else data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
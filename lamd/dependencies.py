@@ -32,10 +32,12 @@ Options:
 import argparse
 import os
 import sys
+from typing import Dict, List
 
 import lynguine.util.talk as nt
 import lynguine.util.yaml as ny
 
+from lamd.diagrams.raster import RASTER_EXTS, responsive_images
 from lamd.paths import load_config, resolve_diagrams_filesystem
 
 
@@ -46,6 +48,78 @@ def resolve_diagrams_dir(cli_value: str | None) -> str:
     return resolve_diagrams_filesystem(load_config("."), cli=None)
 
 
+def extract_batch(filename: str, diagrams_dir: str, snippets_path: str = "..") -> Dict[str, List[str]]:
+    """
+    Extract every dependency type of a talk in one pass.
+
+    The input closure is read once and the diagram lists are filtered from a
+    single extraction rather than re-reading the files for each type.
+
+    Args:
+        filename: The markdown file to analyze
+        diagrams_dir: Directory containing the diagrams
+        snippets_path: Directory containing snippet files
+
+    Returns:
+        Mapping with keys ``inputs``, ``diagrams``, ``docxdiagrams``,
+        ``pptxdiagrams``, ``texdiagrams``, ``rasterimages`` (the images shown
+        with the responsive macros) and ``all`` (the files the talk creates)
+
+    Raises:
+        ValueError: If posts are enabled but ``postsdir`` is not configured
+        ny.FileFormatError: If the talk header cannot be read
+    """
+    # First extract inputs (reads all files once)
+    inputs = nt.extract_inputs(filename, snippets_path=snippets_path)
+
+    # Then extract diagrams of all types (reuses the file list from inputs)
+    # Use paths relative to the build directory so make targets match mdpp/pandoc
+    all_diagrams = nt.extract_diagrams(
+        filename,
+        absolute_path=False,
+        diagram_exts=["svg", "png", "pdf", "emf"],
+        diagrams_dir=diagrams_dir,
+        snippets_path=snippets_path,
+    )
+
+    # Handle case where extract_diagrams returns None (file doesn't exist)
+    if all_diagrams is None:
+        all_diagrams = []
+
+    # Extract specific diagram types (filter from all_diagrams to avoid re-reading)
+    pdf_diagrams = [d for d in all_diagrams if d.endswith(".pdf")]
+    emf_diagrams = [d for d in all_diagrams if d.endswith(".emf")]
+    inputs = list(inputs or [])
+    raster_images = [
+        image
+        for image in responsive_images(filename, diagrams_dir, snippets_path, inputs)
+        if image.lower().endswith(RASTER_EXTS)
+    ]
+
+    # Extract dynamic dependencies (what files the talk creates)
+    fields = ny.header_fields(filename)
+    posts_enabled = False
+    try:
+        posts_enabled = ny.header_field("posts", fields, ["_lamd.yml", "_config.yml"])
+    except ny.FileFormatError:
+        posts_enabled = False
+    if posts_enabled:
+        iface = ny.Interface.from_file(["_lamd.yml", "_config.yml"], directory=".")
+        if "postsdir" not in iface:
+            raise ValueError("'postsdir' is not defined in your _lamd.yml configuration file.")
+    dynamic = nt.extract_all(filename, user_file=["_lamd.yml", "_config.yml"])
+
+    return {
+        "inputs": inputs,
+        "diagrams": all_diagrams,
+        "docxdiagrams": emf_diagrams,
+        "pptxdiagrams": emf_diagrams,
+        "texdiagrams": pdf_diagrams,
+        "rasterimages": raster_images,
+        "all": list(dynamic or []),
+    }
+
+
 def main() -> int:
     """
     Extract dependencies from markdown files based on specified type.
@@ -167,56 +241,16 @@ def main() -> int:
 
     elif args.dependency == "batch":
         # Extract all dependency types in one pass (CIP-0009 Phase 1 optimization)
-        # This reduces redundant file I/O by reading files once and extracting all types
-
-        # First extract inputs (reads all files once)
-        inputs = nt.extract_inputs(args.filename, snippets_path=snippets_path)
-
-        # Then extract diagrams of all types (reuses the file list from inputs)
-        # Use paths relative to the build directory so make targets match mdpp/pandoc
-        all_diagrams = nt.extract_diagrams(
-            args.filename,
-            absolute_path=False,
-            diagram_exts=["svg", "png", "pdf", "emf"],
-            diagrams_dir=diagrams_dir,
-            snippets_path=snippets_path,
-        )
-
-        # Handle case where extract_diagrams returns None (file doesn't exist)
-        if all_diagrams is None:
-            all_diagrams = []
-
-        # Extract specific diagram types (filter from all_diagrams to avoid re-reading)
-        svg_diagrams = [d for d in all_diagrams if d.endswith(".svg")]
-        pdf_diagrams = [d for d in all_diagrams if d.endswith(".pdf")]
-        emf_diagrams = [d for d in all_diagrams if d.endswith(".emf")]
-
-        # Extract dynamic dependencies (what files the talk creates)
         try:
-            fields = ny.header_fields(args.filename)
-            posts_enabled = False
-            try:
-                posts_enabled = ny.header_field("posts", fields, ["_lamd.yml", "_config.yml"])
-            except ny.FileFormatError:
-                posts_enabled = False
-            if posts_enabled:
-                iface = ny.Interface.from_file(["_lamd.yml", "_config.yml"], directory=".")
-                if "postsdir" not in iface:
-                    print("Error: 'postsdir' is not defined in your _lamd.yml configuration file.", file=sys.stderr)
-                    sys.exit(1)
-            dynamic = nt.extract_all(args.filename, user_file=["_lamd.yml", "_config.yml"])
-        except ny.FileFormatError as e:
+            batch = extract_batch(args.filename, diagrams_dir, snippets_path)
+        except (ny.FileFormatError, ValueError) as e:
             print(f"Error: {e}", file=sys.stderr)
             sys.exit(1)
 
         # Output in a format easy to parse in Makefiles (one line per type with prefix)
         # Use dependency command names, not Makefile variable names
-        print(f"inputs:{' '.join(inputs) if inputs else ''}")
-        print(f"diagrams:{' '.join(all_diagrams) if all_diagrams else ''}")
-        print(f"docxdiagrams:{' '.join(emf_diagrams) if emf_diagrams else ''}")
-        print(f"pptxdiagrams:{' '.join(emf_diagrams) if emf_diagrams else ''}")
-        print(f"texdiagrams:{' '.join(pdf_diagrams) if pdf_diagrams else ''}")
-        print(f"all:{' '.join(dynamic) if dynamic else ''}")
+        for key, listfiles in batch.items():
+            print(f"{key}:{' '.join(listfiles)}")
 
     # Temporarily commented out as extract_snippets function is not implemented in lynguine.util.talk
     # elif args.dependency == "snippets":
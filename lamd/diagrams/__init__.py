@@ -0,0 +1 @@
+# lamd.diagrams — converting and publishing talk diagrams
@@ -0,0 +1,130 @@
+"""
+Content-addressed cache of diagram conversions.
+
+A converted diagram depends only on the SVG's content, on the files the SVG
+links to, on the target format and on the converter. A fresh clone gives
+every SVG a new mtime, and several talks often share the same diagram, yet
+make would convert each copy again. :class:`ConversionCache` keeps every
+conversion in the user-level lamd cache (``~/.cache/lamd/diagrams``, see
+:mod:`lamd.cache`), under a key built from the SVG's content hash, the
+target format and the converter version. An identical diagram is therefore
+converted once per machine, whatever the checkout or talk.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+from typing import Dict, List, Optional
+
+from lamd.cache import cache_dir, file_hash, write_atomic
+
+# href/src values that point at files next to the SVG (not data: URIs, fragments or URLs)
+_LINK = re.compile(r"""(?:xlink:href|href|src)\s*=\s*["'](?!data:|#|[a-zA-Z][a-zA-Z0-9+.-]*://)([^"']+)["']""")
+
+
+def converter_version(executable: str) -> Optional[str]:
+    """
+    Return the first line of ``<executable> --version``, or None if it cannot be run.
+
+    Starting Inkscape costs about a second, so versions are remembered by the
+    executable's path, size and mtime.
+    """
+    path = shutil.which(executable) or executable
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    known_file = os.path.join(cache_dir("diagrams"), "versions.json")
+    identity = f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    try:
+        with open(known_file, encoding="utf-8") as f:
+            known: Dict[str, str] = json.load(f)
+    except (OSError, ValueError):
+        known = {}
+    if identity not in known:
+        try:
+            result = subprocess.run([path, "--version"], capture_output=True, text=True, timeout=60, check=False)
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        lines = (result.stdout or "").strip().splitlines()
+        if result.returncode != 0 or not lines:
+            return None
+        known[identity] = lines[0].strip()
+        write_atomic(known_file, json.dumps(known, indent=2))
+    return known[identity]
+
+
+def linked_files(svg: str) -> List[str]:
+    """Return the local files an SVG links to (embedded images and the like) that exist."""
+    try:
+        with open(svg, encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return []
+    directory = os.path.dirname(svg)
+    paths = (os.path.normpath(os.path.join(directory, link)) for link in _LINK.findall(text))
+    return sorted({path for path in paths if os.path.isfile(path)})
+
+
+class ConversionCache:
+    """Converted diagrams stored by SVG content, format and converter version."""
+
+    def __init__(self, version: str, directory: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            version: Converter version string (part of every key)
+            directory: Cache directory (default ``<lamd cache>/diagrams``)
+        """
+        self.version = version
+        self.directory = directory or cache_dir("diagrams")
+        self.hits = 0
+
+    @classmethod
+    def for_converter(cls, executable: str) -> Optional["ConversionCache"]:
+        """Return a cache for a converter, or None when its version cannot be determined."""
+        version = converter_version(executable)
+        return cls(version) if version else None
+
+    def key(self, svg: str, target: str) -> str:
+        """Return the cache key of converting *svg* to *target*'s format."""
+        digest = hashlib.sha256(self.version.encode("utf-8"))
+        digest.update(file_hash(svg).encode("ascii"))
+        for path in linked_files(svg):
+            digest.update(f"\0{os.path.basename(path)}\0{file_hash(path)}".encode("utf-8"))
+        return digest.hexdigest() + os.path.splitext(target)[1].lower()
+
+    def path(self, svg: str, target: str) -> str:
+        """Return where the conversion of *svg* to *target*'s format is stored."""
+        key = self.key(svg, target)
+        return os.path.join(self.directory, key[:2], key)
+
+    def fetch(self, svg: str, target: str) -> bool:
+        """
+        Copy a cached conversion to *target*.
+
+        Returns:
+            True on a cache hit
+        """
+        cached = self.path(svg, target)
+        if not os.path.exists(cached):
+            return False
+        try:
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            shutil.copyfile(cached, target)
+        except OSError:
+            return False
+        self.hits += 1
+        return True
+
+    def store(self, svg: str, target: str) -> None:
+        """Add a finished conversion to the cache."""
+        try:
+            with open(target, "rb") as f:
+                write_atomic(self.path(svg, target), f.read())
+        except OSError:
+            pass
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Convert a talk's SVG diagrams in bulk with long-lived Inkscape sessions.
+
+The ``%.pdf``, ``%.png`` and ``%.emf`` rules in ``make-figures.mk`` start
+Inkscape once per file, and Inkscape takes a second or two to start. A talk
+with hundreds of diagrams in ``TEXDEPS``, ``DOCXDEPS`` and ``PPTXDEPS``
+spends minutes of a cold build in start-up alone.
+
+``lamd-convert-diagrams`` takes the talk's conversion targets (or reads them
+with :func:`lamd.dependencies.extract_batch`), keeps those whose target is
+missing or older than its SVG, and feeds them to a few ``inkscape --shell``
+sessions as action lines::
+
+    file-open:diagrams/ml/gp.svg; export-filename:diagrams/ml/gp.pdf; export-do; file-close
+
+Sessions run in parallel, one per slot of the ``inkscape`` resource class
+(see :mod:`lamd.resources`), but never more than there are cores. A target a
+session failed to write is converted again on its own with the ordinary
+command line, so Inkscape versions without these actions still work.
+
+Conversions already made on this machine, by any talk or checkout, are
+copied from the shared cache in :mod:`lamd.diagrams.cache` instead.
+
+Usage::
+
+    lamd-convert-diagrams diagrams/ml/gp.pdf diagrams/ml/gp.emf ...
+    lamd-convert-diagrams --talk talk.md
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+from lamd.diagrams.cache import ConversionCache
+from lamd.resources import ResourceSlot, load_limits
+
+CONVERTED_SUFFIXES = (".pdf", ".png", ".emf")
+
+# Characters that cannot appear in a path inside an action line
+_ACTION_SEPARATORS = (";", "\n")
+
+Conversion = Tuple[str, str]
+
+
+def source_for(target: str) -> str:
+    """Return the SVG a conversion target is made from."""
+    return os.path.splitext(target)[0] + ".svg"
+
+
+def pending_conversions(targets: Sequence[str]) -> List[Conversion]:
+    """
+    Select the conversions that need running.
+
+    Targets without an SVG beside them (photographs, original PDFs) are not
+    conversions and are skipped, as are targets newer than their SVG.
+
+    Args:
+        targets: Candidate ``.pdf``, ``.png`` and ``.emf`` files
+
+    Returns:
+        (svg, target) pairs, without duplicates, in the order given
+    """
+    pending: List[Conversion] = []
+    seen = set()
+    for target in targets:
+        if target in seen or not target.endswith(CONVERTED_SUFFIXES):
+            continue
+        seen.add(target)
+        svg = source_for(target)
+        if not os.path.isfile(svg):
+            continue
+        if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(svg):
+            continue
+        pending.append((svg, target))
+    return pending
+
+
+def shell_actions(conversions: Sequence[Conversion]) -> str:
+    """Return ``inkscape --shell`` input converting each (svg, target) pair."""
+    lines = [f"file-open:{svg}; export-filename:{target}; export-do; file-close" for svg, target in conversions]
+    return "\n".join(lines + ["quit"]) + "\n"
+
+
+def _converted(conversion: Conversion, started: float) -> bool:
+    target = conversion[1]
+    return os.path.exists(target) and os.path.getmtime(target) >= started
+
+
+def run_session(conversions: Sequence[Conversion], inkscape: str = "inkscape") -> List[Conversion]:
+    """
+    Convert a batch of diagrams in one Inkscape session.
+
+    Args:
+        conversions: (svg, target) pairs
+        inkscape: Inkscape executable
+
+    Returns:
+        The conversions that failed, after retrying each on its own
+    """
+    shell = [c for c in conversions if not any(sep in c[0] + c[1] for sep in _ACTION_SEPARATORS)]
+    failed = [c for c in conversions if c not in shell]
+    if shell:
+        started = time.time() - 1  # allow for coarse filesystem timestamps
+        try:
+            subprocess.run(
+                [inkscape, "--shell"],
+                input=shell_actions(shell),
+                text=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
+        except OSError:
+            pass
+        failed += [c for c in shell if not _converted(c, started)]
+    still_failed = []
+    for svg, target in failed:
+        try:
+            status = subprocess.call([inkscape, svg, f"--export-filename={target}"])
+        except OSError:
+            status = 127
+        if status != 0 or not os.path.exists(target):
+            still_failed.append((svg, target))
+    return still_failed
+
+
+def session_count(conversions: int, limits: Mapping[str, Mapping[str, Optional[int]]]) -> int:
+    """Return how many Inkscape sessions to run for a number of conversions."""
+    jobs = int((limits.get("inkscape") or {}).get("jobs") or 1)
+    return max(1, min(conversions, jobs, os.cpu_count() or 1))
+
+
+def split_batches(conversions: Sequence[Conversion], sessions: int) -> List[List[Conversion]]:
+    """Deal conversions to sessions, largest SVGs first, so sessions finish together."""
+    ordered = sorted(conversions, key=lambda c: os.path.getsize(c[0]), reverse=True)
+    return [ordered[i::sessions] for i in range(sessions) if ordered[i::sessions]]
+
+
+def convert(
+    conversions: Sequence[Conversion],
+    inkscape: str = "inkscape",
+    limits: Optional[Mapping[str, Mapping[str, Optional[int]]]] = None,
+    cache: Optional[ConversionCache] = None,
+) -> List[Conversion]:
+    """
+    Run conversions across parallel Inkscape sessions.
+
+    Each session holds a slot of the ``inkscape`` resource class, so the
+    ``resources`` caps in ``_lamd.yml`` also bound a batch.
+
+    Args:
+        conversions: (svg, target) pairs
+        inkscape: Inkscape executable
+        limits: Resolved resource limits (loaded from the environment/config when None)
+        cache: Conversion cache to copy from and add to
+
+    Returns:
+        The conversions that failed
+    """
+    if cache is not None:
+        conversions = [c for c in conversions if not cache.fetch(*c)]
+    if not conversions:
+        return []
+    limits = limits if limits is not None else load_limits()
+
+    def session(batch: List[Conversion]) -> List[Conversion]:
+        with ResourceSlot("inkscape", limits):
+            return run_session(batch, inkscape)
+
+    batches = split_batches(conversions, session_count(len(conversions), limits))
+    with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+        failed = [failure for failures in pool.map(session, batches) for failure in failures]
+    if cache is not None:
+        for conversion in conversions:
+            if conversion not in failed:
+                cache.store(*conversion)
+    return failed
+
+
+def talk_targets(talk: str) -> List[str]:
+    """Return the diagram conversion targets of a talk, from its dependency lists."""
+    from lamd.dependencies import extract_batch, resolve_diagrams_dir
+
+    batch = extract_batch(talk, resolve_diagrams_dir(None))
+    return batch["texdiagrams"] + batch["docxdiagrams"] + batch["pptxdiagrams"]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Convert the pending diagrams of a talk in bulk.
+
+    Returns:
+        int: 0 if every conversion succeeded, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Convert SVG diagrams to PDF/PNG/EMF in batched Inkscape sessions.")
+    parser.add_argument("targets", nargs="*", help="Conversion targets (.pdf, .png or .emf next to an .svg)")
+    parser.add_argument("--talk", help="Read the targets from this talk's dependencies")
+    parser.add_argument("--inkscape", default="inkscape", help="Inkscape executable (default: inkscape)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not use the shared conversion cache")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Report what is converted")
+    args = parser.parse_args(argv)
+
+    targets = list(args.targets)
+    if args.talk:
+        targets += talk_targets(args.talk)
+    pending = pending_conversions(targets)
+    if args.verbose:
+        print(f"lamd-convert-diagrams: {len(pending)} of {len(set(targets))} diagrams to convert", file=sys.stderr)
+    cache = None if args.no_cache or not pending else ConversionCache.for_converter(args.inkscape)
+    failed = convert(pending, args.inkscape, cache=cache)
+    if args.verbose and cache is not None:
+        print(f"lamd-convert-diagrams: {cache.hits} copied from the conversion cache", file=sys.stderr)
+    for svg, target in failed:
+        print(f"lamd-convert-diagrams: failed to convert {svg} to {target}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
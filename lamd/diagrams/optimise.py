@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Minify SVG diagrams as they are published for the web.
+
+Diagrams saved by Inkscape carry editor state that browsers ignore: the
+``sodipodi:namedview`` block, ``inkscape:`` and ``sodipodi:`` attributes,
+RDF ``<metadata>``, definitions nothing uses and coordinates written to
+eight decimal places. On a slide deck with a hundred diagrams that is
+megabytes the audience downloads for nothing. :func:`optimise_svg` removes
+them with the standard library's XML parser; no external tool is needed.
+
+Two modes are offered:
+
+``safe`` (the default)
+    Keeps every ``id`` on the drawing, and never touches elements marked as
+    reveal.js fragments (``class="fragment"`` or ``data-fragment-index``),
+    so slides that step through parts of a diagram or script it by ``id``
+    keep working.
+``aggressive``
+    Also drops ``id`` attributes that nothing inside the SVG refers to.
+
+Optimised files are cached in the user-level lamd cache (``svg``, see
+:mod:`lamd.cache`) by the hash of the original, the mode and the precision,
+so a diagram is optimised once per machine. ``lamd-sync-diagrams
+--optimise`` and ``lamd-store-diagrams --optimise`` publish the optimised
+file in place of the original; ``lamd-optimise-svg`` optimises files
+directly.
+
+Usage::
+
+    lamd-optimise-svg diagrams/ml/*.svg --output-dir ../slides/diagrams/ml
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Set
+
+from lamd.cache import cache_dir, file_hash, write_atomic
+
+MODES = ("safe", "aggressive")
+DEFAULT_PRECISION = 3
+
+# Bump when the output of optimise_svg changes, to retire cached results
+OPTIMISER_VERSION = "1"
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+EDITOR_NAMESPACES = (
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://ns.adobe.com/AdobeIllustrator/10.0/",
+    "http://www.bohemiancoding.com/sketch/ns",
+)
+
+# Attributes holding coordinates whose precision can be reduced (not transforms,
+# where a rounded scale factor would move everything it applies to)
+GEOMETRY_ATTRIBUTES = set("d points x y x1 y1 x2 y2 cx cy r rx ry width height stroke-width font-size offset".split())
+
+# Elements in which whitespace is content
+_TEXT_ELEMENTS = {"text", "tspan", "textPath", "style", "script", "title", "desc"}
+
+_NUMBER = re.compile(r"(-?\d*\.\d+)(?![\d.eE])")
+_REFERENCE = re.compile(r"url\(\s*['\"]?#([^)'\"\s]+)|^#(.+)$")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _namespace(name: str) -> str:
+    return name[1:].split("}", 1)[0] if name.startswith("{") else ""
+
+
+def round_numbers(value: str, precision: int = DEFAULT_PRECISION) -> str:
+    """Round every decimal in an attribute value to *precision* places, dropping trailing zeros."""
+
+    def rounded(match: "re.Match[str]") -> str:
+        text = f"{float(match.group(1)):.{precision}f}".rstrip("0").rstrip(".")
+        if text in ("-0", ""):
+            return "0"
+        return text.replace("0.", ".", 1) if text.startswith("0.") else text.replace("-0.", "-.", 1)
+
+    return _NUMBER.sub(rounded, value)
+
+
+def _referenced_ids(root: ET.Element) -> Set[str]:
+    """Return the ids the SVG refers to (``url(#id)``, ``href="#id"``) or names in a style sheet."""
+    ids: Set[str] = set()
+    for element in root.iter():
+        for value in element.attrib.values():
+            for match in _REFERENCE.finditer(value):
+                ids.add(match.group(1) or match.group(2))
+        if _local(element.tag) == "style" and element.text:
+            ids.update(re.findall(r"#([A-Za-z_][\w-]*)", element.text))
+    return ids
+
+
+def _is_fragment(element: ET.Element) -> bool:
+    classes = element.get("class", "").split()
+    return "fragment" in classes or any(name.startswith("data-fragment") for name in element.attrib)
+
+
+def _clean_attributes(element: ET.Element, keep_ids: Optional[Set[str]], precision: int) -> None:
+    """Drop editor attributes, unreferenced ids (when *keep_ids* is given) and excess precision."""
+    for name in list(element.attrib):
+        if _namespace(name) in EDITOR_NAMESPACES:
+            del element.attrib[name]
+        elif name == "id" and keep_ids is not None and element.attrib[name] not in keep_ids:
+            del element.attrib[name]
+        elif name == "style":
+            declarations = [d.strip() for d in element.attrib[name].split(";")]
+            style = ";".join(d for d in declarations if d and not d.startswith("-inkscape-"))
+            if style:
+                element.attrib[name] = style
+            else:
+                del element.attrib[name]
+        elif _local(name) in GEOMETRY_ATTRIBUTES:
+            element.attrib[name] = round_numbers(element.attrib[name], precision)
+
+
+def _remove(parent: ET.Element, child: ET.Element) -> None:
+    """Remove *child*, keeping any text that followed it."""
+    if child.tail and child.tail.strip():
+        siblings = list(parent)
+        index = siblings.index(child)
+        if index:
+            siblings[index - 1].tail = (siblings[index - 1].tail or "") + child.tail
+        else:
+            parent.text = (parent.text or "") + child.tail
+    parent.remove(child)
+
+
+def _unused_definition(element: ET.Element, used: Set[str], safe: bool) -> bool:
+    if _local(element.tag) in ("style", "script") or (safe and _is_fragment(element)):
+        return False
+    return element.get("id") not in used
+
+
+def _prune(parent: ET.Element, used: Set[str], safe: bool) -> None:
+    """Remove editor elements, metadata, unused definitions and layout whitespace below *parent*."""
+    preserve = _local(parent.tag) in _TEXT_ELEMENTS
+    in_defs = _local(parent.tag) == "defs"
+    for child in list(parent):
+        editor = _namespace(child.tag) in EDITOR_NAMESPACES or _local(child.tag) == "metadata"
+        if editor or (in_defs and _unused_definition(child, used, safe)):
+            _remove(parent, child)
+            continue
+        _prune(child, used, safe)
+        if not preserve and child.tail is not None and not child.tail.strip():
+            child.tail = None
+    if not preserve and parent.text is not None and not parent.text.strip():
+        parent.text = None
+
+
+def _register_namespaces(text: str) -> None:
+    """Keep the file's own namespace prefixes on output instead of ElementTree's ``ns0``."""
+    ET.register_namespace("", SVG_NS)
+    ET.register_namespace("xlink", XLINK_NS)
+    for _, (prefix, uri) in ET.iterparse(io.StringIO(text), events=("start-ns",)):
+        if prefix and uri not in (SVG_NS, XLINK_NS):
+            try:
+                ET.register_namespace(prefix, uri)
+            except ValueError:
+                pass
+
+
+def optimise_svg(text: str, mode: str = "safe", precision: int = DEFAULT_PRECISION) -> str:
+    """
+    Minify an SVG document.
+
+    Args:
+        text: The SVG
+        mode: ``safe`` keeps ids and fragment elements; ``aggressive`` drops unreferenced ids
+        precision: Decimal places kept in coordinates
+
+    Returns:
+        The optimised SVG, or *text* unchanged if it cannot be parsed or would not shrink
+    """
+    try:
+        _register_namespaces(text)
+        root = ET.fromstring(text)
+    except ET.ParseError:
+        return text
+    used = _referenced_ids(root)
+    _prune(root, used, mode == "safe")
+    keep_ids = None if mode == "safe" else used
+    for element in root.iter():
+        _clean_attributes(element, keep_ids, precision)
+    optimised = ET.tostring(root, encoding="unicode")
+    return optimised if len(optimised.encode("utf-8")) < len(text.encode("utf-8")) else text
+
+
+def optimised_content(path: str, mode: str = "safe", precision: int = DEFAULT_PRECISION) -> bytes:
+    """
+    Return the optimised content of an SVG file, from the cache when it has been optimised before.
+
+    Args:
+        path: SVG file
+        mode: Optimisation mode
+        precision: Decimal places kept in coordinates
+    """
+    key = hashlib.sha256(f"{OPTIMISER_VERSION}:{mode}:{precision}:{file_hash(path)}".encode("ascii")).hexdigest()
+    cached = os.path.join(cache_dir("svg"), key[:2], key + ".svg")
+    try:
+        with open(cached, "rb") as f:
+            return f.read()
+    except OSError:
+        pass
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        text = f.read()
+    data = optimise_svg(text, mode, precision).encode("utf-8", errors="surrogateescape")
+    write_atomic(cached, data)
+    return data
+
+
+def publishable_content(path: str, mode: Optional[str]) -> Optional[bytes]:
+    """Return what to publish for *path*: its optimised content for an SVG when *mode* is set, else None (the file itself)."""
+    if mode is None or not path.lower().endswith(".svg"):
+        return None
+    return optimised_content(path, mode)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Optimise SVG files, in place or into an output directory.
+
+    Returns:
+        int: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(description="Minify SVG diagrams for the web.")
+    parser.add_argument("files", nargs="+", help="SVG files")
+    parser.add_argument("--mode", choices=MODES, default="safe", help="Optimisation mode (default: safe)")
+    parser.add_argument("--precision", type=int, default=DEFAULT_PRECISION, help="Decimal places kept in coordinates")
+    parser.add_argument("--output-dir", help="Write optimised files here instead of replacing the originals")
+    args = parser.parse_args(argv)
+
+    sizes: Dict[str, int] = {}
+    try:
+        for path in args.files:
+            data = optimised_content(path, args.mode, args.precision)
+            sizes[path] = os.path.getsize(path) - len(data)
+            target = os.path.join(args.output_dir, os.path.basename(path)) if args.output_dir else path
+            write_atomic(target, data)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    saved = sum(sizes.values())
+    print(f"lamd-optimise-svg: {len(sizes)} files, {saved / 1024:.1f} KiB saved", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
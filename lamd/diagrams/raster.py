@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Downscaled and WebP variants of the raster images a talk shows responsively.
+
+``\\includeimg`` emits a plain ``<img>`` of the full-resolution file, so a
+notes page with dozens of photographs downloads every one of them at full
+size before the reader scrolls to it. The HTML macros
+``\\includepngresponsive``, ``\\includejpgresponsive`` and
+``\\includeimgresponsive`` instead emit a ``<picture>`` with a WebP
+``srcset``, a same-format ``srcset`` and ``loading="lazy"``, pointing at
+variants named after the width they were scaled to::
+
+    diagrams/ml/photo.png -> diagrams/ml/photo-480w.png, photo-480w.webp,
+                             photo-960w.png, ..., photo-1600w.webp
+
+``lamd-raster-variants`` writes those variants for each image the talk
+includes with a responsive macro. The make rules pass it the images listed
+as ``RASTERDEPS`` by ``lamd-vars``, and skip it for a talk with none. By default they go next to the original:
+the macros point at ``\\diagramsDir``, whose URL is where the diagrams
+directory itself is served, and lamd publishes no raster images anywhere
+else, so that is the only place a browser can find them. With
+``--target-dir`` (``rastervariantsdir`` in ``_lamd.yml``) they are written
+instead into a directory that mirrors the diagrams tree, such as a built
+site served at that URL, and the source tree is left untouched. Each
+variant goes at the image's path after its last ``diagrams/``, where
+``lamd-sync-diagrams`` would publish the image.
+
+Images are never scaled up: a variant wider than the original has the
+original's size. Variants are cached in the user-level lamd cache
+(``raster``, see :mod:`lamd.cache`) by the image's content hash, and a
+variant newer than its image is left alone.
+
+Scaling needs the optional Pillow package (``pip install lamd[images]``).
+
+Usage::
+
+    lamd-raster-variants --talk talk.md
+    lamd-raster-variants diagrams/ml/photo.png --target-dir ../site/diagrams
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    from PIL import Image
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+from lamd.cache import cache_dir, file_hash, write_atomic
+from lamd.diagrams.sync import relative_target
+
+# Must match the srcset widths in talk-macros-html.gpp
+RESPONSIVE_WIDTHS = (480, 960, 1600)
+RASTER_EXTS = (".png", ".jpg", ".jpeg")
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+# Bump when the variants written change, to retire cached results
+VARIANTS_VERSION = "1"
+
+_RESPONSIVE_MACRO = re.compile(r"\\include(png|jpg)responsive\{([^}]*)\}|\\includeimgresponsive\{([^}]*)\}\{([^}]*)\}")
+
+
+def variant_path(path: str, width: int, ext: Optional[str] = None) -> str:
+    """Return the name of the *width* variant of an image (in format *ext*, default its own)."""
+    stem, own = os.path.splitext(path)
+    return f"{stem}-{width}w{ext or own}"
+
+
+def responsive_images(
+    talk: str, diagrams_dir: str, snippets_path: str = "..", inputs: Optional[Sequence[str]] = None
+) -> List[str]:
+    """
+    Return the images a talk includes with the responsive image macros.
+
+    Args:
+        talk: Talk markdown file
+        diagrams_dir: Filesystem diagrams root (substituted for ``\\diagramsDir``)
+        snippets_path: Directory containing snippet files
+        inputs: The talk's included files, when already extracted
+    """
+    if inputs is None:
+        import lynguine.util.talk as nt
+
+        inputs = list(nt.extract_inputs(talk, snippets_path=snippets_path) or [])
+
+    images: List[str] = []
+    for filename in [talk, *inputs]:
+        if not os.path.exists(filename):
+            filename = os.path.join(snippets_path, filename)
+        try:
+            with open(filename, encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            continue
+        for ext, stem, path, img_ext in _RESPONSIVE_MACRO.findall(text):
+            image = f"{stem}.{ext}" if ext else f"{path}.{img_ext}"
+            image = image.replace("\\diagramsDir", diagrams_dir)
+            if "\\" not in image and image not in images:
+                images.append(image)
+    return images
+
+
+def scaled(image: "Image.Image", width: int, ext: str) -> bytes:
+    """Return *image* scaled down to *width* (never up) and encoded as *ext*."""
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    if ext == ".webp":
+        image.save(out, "WEBP", quality=WEBP_QUALITY, method=6)
+    elif ext in (".jpg", ".jpeg"):
+        image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+
+def _cached(path: str, digest: str, width: int, ext: str) -> str:
+    key = hashlib.sha256(f"{VARIANTS_VERSION}:{digest}:{width}:{ext}".encode("ascii")).hexdigest()
+    return os.path.join(cache_dir("raster"), key[:2], key + ext)
+
+
+def make_variants(path: str, widths: Sequence[int] = RESPONSIVE_WIDTHS, target_dir: Optional[str] = None) -> List[str]:
+    """
+    Write the variants of an image that are missing or older than it.
+
+    Args:
+        path: PNG or JPEG image
+        widths: Variant widths
+        target_dir: Directory mirroring the diagrams tree to write into (default: next to the image)
+
+    Returns:
+        The variants written
+
+    Raises:
+        OSError: If the image cannot be read or a variant written
+        RuntimeError: If a variant must be made and Pillow is not installed
+    """
+    mtime = os.path.getmtime(path)
+    published = os.path.join(target_dir, relative_target(path)) if target_dir else path
+    stale: List[Tuple[str, int, str]] = []
+    for width in widths:
+        for ext in (os.path.splitext(path)[1].lower(), ".webp"):
+            target = variant_path(published, width, ext if ext == ".webp" else None)
+            if not os.path.exists(target) or os.path.getmtime(target) < mtime:
+                stale.append((target, width, ext))
+    if not stale:
+        return []
+    digest = file_hash(path)
+    image = None
+    for target, width, ext in stale:
+        cached = _cached(path, digest, width, ext)
+        if not os.path.exists(cached):
+            if not PIL_AVAILABLE:
+                raise RuntimeError("Pillow is required to make responsive image variants (pip install lamd[images])")
+            if image is None:
+                image = Image.open(path)
+                image.load()
+            write_atomic(cached, scaled(image, width, ext))
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        shutil.copyfile(cached, target)
+    return [target for target, _, _ in stale]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Write the responsive variants of a talk's images.
+
+    Returns:
+        int: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(description="Write downscaled and WebP variants of raster images.")
+    parser.add_argument("images", nargs="*", help="PNG or JPEG images")
+    parser.add_argument("--talk", help="Also the images this talk includes with the responsive macros")
+    parser.add_argument("--diagrams-dir", help="Filesystem diagrams directory (default: from _lamd.yml)")
+    parser.add_argument("--snippets-dir", default="..", help="Snippets directory")
+    parser.add_argument("--target-dir", help="Write the variants under this directory (default: next to each image)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Report the variants written")
+    args = parser.parse_args(argv)
+
+    images = list(args.images)
+    if args.talk:
+        from lamd.paths import load_config, resolve_diagrams_filesystem
+
+        diagrams_dir = resolve_diagrams_filesystem(load_config("."), cli=args.diagrams_dir)
+        images += responsive_images(args.talk, diagrams_dir, args.snippets_dir)
+    images = [image for image in dict.fromkeys(images) if image.lower().endswith(RASTER_EXTS)]
+    missing = [image for image in images if not os.path.isfile(image)]
+    for image in missing:
+        print(f"Warning: Image '{image}' does not exist, skipping", file=sys.stderr)
+    try:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+            made = pool.map(partial(make_variants, target_dir=args.target_dir), [i for i in images if i not in missing])
+            written = [variant for variants in made for variant in variants]
+    except (OSError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.verbose:
+        print(f"lamd-raster-variants: {len(written)} variants written for {len(images)} images", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
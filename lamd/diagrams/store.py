@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Publish diagrams once, into a shared content-addressed store.
+
+Posts, slides and notebooks each publish their own copy of a talk's
+diagrams, and the snippet diagrams that many talks share are copied again
+for every one of them. When ``diagramsstore`` (a directory) and
+``diagramsstoreurl`` (the URL it is served from) are set in ``_lamd.yml``,
+``lamd-store-diagrams`` instead stores each diagram once, named by its
+content hash::
+
+    <diagramsstore>/3f/3fa9...c1.svg
+
+and rewrites the ``\\diagramsDir`` URLs in the talk's HTML and ipynb outputs
+to point at the stored files. Identical diagrams from different talks or
+directories share one file, and since a stored file never changes, web
+servers can cache it indefinitely.
+
+The store keeps an index, ``.lamd-store.json``, of the size, mtime and name
+of each source it has stored, so an unchanged diagram is not read again.
+SVGs that link to other local files (embedded images) would lose those
+links under a hashed name, so they are left at their usual URL, where
+``lamd-sync-diagrams --skip-stored`` still publishes them. With
+``--optimise`` SVGs are stored minified (see :mod:`lamd.diagrams.optimise`).
+
+Usage::
+
+    lamd-store-diagrams talk.md --store ../assets/diagrams --url /assets/diagrams talk.posts.html talk.ipynb
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from lamd.cache import file_hash, write_atomic
+from lamd.diagrams.cache import linked_files
+from lamd.diagrams.optimise import MODES, publishable_content
+from lamd.diagrams.sync import COPY_WORKERS, copy_file, diagram_files, file_stat, relative_target
+
+INDEX = ".lamd-store.json"
+
+# No hard links: editing a source in place would change its stored file
+LINK_MODES = ("auto", "reflink", "copy")
+
+# Characters that end a URL in HTML attributes, markdown links and JSON strings
+_URL_END = "\\s\"'()<>\\\\"
+
+
+def store_name(digest: str, path: str) -> str:
+    """Return the stored name of a file: its hash under a two-character prefix directory, keeping the extension."""
+    return f"{digest[:2]}/{digest}{os.path.splitext(path)[1].lower()}"
+
+
+class DiagramStore:
+    """A directory of diagrams named by content, with an index of the sources stored in it."""
+
+    def __init__(self, directory: str, url: str, link: str = "auto", optimise: Optional[str] = None):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Store directory
+            url: URL prefix the store is served from
+            link: How files are copied (see :func:`lamd.diagrams.sync.copy_file`)
+            optimise: Store SVGs minified in this mode (see :mod:`lamd.diagrams.optimise`)
+        """
+        self.directory = directory
+        self.url = url.rstrip("/")
+        self.link = link
+        self.optimise = optimise
+        self.index_path = os.path.join(directory, INDEX)
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.added: List[str] = []
+
+    def load(self) -> None:
+        """Read the index (an unreadable index is treated as empty)."""
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = dict(json.load(f))
+        except (OSError, ValueError, TypeError):
+            self.index = {}
+
+    def save(self) -> None:
+        """Write the index."""
+        write_atomic(self.index_path, json.dumps(self.index, indent=1, sort_keys=True))
+
+    def _name(self, source: str) -> str:
+        """Return the stored name of what is published for *source*."""
+        data = publishable_content(source, self.optimise)
+        return store_name(file_hash(source) if data is None else hashlib.sha256(data).hexdigest(), source)
+
+    def _add(self, name: str, source: str) -> None:
+        destination = os.path.join(self.directory, name)
+        data = publishable_content(source, self.optimise)
+        if data is None:
+            copy_file(source, destination, self.link)
+        else:
+            write_atomic(destination, data)
+
+    def publish(self, sources: Iterable[str]) -> Dict[str, str]:
+        """
+        Store diagrams, reading only those that are new or changed since they were last stored.
+
+        Args:
+            sources: Diagram files
+
+        Returns:
+            Mapping of each stored source to its URL
+
+        Raises:
+            OSError: If a diagram cannot be stored
+        """
+        records: Dict[str, Dict[str, Any]] = {}
+        changed = []
+        for source in sources:
+            record = self.index.get(os.path.abspath(source))
+            if record is not None and record.get("stat") == file_stat(source) and record.get("optimise") == self.optimise:
+                if os.path.exists(os.path.join(self.directory, record["name"])):
+                    records[source] = record
+                    continue
+            changed.append(source)
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+            names = dict(zip(changed, pool.map(self._name, changed)))
+            new: Dict[str, str] = {}  # one copy per new content, however many sources share it
+            for source, name in names.items():
+                if name not in new and not os.path.exists(os.path.join(self.directory, name)):
+                    new[name] = source
+            list(pool.map(self._add, new, new.values()))
+        self.added.extend(new.values())
+        for source, name in names.items():
+            self.index[os.path.abspath(source)] = records[source] = {
+                "stat": file_stat(source),
+                "optimise": self.optimise,
+                "name": name,
+            }
+        return {source: f"{self.url}/{record['name']}" for source, record in records.items()}
+
+
+def storable(path: str) -> bool:
+    """Return True if a diagram keeps working under a hashed name (it does not link to local files)."""
+    return not (path.lower().endswith(".svg") and linked_files(path))
+
+
+def store_key(source: str, diagrams_dir: str) -> str:
+    """Return the path under ``\\diagramsDir`` whose URLs a stored diagram replaces."""
+    root = os.path.abspath(diagrams_dir)
+    path = os.path.abspath(source)
+    rel = os.path.relpath(path, root) if path.startswith(root + os.sep) else relative_target(source)
+    return rel.replace(os.sep, "/")
+
+
+def unstored(sources: Iterable[str], diagrams_dir: str) -> List[str]:
+    """
+    Return the diagrams that stay at their usual URL when the store is used.
+
+    These are the SVGs that link local files, and any diagram whose store key
+    differs from the path ``lamd-sync-diagrams`` publishes it under, since
+    :func:`rewrite` would not match its URLs.
+
+    Args:
+        sources: Diagram files
+        diagrams_dir: Filesystem diagrams root (what ``\\diagramsDir`` points at)
+
+    Returns:
+        The sources still to be published to the usual target directory
+    """
+    return [
+        source
+        for source in sources
+        if not storable(source) or store_key(source, diagrams_dir) != relative_target(source).replace(os.sep, "/")
+    ]
+
+
+def store_diagrams(
+    sources: Iterable[str],
+    diagrams_dir: str,
+    directory: str,
+    url: str,
+    link: str = "auto",
+    optimise: Optional[str] = None,
+) -> Tuple[Dict[str, str], DiagramStore]:
+    """
+    Store diagrams and return the URL of each by its path under ``\\diagramsDir``.
+
+    Args:
+        sources: Diagram files
+        diagrams_dir: Filesystem diagrams root (what ``\\diagramsDir`` points at)
+        directory: Store directory
+        url: URL prefix the store is served from
+        link: How files are copied
+        optimise: Store SVGs minified in this mode
+
+    Returns:
+        (urls keyed by path relative to the diagrams root, the store)
+    """
+    root = os.path.abspath(diagrams_dir)
+    wanted = [source for source in dict.fromkeys(sources) if os.path.isfile(source) and storable(source)]
+    os.makedirs(directory, exist_ok=True)
+    store = DiagramStore(directory, url, link, optimise)
+    with open(os.path.join(directory, INDEX + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        store.load()
+        try:
+            urls = store.publish(wanted)
+        finally:
+            store.save()
+    return {store_key(source, root): stored for source, stored in urls.items()}, store
+
+
+def rewrite(text: str, prefix: str, urls: Mapping[str, str]) -> Tuple[str, int]:
+    """
+    Point ``\\diagramsDir`` URLs at the store.
+
+    Args:
+        text: HTML or notebook JSON
+        prefix: What ``\\diagramsDir`` expanded to
+        urls: Stored URLs keyed by path under the diagrams root
+
+    Returns:
+        (rewritten text, number of URLs rewritten)
+    """
+    pattern = re.compile(re.escape(prefix.rstrip("/")) + f"/([^{_URL_END}]+)")
+    count = 0
+
+    def replace(match: "re.Match[str]") -> str:
+        nonlocal count
+        stored = urls.get(match.group(1))
+        if stored is None:
+            return match.group(0)
+        count += 1
+        return stored
+
+    return pattern.sub(replace, text), count
+
+
+def rewrite_file(path: str, prefix: str, urls: Mapping[str, str]) -> int:
+    """Rewrite the diagram URLs of an output file in place; return how many changed."""
+    with open(path, encoding="utf-8") as f:
+        text, count = rewrite(f.read(), prefix, urls)
+    if count:
+        write_atomic(path, text)
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Store a talk's diagrams and point its HTML/ipynb outputs at them.
+
+    Returns:
+        int: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(description="Publish a talk's diagrams to a shared content-addressed store.")
+    parser.add_argument("source", help="Talk markdown file")
+    parser.add_argument("outputs", nargs="*", help="HTML or ipynb outputs whose diagram URLs are rewritten")
+    parser.add_argument("--store", required=True, help="Store directory (diagramsstore)")
+    parser.add_argument("--url", required=True, help="URL prefix the store is served from (diagramsstoreurl)")
+    parser.add_argument("--diagrams-dir", help="Filesystem diagrams directory (default: from _lamd.yml)")
+    parser.add_argument("--diagrams-web", help="What \\diagramsDir expanded to in the outputs (default: from _lamd.yml)")
+    parser.add_argument("--snippets-dir", default="..", help="Snippets directory")
+    parser.add_argument("--link", choices=LINK_MODES, default="auto", help="How files are copied (default: auto)")
+    parser.add_argument("--optimise", choices=MODES, help="Store SVGs minified (see lamd-optimise-svg)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Report what was stored and rewritten")
+    args = parser.parse_args(argv)
+
+    from lamd.paths import load_config, resolve_diagrams_filesystem, resolve_diagrams_web
+
+    config = load_config(".")
+    diagrams_dir = resolve_diagrams_filesystem(config, cli=args.diagrams_dir)
+    prefix = args.diagrams_web or resolve_diagrams_web(config)
+    try:
+        sources = diagram_files(args.source, "diagrams", diagrams_dir, args.snippets_dir)
+        urls, store = store_diagrams(sources, diagrams_dir, args.store, args.url, args.link, args.optimise)
+        rewritten = {output: rewrite_file(output, prefix, urls) for output in args.outputs}
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.verbose:
+        print(f"Diagram store: {len(store.added)} added, {len(urls)} in use")
+        for output, count in rewritten.items():
+            print(f"Rewrote {count} diagram URLs in {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Publish a talk's diagrams into a web or TeX directory.
+
+This replaces the loop in ``copy_web_diagrams.sh``, which ran
+``lamd-resolve-diagrams-dir`` and ``dependencies`` as subprocesses and then
+compared, created directories and copied file by file. ``lamd-sync-diagrams``
+reads the talk's diagram list in-process and keeps a manifest,
+``.lamd-manifest.json``, in the target directory. For each published file
+the manifest records the size, mtime and hash of the source and of the
+copy. A file whose source and copy both still match their records is
+skipped without reading either, so a sync costs O(changed files).
+
+Changed files are copied in parallel through a temporary file and a rename,
+so readers never see a partial diagram. Where the filesystem supports it
+the copy is a reflink (copy-on-write clone); ``--link hard`` hard-links
+instead. With ``--optimise safe`` (or ``aggressive``) SVGs are published
+minified by :mod:`lamd.diagrams.optimise`, and the bytes saved are reported.
+
+The manifest also records which files each talk published. When a talk
+stops using a diagram, its copy is removed (pruned), unless another talk
+still publishes it or it was changed since lamd wrote it. Files lamd did
+not publish are never removed.
+
+With ``--skip-stored`` only the diagrams that ``lamd-store-diagrams`` leaves
+at their usual URL are published (see :func:`lamd.diagrams.store.unstored`).
+
+Usage (the arguments of ``copy_web_diagrams.sh``)::
+
+    lamd-sync-diagrams talk.md slidediagrams ../slides/diagrams ../slides ../diagrams ../_snippets
+"""
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lamd.cache import file_hash, write_atomic
+from lamd.diagrams.optimise import MODES, publishable_content
+
+MANIFEST = ".lamd-manifest.json"
+
+# Diagram extensions for each dependency type (None: every diagram type)
+DIAGRAM_TYPES: Dict[str, Optional[List[str]]] = {
+    "diagrams": None,
+    "slidediagrams": ["svg"],
+    "texdiagrams": ["pdf"],
+    "docxdiagrams": ["emf"],
+    "pptxdiagrams": ["emf"],
+}
+LINK_MODES = ("auto", "reflink", "hard", "copy")
+
+# Linux FICLONE ioctl: share the source's extents (btrfs, XFS, bcachefs, ...)
+_FICLONE = 0x40049409
+
+COPY_WORKERS = min(32, 4 * (os.cpu_count() or 1))
+
+
+def diagram_files(source: str, diagram_type: str, diagrams_dir: str, snippets_path: str = "..") -> List[str]:
+    """
+    Return the diagrams a talk uses, as the ``dependencies`` command would.
+
+    Args:
+        source: Talk markdown file
+        diagram_type: One of :data:`DIAGRAM_TYPES`
+        diagrams_dir: Filesystem diagrams root
+        snippets_path: Directory containing snippet files
+    """
+    import lynguine.util.talk as nt
+
+    kwargs: Dict[str, Any] = {"diagrams_dir": diagrams_dir, "snippets_path": snippets_path}
+    exts = DIAGRAM_TYPES[diagram_type]
+    if exts is not None:
+        kwargs.update(absolute_path=False, diagram_exts=exts)
+    return list(nt.extract_diagrams(source, **kwargs) or [])
+
+
+def relative_target(path: str) -> str:
+    """Return where a diagram goes inside the target directory: its path after the last ``diagrams/``."""
+    return path.rsplit("diagrams/", 1)[-1]
+
+
+def file_stat(path: str) -> Optional[List[int]]:
+    """Return a file's [size, mtime_ns], or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _reflink(source: str, destination: str) -> bool:
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def copy_file(source: str, destination: str, link: str = "auto") -> None:
+    """
+    Replace *destination* with *source* atomically.
+
+    Args:
+        source: File to publish
+        destination: Path in the target directory
+        link: ``reflink``/``auto`` (clone where supported, else copy), ``hard`` or ``copy``
+
+    Raises:
+        OSError: If the file cannot be published
+    """
+    directory = os.path.dirname(destination) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    os.close(fd)
+    try:
+        if link == "hard":
+            os.unlink(tmp)
+            try:
+                os.link(source, tmp)
+            except OSError:
+                shutil.copyfile(source, tmp)
+        elif link == "copy" or not _reflink(source, tmp):
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, destination)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+class DiagramSync:
+    """The manifest of a target directory and the operations that keep it in step."""
+
+    def __init__(self, target_dir: str, link: str = "auto", verbose: bool = False, optimise: Optional[str] = None):
+        """
+        Initialize the sync.
+
+        Args:
+            target_dir: Directory diagrams are published to
+            link: How files are copied (see :func:`copy_file`)
+            verbose: Report each copy and removal
+            optimise: Publish SVGs minified in this mode (see :mod:`lamd.diagrams.optimise`)
+        """
+        self.target_dir = target_dir
+        self.link = link
+        self.verbose = verbose
+        self.optimise = optimise
+        self.manifest_path = os.path.join(target_dir, MANIFEST)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.talks: Dict[str, List[str]] = {}
+        self.copied: List[str] = []
+        self.pruned: List[str] = []
+        self.saved = 0
+
+    def load(self) -> None:
+        """Read the manifest (an unreadable manifest is treated as empty)."""
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            self.files = dict(manifest.get("files", {}))
+            self.talks = {talk: list(rels) for talk, rels in manifest.get("talks", {}).items()}
+        except (OSError, ValueError, AttributeError):
+            self.files, self.talks = {}, {}
+
+    def save(self) -> None:
+        """Write the manifest."""
+        manifest = {"files": self.files, "talks": self.talks}
+        write_atomic(self.manifest_path, json.dumps(manifest, indent=1, sort_keys=True))
+
+    def _unchanged(self, source: str, rel: str) -> bool:
+        """Return True if the published copy of *source* is current, judged from the manifest alone."""
+        record = self.files.get(rel)
+        destination = os.path.join(self.target_dir, rel)
+        return (
+            record is not None
+            and record.get("source") == os.path.abspath(source)
+            and record.get("optimise") == self.optimise
+            and record.get("source_stat") == file_stat(source)
+            and record.get("target_stat") == file_stat(destination)
+        )
+
+    def _publish(self, source: str, rel: str) -> Tuple[str, Dict[str, Any], int]:
+        """
+        Copy *source* to *rel* unless the copy already has its content.
+
+        Returns:
+            (rel, the new record, bytes written or -1 when nothing was copied)
+        """
+        destination = os.path.join(self.target_dir, rel)
+        data = publishable_content(source, self.optimise)
+        digest = file_hash(source) if data is None else hashlib.sha256(data).hexdigest()
+        record = self.files.get(rel) or {}
+        current = record.get("hash") if record.get("target_stat") == file_stat(destination) else None
+        if current is None and os.path.exists(destination):
+            current = file_hash(destination)
+        written = -1
+        if current != digest:
+            if data is None:
+                copy_file(source, destination, self.link)
+                written = os.path.getsize(destination)
+            else:
+                write_atomic(destination, data)
+                written = len(data)
+        new = {
+            "source": os.path.abspath(source),
+            "source_stat": file_stat(source),
+            "optimise": self.optimise,
+            "hash": digest,
+            "target_stat": file_stat(destination),
+        }
+        return rel, new, written
+
+    def sync(self, talk: str, sources: Iterable[str], prune: bool = True) -> None:
+        """
+        Publish a talk's diagrams and prune the ones it no longer uses.
+
+        Args:
+            talk: Key identifying the talk in the manifest
+            sources: Diagram files to publish
+            prune: Remove copies the talk no longer publishes
+
+        Raises:
+            OSError: If a diagram cannot be copied
+        """
+        wanted: Dict[str, str] = {}
+        for source in sources:
+            if not os.path.isfile(source):
+                print(f"Warning: Source file '{source}' does not exist, skipping", file=sys.stderr)
+                continue
+            wanted[relative_target(source)] = source
+        changed = [(source, rel) for rel, source in wanted.items() if not self._unchanged(source, rel)]
+        with ThreadPoolExecutor(max_workers=COPY_WORKERS) as pool:
+            for rel, record, written in pool.map(lambda item: self._publish(*item), changed):
+                self.files[rel] = record
+                if written >= 0:
+                    self.copied.append(rel)
+                    self.saved += record["source_stat"][0] - written
+                    if self.verbose:
+                        print(f"Copying {wanted[rel]} to {os.path.join(self.target_dir, rel)}")
+        previous = set(self.talks.get(talk, []))
+        self.talks[talk] = sorted(wanted)
+        if prune:
+            self._prune(previous - set(wanted))
+
+    def _prune(self, candidates: Iterable[str]) -> None:
+        """Remove published copies no talk uses any more, if they are as lamd left them."""
+        in_use = {rel for rels in self.talks.values() for rel in rels}
+        for rel in sorted(set(candidates) - in_use):
+            record = self.files.pop(rel, None)
+            destination = os.path.join(self.target_dir, rel)
+            if record is None or record.get("target_stat") != file_stat(destination):
+                continue
+            os.unlink(destination)
+            self.pruned.append(rel)
+            if self.verbose:
+                print(f"Removing {destination}, no longer used")
+            directory = os.path.dirname(destination)
+            while os.path.abspath(directory) != os.path.abspath(self.target_dir):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+
+def sync_diagrams(
+    talk: str,
+    sources: Iterable[str],
+    target_dir: str,
+    prune: bool = True,
+    link: str = "auto",
+    verbose: bool = False,
+    optimise: Optional[str] = None,
+) -> DiagramSync:
+    """
+    Publish diagrams into *target_dir*, holding its manifest lock.
+
+    Args:
+        talk: Key identifying the talk in the manifest
+        sources: Diagram files to publish
+        target_dir: Directory to publish into
+        prune: Remove copies the talk no longer publishes
+        link: How files are copied (see :func:`copy_file`)
+        verbose: Report each copy and removal
+        optimise: Publish SVGs minified in this mode
+
+    Returns:
+        The finished sync (``copied`` and ``pruned`` list what changed)
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    sync = DiagramSync(target_dir, link, verbose, optimise)
+    with open(os.path.join(target_dir, MANIFEST + ".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        sync.load()
+        try:
+            sync.sync(talk, sources, prune)
+        finally:
+            sync.save()
+    return sync
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Publish a talk's diagrams (the interface of ``copy_web_diagrams.sh``).
+
+    Returns:
+        int: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(description="Copy a talk's diagrams into a target directory.")
+    parser.add_argument("source", help="Talk markdown file")
+    parser.add_argument("diagram_type", choices=sorted(DIAGRAM_TYPES), help="Which diagrams to publish")
+    parser.add_argument("target_dir", help="Directory to publish into")
+    parser.add_argument("slides_dir", help="Slides directory (must exist)")
+    parser.add_argument("diagrams_dir", help="Diagrams directory")
+    parser.add_argument("snippets_dir", help="Snippets directory")
+    parser.add_argument("--link", choices=LINK_MODES, default="auto", help="How files are copied (default: auto)")
+    parser.add_argument("--optimise", choices=MODES, help="Publish SVGs minified (see lamd-optimise-svg)")
+    parser.add_argument("--no-prune", action="store_true", help="Keep copies of diagrams the talk no longer uses")
+    parser.add_argument(
+        "--skip-stored", action="store_true", help="Leave out diagrams lamd-store-diagrams serves from its store"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="Report each copy and removal")
+    args = parser.parse_args(argv)
+
+    from lamd.paths import resolve_diagrams_filesystem
+
+    diagrams_dir = args.diagrams_dir
+    resolved = resolve_diagrams_filesystem({}, cli=diagrams_dir)
+    if os.path.isdir(resolved):
+        diagrams_dir = resolved
+    for label, path in (("Slides", args.slides_dir), ("Diagrams", diagrams_dir), ("Snippets", args.snippets_dir)):
+        if not os.path.isdir(path):
+            print(f"Error: {label} directory '{path}' does not exist", file=sys.stderr)
+            return 1
+    if not os.path.isfile(args.source):
+        print(f"Error: Source file '{args.source}' does not exist", file=sys.stderr)
+        return 1
+
+    try:
+        sources = diagram_files(args.source, args.diagram_type, diagrams_dir, args.snippets_dir)
+        if args.skip_stored:
+            from lamd.diagrams.store import unstored
+
+            sources = unstored(sources, diagrams_dir)
+        talk = f"{os.path.abspath(args.source)}:{args.diagram_type}"
+        sync = sync_diagrams(talk, sources, args.target_dir, not args.no_prune, args.link, args.verbose, args.optimise)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.verbose:
+        print(f"Diagram sync completed: {len(sync.copied)} copied, {len(sync.pruned)} removed")
+    if args.optimise and sync.copied:
+        print(f"SVG optimisation saved {sync.saved / 1024:.1f} KiB over {len(sync.copied)} published diagrams")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,9 +25,12 @@ Example:
 import argparse
 import os
 import sys
+from typing import Optional
 
 import lynguine.util.yaml as ny
 
+from lamd.manim_profiles import PROFILES
+
 _LAMD_INCLUDES = os.path.join(os.path.dirname(__file__), "includes")
 
 
@@ -48,16 +51,16 @@ def resolve_reference_doc(path: str) -> str:
     return expanded
 
 
-def main() -> int:
+OUTPUTS = ["pp", "post", "docx", "pptx", "prefix", "reveal", "cv", "manim", "manim-convert", "manim-profile"]
+
+
+def flags_for(output: str, base: str) -> Optional[str]:
     """
-    Process markdown files and extract appropriate pandoc flags based on YAML frontmatter.
+    Return the pandoc flags for one output type of a markdown file.
 
-    This function:
-    1. Parses command-line arguments for output type and base filename
-    2. Reads YAML frontmatter from the specified markdown file
-    3. Extracts relevant fields from the frontmatter or config files
-    4. Generates a prefix for output filenames based on layout and metadata
-    5. Outputs appropriate pandoc flags based on the requested output format
+    Reads the YAML frontmatter of ``<base>.md``, falling back to the
+    configuration files for missing fields, and builds the flags for the
+    requested output.
 
     Output formats:
         prefix: Returns the file prefix only, based on date and layout
@@ -68,23 +71,16 @@ def main() -> int:
         pp: Generates flags for the preprocessor
         cv: Placeholder for CV-specific flags (not fully implemented)
 
+    Args:
+        output: The output type (one of ``OUTPUTS``)
+        base: The base part of the filename
+
     Returns:
-        int: Exit code (0 for success)
+        The flags, or None when the output type has nothing to print
     """
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "output",
-        type=str,
-        choices=["pp", "post", "docx", "pptx", "prefix", "reveal", "cv", "manim", "manim-convert"],
-        help="The type of output file (post is for a jekyll post, docx for word, pptx for powerpoint, manim for manim-slides flags)",
-    )
-    parser.add_argument("base", type=str, help="The base part of the filename")
-
     user_file = ["_lamd.yml", "_config.yml"]
 
-    args = parser.parse_args()
-
-    filename = args.base + ".md"
+    filename = base + ".md"
 
     fields = ny.header_fields(filename)
 
@@ -220,13 +216,13 @@ def main() -> int:
         else:
             prefix = ""
 
-    out = prefix + args.base
+    out = prefix + base
 
     lines = ""
-    if args.output == "prefix":
-        print(prefix)
+    if output == "prefix":
+        return prefix
 
-    elif args.output == "post":
+    elif output == "post":
         if date is not None:
             lines += """--metadata date={date} """
         for ext in ["docx", "pptx"]:
@@ -248,24 +244,24 @@ def main() -> int:
             ghub = ny.header_field("ghub", fields, user_file)[0]
             local_edit = (
                 f"https://github.com/{ghub['organization']}/{ghub['repository']}"
-                f"/edit/{ghub['branch']}/{ghub['directory']}/{args.base}.md"
+                f"/edit/{ghub['branch']}/{ghub['directory']}/{base}.md"
             )
             lines += f" --metadata edit_url={local_edit}"
-        print(lines.format(out=out, date=date))
+        return lines.format(out=out, date=date)
 
-    elif args.output == "docx":
+    elif output == "docx":
         lines += "--reference-doc " + resolve_reference_doc(ny.header_field("dotx", fields, user_file))
-        print(lines)
+        return lines
 
-    elif args.output == "pptx":
+    elif output == "pptx":
         lines += "--reference-doc " + resolve_reference_doc(ny.header_field("potx", fields, user_file))
-        print(lines)
+        return lines
 
-    elif args.output == "reveal":
+    elif output == "reveal":
         lines += "--slide-level 2 " + revealjs_urlarg + talkthemearg + talkcssarg
-        print(lines)
+        return lines
 
-    elif args.output == "pp":
+    elif output == "pp":
         lines = "--include-path ./.."
         # Flags for the preprocessor.
         try:
@@ -274,33 +270,61 @@ def main() -> int:
         except ny.FileFormatError:
             pass
 
-        print(lines)
+        return lines
 
-    elif args.output == "cv":
+    elif output == "cv":
         # For CV output, we don't need to print any specific flags
         # This is a placeholder for future implementation
         pass
 
-    elif args.output == "manim":
-        # Return flags for manim-slides render from frontmatter 'manim:' block
-        # Returns empty string by default; frontmatter-driven customisation can follow later
+    elif output in ("manim", "manim-profile"):
+        # The frontmatter 'manim:' field is render flags, a render profile name,
+        # or a mapping with 'flags' and 'profile' entries (see lamd.manim_profiles)
         try:
-            manim_flags = ny.header_field("manim", fields, user_file)
-            if isinstance(manim_flags, str):
-                print(manim_flags)
+            manim = ny.header_field("manim", fields, user_file)
         except ny.FileFormatError:
-            pass
-
-    elif args.output == "manim-convert":
+            return None
+        if isinstance(manim, str):
+            manim = {"profile": manim} if manim in PROFILES else {"flags": manim}
+        if isinstance(manim, dict):
+            value = manim.get("profile" if output == "manim-profile" else "flags")
+            if isinstance(value, str):
+                return value
+
+    elif output == "manim-convert":
         # Return flags for manim-slides convert from frontmatter 'manim-convert:' block
         # Returns empty string by default; frontmatter-driven customisation can follow later
         try:
             manim_convert_flags = ny.header_field("manim-convert", fields, user_file)
             if isinstance(manim_convert_flags, str):
-                print(manim_convert_flags)
+                return manim_convert_flags
         except ny.FileFormatError:
             pass
 
+    return None
+
+
+def main() -> int:
+    """
+    Print the pandoc flags for an output type based on YAML frontmatter.
+
+    Returns:
+        int: Exit code (0 for success)
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output",
+        type=str,
+        choices=OUTPUTS,
+        help="The type of output file (post is for a jekyll post, docx for word, pptx for powerpoint, manim for manim-slides flags)",
+    )
+    parser.add_argument("base", type=str, help="The base part of the filename")
+
+    args = parser.parse_args()
+
+    lines = flags_for(args.output, args.base)
+    if lines is not None:
+        print(lines)
     return 0
 
 
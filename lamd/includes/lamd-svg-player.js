@@ -0,0 +1,208 @@
+/*
+ * lamd-svg-player.js: reveal.js plugin playing manim SVG animations packed
+ * by lamd.util.svg_pack.
+ *
+ * A <section data-lamd-svg="path/to/animation_N"> plays the animation when it
+ * is shown. The plugin reads the animation's pack.json (or its entry in the
+ * presentation manifest), fetches the frame archive it names, inflates it
+ * with DecompressionStream, rebuilds delta-encoded frames and steps through
+ * the run-length "sequence" at the animation's frame rate.
+ * Set data-lamd-svg-loop="true" to loop.
+ *
+ * Nothing is fetched when the page opens except the presentation manifest
+ * written by lamd.util.svg_to_html (Reveal config lamdSvg.manifest), which
+ * lists every animation with its frame counts, sizes and run-length sequence.
+ * Each time a slide is shown the plugin fetches the current animation and the
+ * next lamdSvg.prefetch ones, and forgets those further back than the
+ * previous one, so long talks open at once and never download every
+ * animation at load time.
+ *
+ * A self-contained bundle (lamd.util.svg_to_html --bundle) embeds the
+ * manifest in <script type="application/json" id="lamd-svg-bundle">, with each
+ * animation's archive as base64 "data", so nothing is fetched at all.
+ */
+var LamdSVG = (function () {
+  "use strict";
+
+  var animations = {};
+  var config = { manifest: null, prefetch: 1 };
+  var presentation = null;
+
+  function byPath(manifest) {
+    var paths = {};
+    manifest.animations.forEach(function (animation) {
+      paths[animation.path] = animation;
+    });
+    return paths;
+  }
+
+  function entries() {
+    var bundle = document.getElementById("lamd-svg-bundle");
+    if (!presentation && bundle) {
+      presentation = Promise.resolve(byPath(JSON.parse(bundle.textContent)));
+    }
+    if (!presentation) {
+      presentation = !config.manifest
+        ? Promise.resolve({})
+        : fetch(config.manifest)
+            .then(function (response) {
+              return response.ok ? response.json() : { animations: [] };
+            })
+            .then(byPath)
+            .catch(function () {
+              return {};
+            });
+    }
+    return presentation;
+  }
+
+  function packManifest(path) {
+    return entries().then(function (paths) {
+      var entry = paths[path];
+      if (entry && entry.packed) return entry;
+      return fetch(path + "/pack.json").then(function (response) {
+        return response.json();
+      });
+    });
+  }
+
+  function decode(entries) {
+    var frames = [];
+    var previous = "";
+    entries.forEach(function (entry) {
+      var frame =
+        typeof entry === "string"
+          ? entry
+          : previous.slice(0, entry[0]) + entry[2] + previous.slice(previous.length - entry[1]);
+      frames.push(frame);
+      previous = frame;
+    });
+    return frames;
+  }
+
+  function inflate(body) {
+    return new Response(body.pipeThrough(new DecompressionStream("gzip"))).json();
+  }
+
+  function archive(path, manifest) {
+    if (manifest.data) {
+      var binary = atob(manifest.data);
+      var bytes = new Uint8Array(binary.length);
+      for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+      return inflate(new Blob([bytes]).stream());
+    }
+    return fetch(path + "/" + manifest.archive).then(function (response) {
+      if (!response.ok) {
+        throw new Error("lamd-svg-player: " + response.url + " returned " + response.status);
+      }
+      return inflate(response.body);
+    });
+  }
+
+  function load(path) {
+    if (!animations[path]) {
+      animations[path] = packManifest(path).then(function (manifest) {
+        return archive(path, manifest).then(function (entries) {
+          var order = [];
+          manifest.sequence.forEach(function (run) {
+            for (var i = 0; i < run[1]; i++) order.push(run[0]);
+          });
+          return { manifest: manifest, frames: decode(entries), order: order };
+        });
+      });
+    }
+    return animations[path];
+  }
+
+  function stage(section) {
+    var div = section.querySelector(".lamd-svg-stage");
+    if (!div) {
+      div = document.createElement("div");
+      div.className = "lamd-svg-stage";
+      div.style.width = "100%";
+      div.style.height = "100%";
+      section.appendChild(div);
+    }
+    return div;
+  }
+
+  function play(section) {
+    var token = {};
+    section._lamdSvgToken = token;
+    var loop = section.getAttribute("data-lamd-svg-loop") === "true";
+    load(section.getAttribute("data-lamd-svg")).then(function (animation) {
+      var target = stage(section);
+      var shown = -1;
+      var start = null;
+      var last = animation.order.length - 1;
+      function tick(now) {
+        if (section._lamdSvgToken !== token) return;
+        if (start === null) start = now;
+        var i = Math.floor(((now - start) * animation.manifest.fps) / 1000);
+        if (i > last) {
+          if (loop) {
+            start = now;
+            i = 0;
+          } else {
+            i = last;
+          }
+        }
+        var frame = animation.order[i];
+        if (frame !== shown) {
+          target.innerHTML = animation.frames[frame];
+          shown = frame;
+        }
+        if (loop || i < last) window.requestAnimationFrame(tick);
+      }
+      window.requestAnimationFrame(tick);
+    });
+  }
+
+  function stop(section) {
+    if (section) section._lamdSvgToken = null;
+  }
+
+  function prefetch(slide) {
+    var sections = Array.prototype.slice.call(document.querySelectorAll("section[data-lamd-svg]"));
+    var position = function (section, flag) {
+      return section !== slide && slide.compareDocumentPosition(section) & flag;
+    };
+    var after = sections.filter(function (section) {
+      return position(section, Node.DOCUMENT_POSITION_FOLLOWING);
+    });
+    var before = sections.filter(function (section) {
+      return position(section, Node.DOCUMENT_POSITION_PRECEDING);
+    });
+    var wanted = after.slice(0, config.prefetch);
+    if (slide.hasAttribute("data-lamd-svg")) wanted.unshift(slide);
+    var paths = wanted.map(function (section) {
+      return section.getAttribute("data-lamd-svg");
+    });
+    var keep = paths.slice();
+    if (before.length) keep.push(before[before.length - 1].getAttribute("data-lamd-svg"));
+    Object.keys(animations).forEach(function (path) {
+      if (keep.indexOf(path) < 0) delete animations[path];
+    });
+    paths.forEach(load);
+  }
+
+  function show(event) {
+    stop(event.previousSlide);
+    var slide = event.currentSlide;
+    if (!slide) return;
+    prefetch(slide);
+    if (slide.hasAttribute("data-lamd-svg")) play(slide);
+  }
+
+  return {
+    id: "lamd-svg",
+    init: function (deck) {
+      var options = deck.getConfig().lamdSvg || {};
+      if (options.manifest) config.manifest = options.manifest;
+      if (typeof options.prefetch === "number") config.prefetch = options.prefetch;
+      deck.on("ready", show);
+      deck.on("slidechanged", show);
+    },
+    load: load,
+  };
+})();
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Incremental LaTeX builds with rerun detection.
+
+The notes and paper rules used to run pdflatex twice and bibtex once on
+every change to the ``.tex`` file. ``lamd-latex`` works like latexmk:
+
+1. Run pdflatex once.
+2. Run bibtex only when the citations, bibliography style or ``.bib`` files
+   recorded in the ``.aux`` have changed since the last bibtex run, or the
+   ``.bbl`` is missing.
+3. Run pdflatex again only while the ``.aux``, ``.toc`` (and similar)
+   files or the ``.bbl`` change between runs, or the log asks for a rerun.
+
+The auxiliary files are kept between builds, and the hash of the last
+bibtex input is kept in ``.lamd/<job>.latex.json``. ``.bib`` files that are
+not in the build directory are found with ``kpsewhich``, as bibtex finds
+them; if one cannot be found at all, bibtex is run on every build rather
+than assuming it is unchanged. A notes PDF whose
+references and cross-references are unchanged therefore rebuilds with one
+pdflatex pass.
+
+Usage::
+
+    lamd-latex talk.notes.tex --shell-escape
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from lamd.cache import file_hash, write_atomic
+from lamd.paths import state_path
+
+# Files written by pdflatex whose changes need another pdflatex run
+AUX_SUFFIXES = (".aux", ".toc", ".lof", ".lot", ".out", ".nav", ".snm")
+
+RERUN_PATTERN = re.compile(r"Rerun to get|Label\(s\) may have changed|Please \(re\)run")
+_BIBTEX_LINE = re.compile(r"^\\(?:citation|bibdata|bibstyle)\{.*$", re.MULTILINE)
+_BIBDATA = re.compile(r"^\\bibdata\{(?P<files>[^}]*)\}", re.MULTILINE)
+
+
+def _hash(path: str) -> Optional[str]:
+    return file_hash(path) if os.path.exists(path) else None
+
+
+def aux_hashes(job: str) -> Dict[str, Optional[str]]:
+    """Return the hashes of a job's auxiliary files (None for missing files)."""
+    return {suffix: _hash(job + suffix) for suffix in AUX_SUFFIXES}
+
+
+def resolve_bibfiles(names: List[str]) -> Dict[str, Optional[str]]:
+    """
+    Find the ``.bib`` files named in a ``\\bibdata`` line, as bibtex would.
+
+    Names are looked up in the current directory first and then with a
+    single ``kpsewhich`` call, which searches ``BIBINPUTS`` and the TeX tree.
+
+    Returns:
+        Mapping of each name to its path, or None when it cannot be found
+    """
+    found: Dict[str, Optional[str]] = {}
+    for name in names:
+        found[name] = next((path for path in (name, name + ".bib") if os.path.isfile(path)), None)
+    missing = [name if name.endswith(".bib") else name + ".bib" for name, path in found.items() if path is None]
+    if missing:
+        try:
+            result = subprocess.run(["kpsewhich", *missing], capture_output=True, text=True)
+        except OSError:
+            return found
+        paths = {os.path.basename(path): path for path in result.stdout.splitlines() if path}
+        for name in found:
+            if found[name] is None:
+                found[name] = paths.get(os.path.basename(name if name.endswith(".bib") else name + ".bib"))
+    return found
+
+
+def bibtex_input(job: str) -> Optional[str]:
+    """
+    Hash what bibtex reads for a job.
+
+    Args:
+        job: Job name (the ``.tex`` file without its extension)
+
+    Returns:
+        A hash of the citation lines of the ``.aux`` and of the ``.bib``
+        files they name, None when the document has no bibliography, or an
+        empty string when a ``.bib`` file cannot be found, so that bibtex
+        is run rather than assumed to be up to date
+    """
+    try:
+        with open(job + ".aux", encoding="utf-8", errors="replace") as f:
+            aux = f.read()
+    except OSError:
+        return None
+    bibdata = _BIBDATA.findall(aux)
+    if not bibdata:
+        return None
+    digest = hashlib.sha256("\n".join(_BIBTEX_LINE.findall(aux)).encode("utf-8"))
+    names = [name.strip() for names in bibdata for name in names.split(",") if name.strip()]
+    for path in resolve_bibfiles(names).values():
+        if path is None:
+            return ""
+        digest.update(f"\0{path}\0{file_hash(path)}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _needs_rerun(job: str) -> bool:
+    try:
+        with open(job + ".log", encoding="utf-8", errors="replace") as f:
+            return RERUN_PATTERN.search(f.read()) is not None
+    except OSError:
+        return False
+
+
+def _log_errors(job: str, context: int = 2) -> str:
+    """Return the error lines (``! ...`` and the lines after them) of a job's log."""
+    try:
+        with open(job + ".log", encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ""
+    errors: List[str] = []
+    for i, line in enumerate(lines):
+        if line.startswith("!"):
+            errors.extend(lines[i : i + context + 1])
+    return "\n".join(errors)
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            state: Dict[str, Any] = json.load(f)
+            return state
+    except (OSError, ValueError):
+        return {}
+
+
+def build(tex: str, engine: str = "pdflatex", shell_escape: bool = False, max_runs: int = 5, verbose: bool = False) -> int:
+    """
+    Build a PDF from a LaTeX file with as few engine and bibtex runs as possible.
+
+    Args:
+        tex: The ``.tex`` file, in the current directory
+        engine: LaTeX engine to run
+        shell_escape: Pass ``-shell-escape`` to the engine
+        max_runs: Maximum number of engine runs
+        verbose: Report the runs made on stderr
+
+    Returns:
+        int: 0 on success, otherwise the exit code of the failing command
+    """
+    job = os.path.splitext(tex)[0]
+    command = [engine, "-interaction=nonstopmode", "-halt-on-error"]
+    if shell_escape:
+        command.append("-shell-escape")
+    command.append(tex)
+    state_file = state_path(os.path.basename(job) + ".latex.json")
+    state = _load_state(state_file)
+
+    output = None if verbose else subprocess.DEVNULL
+    runs: List[str] = []
+    bibtex_ran = False
+    for _ in range(max_runs):
+        before = aux_hashes(job)
+        bbl = _hash(job + ".bbl")
+        runs.append(engine)
+        status = subprocess.call(command, stdout=output)
+        if status != 0:
+            sys.stderr.write(f"{_log_errors(job)}\nlamd-latex: {engine} failed on {tex}, see {job}.log\n")
+            return status
+
+        bib_input = bibtex_input(job)
+        # An unresolved .bib file ("") might have changed: run bibtex once per build
+        stale = bib_input != state.get("bibtex") or not os.path.exists(job + ".bbl") or not (bib_input or bibtex_ran)
+        if bib_input is not None and stale:
+            bibtex_ran = True
+            runs.append("bibtex")
+            status = subprocess.call(["bibtex", job], stdout=output)
+            if status != 0:
+                sys.stderr.write(f"lamd-latex: bibtex failed on {job}, see {job}.blg\n")
+                return status
+            state["bibtex"] = bib_input
+            write_atomic(state_file, json.dumps(state, indent=2))
+
+        if aux_hashes(job) == before and _hash(job + ".bbl") == bbl and not _needs_rerun(job):
+            break
+    else:
+        sys.stderr.write(f"lamd-latex: {tex} did not settle after {max_runs} {engine} runs\n")
+
+    if verbose:
+        sys.stderr.write(f"lamd-latex: {tex}: {', '.join(runs)}\n")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Build a LaTeX document, rerunning the engine and bibtex only when needed.
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(description="Build a PDF with latexmk-style rerun detection.")
+    parser.add_argument("tex", help="LaTeX file to build")
+    parser.add_argument("--engine", default="pdflatex", help="LaTeX engine (default: pdflatex)")
+    parser.add_argument("--shell-escape", "-shell-escape", action="store_true", help="Pass -shell-escape to the engine")
+    parser.add_argument("--max-runs", type=int, default=5, help="Maximum number of engine runs (default: 5)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show engine output and the runs made")
+    args = parser.parse_args(argv)
+    return build(args.tex, args.engine, args.shell_escape, args.max_runs, args.verbose)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -16,6 +16,7 @@ import frontmatter
 
 import lamd
 from lamd.profiler import BuildProfiler
+from lamd.resources import makefile_export
 
 
 def main() -> int:
@@ -48,6 +49,14 @@ def main() -> int:
         "--profile", action="store_true", help="Enable detailed performance profiling (shows where build time is spent)"
     )
 
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Number of parallel make jobs; heavy tools are still capped per class by 'resources' in _lamd.yml",
+    )
+
     parser.add_argument(
         "--git-cache-minutes",
         type=int,
@@ -107,6 +116,8 @@ def main() -> int:
     with profiler.measure("Makefile generation"):
         with open("makefile", "w+") as f:
             f.write(f"BASE={base}\n")
+            f.write(f"LAMDDIR={dirname}\n")
+            f.write(f"LAMDPYTHON={sys.executable}\n")
             f.write(f"MAKEFILESDIR={make_dir}\n")
             f.write(f"INCLUDESDIR={includes_dir}\n")
             f.write(f"SCRIPTDIR={script_dir}\n")
@@ -121,6 +132,10 @@ def main() -> int:
                 f.write("\n# Profiling disabled\n")
                 f.write("TIME_CMD=\n")
 
+            # Per-class concurrency limits for lamd-run (see lamd.resources)
+            f.write("\n")
+            f.write(makefile_export(iface, args.jobs))
+
             f.write("\n")
             f.write("include $(MAKEFILESDIR)/make-cv-flags.mk\n")
             f.write("include $(MAKEFILESDIR)/make-lists.mk\n")
@@ -248,6 +263,10 @@ def main() -> int:
     if not args.no_server:
         os.environ["LAMD_USE_SERVER_CLIENT"] = "1"
 
+    # Parallel jobs are passed through MAKEFLAGS to the recursive make in make-cv.mk
+    if args.jobs:
+        os.environ["MAKEFLAGS"] = f"-j{args.jobs} {os.environ.get('MAKEFLAGS', '')}".strip()
+
     # Final build step (this is where most of the time is spent)
     with profiler.measure("Make execution (total)"):
         exit_code = os.system("make all")
@@ -48,6 +48,8 @@ PREFIX=$(shell flags prefix ${BASE})
 
 # Local calls for the preprocessor and inkscape
 INKSCAPE=inkscape #/Applications/Inkscape.app/Contents/Resources/bin/inkscape
+
+include $(MAKEFILESDIR)/make-resources.mk
 PP=mdpp
 FIND=gfind
 
@@ -57,6 +59,7 @@ PPFLAGS=$(shell flags pp $(BASE)) --macros=$(MACROSDIR)
 # Bibliography information
 BIBFLAGS=--bibliography=${BIBDIRECTORY}/lawrence.bib --bibliography=${BIBDIRECTORY}/other.bib --bibliography=${BIBDIRECTORY}/zbooks.bib 
 BIBDEPS=${BIBDIRECTORY}/lawrence.bib ${BIBDIRECTORY}/other.bib ${BIBDIRECTORY}/zbooks.bib 
+CITEDEPS=$(BIBDEPS)
 
 CITEFLAGS=--citeproc --csl=${INCLUDESDIR}/elsevier-harvard.csl ${BIBFLAGS}
 
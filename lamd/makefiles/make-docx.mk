@@ -5,16 +5,16 @@
 ${BASE}.preprocessed.md: ${BASE}.md ${DEPS} check-reference-docs
 	${PP} $< -o $@ --format notes --to docx --code sparse --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --diagrams-dir ${DIAGRAMSDIR} --edit-links ${PPFLAGS} --replace-notation
 
-${BASE}.docx: ${BASE}.preprocessed.md
-	pandoc -s \
+${BASE}.docx: ${BASE}.preprocessed.md ${CITEDEPS}
+	${CITEPROC} -s \
 		${CITEFLAGS} \
 		${DOCXFLAGS} \
 		-o ${BASE}.docx \
 		${BASE}.preprocessed.md
 
 # Original rule for reference
-original-${BASE}.docx: ${BASE}.notes.docx.markdown ${DOCXDEPS}
-	pandoc -s \
+original-${BASE}.docx: ${BASE}.notes.docx.markdown ${DOCXDEPS} ${CITEDEPS}
+	${CITEPROC} -s \
 		${CITEFLAGS} \
 		${DOCXFLAGS} \
 		-B ${INCLUDESDIR}/${NOTATION} \
@@ -1,11 +1,26 @@
 %.svg: %.svgi
 	${PP} $< -o $@ --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --format slides --to svg ${PPFLAGS} --include-before-body ../svgi-includes.gpp  --no-header
 
-%.pdf: %.svg
-	${INKSCAPE} $< --export-filename=$@ 
+# The talk's diagram conversions run in batched inkscape --shell sessions
+# (lamd-convert-diagrams) before any rule that needs them. The pattern rules
+# below wait for the batch and only convert what it left behind, such as
+# SVGs generated from .svgi files during the build. Both go through the
+# shared conversion cache, so a diagram converted by any talk on this
+# machine is copied rather than converted again.
+DIAGRAMCONVERSIONS=$(sort $(filter %.pdf %.png %.emf,$(TEXDEPS) $(DOCXDEPS) $(PPTXDEPS)))
+DIAGRAMSTAMP=.lamd/$(BASE).diagrams.stamp
 
-%.png: %.svg
-	${INKSCAPE} $< --export-filename=$@ 
+$(DIAGRAMSTAMP): $(wildcard $(addsuffix .svg,$(basename $(DIAGRAMCONVERSIONS))))
+	$(CONVERTDIAGRAMS) --inkscape ${INKSCAPE} $(DIAGRAMCONVERSIONS)
+	@mkdir -p $(dir $@) && touch $@
 
-%.emf: %.svg
-	${INKSCAPE} $< --export-filename=$@ 
+convert-diagrams: $(DIAGRAMSTAMP)
+
+%.pdf: %.svg | $(DIAGRAMSTAMP)
+	@test $@ -nt $< || $(CONVERTDIAGRAMS) --inkscape ${INKSCAPE} $@
+
+%.png: %.svg | $(DIAGRAMSTAMP)
+	@test $@ -nt $< || $(CONVERTDIAGRAMS) --inkscape ${INKSCAPE} $@
+
+%.emf: %.svg | $(DIAGRAMSTAMP)
+	@test $@ -nt $< || $(CONVERTDIAGRAMS) --inkscape ${INKSCAPE} $@
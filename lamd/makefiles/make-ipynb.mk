@@ -1,8 +1,9 @@
-# Jupyter notebook generation using pandoc (notedown dependency removed)
+# Jupyter notebook generation with lamd-notebook (notedown dependency removed)
 # mdpp --to ipynb resolves \diagramsDir as a web URL from _lamd.yml (diagramsurl /
 # url+baseurl+diagramswebpath); do not pass --diagrams-dir here (that forces filesystem paths).
-# Validation script usage: ${LAMDDIR}/scripts/validate_notebook.sh <notebook_file> <expected_min_cells>
-# The script will fail the build if the notebook has insufficient cells
+# Validate the talk's notebooks in one process with `make validate-notebooks`
+# (lamd-validate: cell counts and nbformat schema). For a single notebook,
+# ${LAMDDIR}/scripts/validate_notebook.sh <notebook_file> <expected_min_cells> still works.
 
 %.notes.ipynb.markdown: %.md ${DEPS}
 	${PP} $< -o $@ --format notes --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --write-diagrams-dir ${WRITEDIAGRAMSDIR} --to ipynb --code ipynb --replace-notation --edit-links --exercises ${PPFLAGS} 
@@ -14,30 +15,28 @@
 	${PP} $< -o $@ --format slides --to ipynb --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) ${PPFLAGS} 
 
 
-${BASE}.ipynb: ${BASE}.notes.ipynb.markdown
-	pandoc  --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-ipynb-template \
-		--markdown-headings=atx \
-		--out ${BASE}.tmp.markdown  ${BASE}.notes.ipynb.markdown
-	pandoc 	${PDSFLAGS} \
-		--out $@ ${BASE}.tmp.markdown
+# lamd-notebook writes the notebook straight from mdpp's cell markup; pandoc
+# only runs (once) when the talk cites something.
+${BASE}.ipynb: ${BASE}.notes.ipynb.markdown ${CITEDEPS}
+	${NOTEBOOK} $< --out $@ ${CITEFLAGS}
+ifneq ($(DIAGRAMSSTORE),)
+	${STOREDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md ${BASE}.ipynb ${STOREFLAGS}
+endif
 	cp ${BASE}.ipynb ${NOTEBOOKSDIR}/${OUT}.ipynb
-	rm ${BASE}.tmp.markdown
-
-${BASE}.full.ipynb: ${BASE}.full.ipynb.markdown
-	pandoc  --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-ipynb-template \
-		--markdown-headings=atx \
-		--out ${BASE}.tmp.markdown  ${BASE}.full.ipynb.markdown
-	pandoc 	${PDSFLAGS} \
-		--out $@ ${BASE}.tmp.markdown
+
+${BASE}.full.ipynb: ${BASE}.full.ipynb.markdown ${CITEDEPS}
+	${NOTEBOOK} $< --out $@ ${CITEFLAGS}
+ifneq ($(DIAGRAMSSTORE),)
+	${STOREDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md ${BASE}.full.ipynb ${STOREFLAGS}
+endif
 	cp ${BASE}.full.ipynb ${NOTEBOOKSDIR}/${OUT}.full.ipynb
-	rm ${BASE}.tmp.markdown
-
-${BASE}.slides.ipynb: ${BASE}.slides.ipynb.markdown
-	pandoc  --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-ipynb-template \
-		--markdown-headings=atx \
-		${CITEFLAGS} \
-		--out ${BASE}.tmp.markdown  ${BASE}.slides.ipynb.markdown
-	pandoc 	${PDSFLAGS} \
-		--out $@ ${BASE}.tmp.markdown
+
+${BASE}.slides.ipynb: ${BASE}.slides.ipynb.markdown ${CITEDEPS}
+	${NOTEBOOK} $< --out $@ ${CITEFLAGS}
+ifneq ($(DIAGRAMSSTORE),)
+	${STOREDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md ${BASE}.slides.ipynb ${STOREFLAGS}
+endif
 	cp ${BASE}.slides.ipynb ${NOTEBOOKSDIR}/${OUT}.slides.ipynb
-	rm ${BASE}.tmp.markdown
+
+validate-notebooks: $(filter %.ipynb,$(ALL))
+	lamd-validate $^
@@ -1,18 +1,21 @@
 # Manim interactive presentation pipeline (manim-slides)
-# Preprocessing: markdown → Python (manim-slides Slide subclass)
-%.manim.py: %.md ${DEPS}
-	${PP} $< -o $@ --to manim --format slides --code none ${PPFLAGS} \
+# Preprocessing: markdown → Python (manim-slides Slide subclass), with the
+# quality and frame rate of the render profile MANIMPROFILE
+%.manim.py: %.md ${DEPS} ${MANIMPROFILESTAMP}
+	${PP} $< -o $@ --to manim --format slides --code none --split-scenes --render-profile ${MANIMPROFILE} ${PPFLAGS} \
 		--snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --diagrams-dir ${DIAGRAMSDIR}
 
-# Render with manim-slides and convert to HTML
+# Render the slide scenes whose code changed (in parallel, under the manim
+# resource limits), then stitch every scene into HTML
 ${BASE}.manim.html: ${BASE}.manim.py
-	manim-slides render ${MANIMFLAGS} $< Talk -ql
-	manim-slides convert ${MANIMCONVERTFLAGS} --to html Talk ${BASE}.manim.html
+	${MANIMSCENES} render $< --renderer slides ${VERBOSE:+--verbose} -- manim-slides render ${MANIMFLAGS}
+	manim-slides convert ${MANIMCONVERTFLAGS} --to html $$(${MANIMSCENES} list $<) ${BASE}.manim.html
 
-# Render with manim-slides and convert to PPTX
+# Render the slide scenes whose code changed (in parallel, under the manim
+# resource limits), then stitch every scene into PPTX
 ${BASE}.manim.pptx: ${BASE}.manim.py
-	manim-slides render ${MANIMFLAGS} $< Talk -ql
-	manim-slides convert ${MANIMCONVERTFLAGS} --to pptx Talk ${BASE}.manim.pptx
+	${MANIMSCENES} render $< --renderer slides ${VERBOSE:+--verbose} -- manim-slides render ${MANIMFLAGS}
+	manim-slides convert ${MANIMCONVERTFLAGS} --to pptx $$(${MANIMSCENES} list $<) ${BASE}.manim.pptx
 
 .PHONY: manim
 manim: ${BASE}.manim.html ${BASE}.manim.pptx
@@ -6,11 +6,12 @@
 	echo ${BASE}
 
 
-${BASE}.notes.html: ${BASE}.notes.html.markdown ${BIBDEPS}
-	pandoc  ${PDSFLAGS} \
+${BASE}.notes.html: ${BASE}.notes.html.markdown ${CITEDEPS}
+	${CITEPROC}  ${PDSFLAGS} \
 		--mathjax \
 		-o ${BASE}.notes.html  \
 		${BASE}.notes.html.markdown
+	$(if $(RASTERDEPS),${RASTERVARIANTS} ${VERBOSE:+--verbose} ${RASTERFLAGS})
 	@if [ "$(LAYOUT)" = "practical" ] && [ -n "$(PRACTICALSDIR)" ]; then \
 		cp ${BASE}.notes.html ${PRACTICALSDIR}/${OUT}.notes.html; \
 		echo "Copied ${BASE}.notes.html to ${PRACTICALSDIR}/${OUT}.notes.html"; \
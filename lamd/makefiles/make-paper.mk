@@ -4,19 +4,13 @@
 	sed -i -e 's/width=\(.*\)\%/width=0.\1\\textwidth/g' $@
 	sed -i -e 's/height=\(.*\)\%/height=0.\1\\textheight/g' $@
 
-${BASE}.paper.pdf: ${BASE}.paper.aux ${BASE}.paper.bbl ${BASE}.paper.tex
-	pdflatex -shell-escape ${BASE}.paper.tex
+${BASE}.paper.pdf: ${BASE}.paper.tex ${BIBDEPS}
+	${LATEXMK} -shell-escape ${BASE}.paper.tex
 	cp ${BASE}.paper.pdf ${NOTESDIR}/${OUT}.paper.pdf
 
-${BASE}.paper.bbl: ${BASE}.paper.aux ${BIBDEPS}
-	bibtex ${BASE}.notes
-
-${BASE}.paper.aux: ${BASE}.paper.tex
-	pdflatex -shell-escape ${BASE}.paper.tex
-
 
 ${BASE}.paper.tex: ${BASE}.paper.tex.markdown 
-	pandoc  -s \
+	${PANDOC}  -s \
 		--template ${TEMPLATESDIR}/pandoc/pandoc-notes-tex-template.tex \
 		--number-sections \
 		--natbib \
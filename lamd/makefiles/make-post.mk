@@ -1,17 +1,20 @@
 ${BASE}.posts.html.markdown: ${BASE}.md ${DEPS}
 	${PP} $< -o $@ --format notes --to html --code sparse --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --replace-notation --edit-links --exercises ${PPFLAGS} 
 
-${BASE}.posts.html: ${BASE}.posts.html.markdown
-	pandoc --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-talk-template ${PDSFLAGS} \
+${BASE}.posts.html: ${BASE}.posts.html.markdown ${CITEDEPS}
+	${CITEPROC} --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-talk-template ${PDSFLAGS} \
 	       --markdown-headings=atx \
 	       ${POSTFLAGS} \
                --to html \
                --out ${BASE}.posts.html  ${BASE}.posts.html.markdown 
+	$(if $(RASTERDEPS),${RASTERVARIANTS} ${VERBOSE:+--verbose} ${RASTERFLAGS})
+ifneq ($(DIAGRAMSSTORE),)
+	${STOREDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md ${BASE}.posts.html ${STOREFLAGS}
+endif
 	@if [ "$(LAYOUT)" = "practical" ] && [ -n "$(PRACTICALSDIR)" ]; then \
 		cp ${BASE}.posts.html ${PRACTICALSDIR}/${OUT}.html; \
 		echo "Copied ${BASE}.posts.html to ${PRACTICALSDIR}/${OUT}.html"; \
 	else \
 		cp ${BASE}.posts.html ${POSTSDIR}/${OUT}.html; \
 	fi
-	${SCRIPTDIR}/copy_web_diagrams.sh ${VERBOSE:+--verbose} ${BASE}.md slidediagrams ${SLIDESDIR}/diagrams/ ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
-
+	${SYNCDIAGRAMS} ${VERBOSE:+--verbose} ${OPTIMISEFLAGS} $(if $(DIAGRAMSSTORE),--skip-stored) ${BASE}.md slidediagrams ${SLIDESDIR}/diagrams/ ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
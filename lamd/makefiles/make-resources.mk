@@ -0,0 +1,32 @@
+# Resource-class wrappers for heavy external tools.
+#
+# For parallel builds (maketalk --jobs N) or when 'resources' is set in
+# _lamd.yml, maketalk/makecv write LAMD_RESOURCES and LAMDRUN into the
+# generated makefile. Each tool then runs through `$(LAMDRUN) CLASS`, which
+# holds one of a limited number of per-class slots (see lamd/resources.py), so
+# builds can saturate cores without running too many memory-hungry renders at
+# once. Otherwise LAMDRUN is empty and the tools run directly.
+
+RUN=$(LAMDRUN)
+
+# With a pandoc server running (maketalk --pandoc-server, or LAMD_PANDOC_SERVER
+# exported for a batch of talks) text conversions are sent to it by
+# pandoc_server.py; other conversions still run the pandoc executable. Like
+# LAMDRUN it runs as a script, so each conversion does not import lamd.
+ifdef LAMD_PANDOC_SERVER
+PANDOCCMD=$(LAMDPYTHON) -P $(LAMDDIR)/pandoc_server.py
+else
+PANDOCCMD=pandoc
+endif
+
+LATEXMK=$(RUN) latex lamd-latex
+PANDOC=$(RUN) pandoc $(PANDOCCMD)
+CITEPROC=$(RUN) citeproc $(PANDOCCMD)
+NOTEBOOK=$(RUN) citeproc lamd-notebook
+# Takes inkscape slots itself, one per parallel session
+CONVERTDIAGRAMS=lamd-convert-diagrams
+SYNCDIAGRAMS=lamd-sync-diagrams
+STOREDIAGRAMS=lamd-store-diagrams
+RASTERVARIANTS=lamd-raster-variants
+MANIMRUN=$(RUN) manim manim
+MANIMSCENES=lamd-manim-scenes
@@ -5,12 +5,16 @@
 	${PP} $< -o $@ --to html --format slides --code none ${PPFLAGS} --snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --replace-notation
 
 
-${BASE}.slides.html: ${BASE}.slides.html.markdown ${BIBDEPS}
-	pandoc --template ${TEMPLATESDIR}/pandoc/pandoc-revealjs-template ${PDSFLAGS} ${SLIDEFLAGS} --include-in-header=${INCLUDESDIR}/${SLIDESHEADER} -t revealjs ${BIBFLAGS} -o ${BASE}.slides.html  ${BASE}.slides.html.markdown 
+${BASE}.slides.html: ${BASE}.slides.html.markdown ${CITEDEPS}
+	${CITEPROC} --template ${TEMPLATESDIR}/pandoc/pandoc-revealjs-template ${PDSFLAGS} ${SLIDEFLAGS} --include-in-header=${INCLUDESDIR}/${SLIDESHEADER} -t revealjs -o ${BASE}.slides.html  ${BASE}.slides.html.markdown 
+	$(if $(RASTERDEPS),${RASTERVARIANTS} ${VERBOSE:+--verbose} ${RASTERFLAGS})
+ifneq ($(DIAGRAMSSTORE),)
+	${STOREDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md ${BASE}.slides.html ${STOREFLAGS}
+endif
 	cp ${BASE}.slides.html ${SLIDESDIR}/${OUT}.slides.html
 
-${BASE}.pptx: ${BASE}.slides.pptx.markdown
-	pandoc  -t pptx \
+${BASE}.pptx: ${BASE}.slides.pptx.markdown ${CITEDEPS}
+	${CITEPROC}  -t pptx \
 		-o $@ $< \
 		${PPTXFLAGS} \
 		${CITEFLAGS} \
@@ -6,31 +6,51 @@
 #   pip install "manim[svg] @ git+https://github.com/lawrennd/manim.git"
 #
 # Variables (override in your talk's Makefile):
-#   MANIMSVGFLAGS  — extra flags passed to `manim` (e.g. -ql for low quality)
+#   MANIMSVGFLAGS  — extra flags passed to `manim`; quality and frame rate
+#                    come from the render profile MANIMPROFILE
 #   MANIMSVGJS     — path to js/manim-svg.js from the lawrennd/manim install
+#   MANIMSVGPACKFLAGS — flags for lamd.util.svg_pack, which packs each
+#                    animation's frames into one archive (e.g. --delta --prune)
+#   MANIMSVGPPFLAGS — extra flags for the preprocessor, e.g. --keyframes to
+#                    render fades, writes and transforms as one frame each and
+#                    play them with CSS
 
-# Use low quality by default (-ql) — faster renders, smaller SVGs.
-# Override with e.g. MANIMSVGFLAGS=-qh for high quality.
-MANIMSVGFLAGS ?= -ql
+MANIMSVGFLAGS ?=
+MANIMSVGPACKFLAGS ?= --delta
+MANIMSVGPPFLAGS ?=
 MANIMSVGJS ?= $(shell python -c \
 	"import manim, os; print(os.path.join(os.path.dirname(manim.__file__), '..', 'js', 'manim-svg.js'))" \
 	2>/dev/null)
 
-# Preprocess: markdown → Python scene (standard Manim Scene + SVG renderer)
-%.manim-svg.py: %.md ${DEPS}
-	${PP} $< -o $@ --to manim-svg --format slides --code none ${PPFLAGS} \
+# Preprocess: markdown → Python scene (standard Manim Scene + SVG renderer),
+# with the quality and frame rate of the render profile MANIMPROFILE (draft
+# also renders simple animations as keyframes)
+%.manim-svg.py: %.md ${DEPS} ${MANIMPROFILESTAMP}
+	${PP} $< -o $@ --to manim-svg --format slides --code none --split-scenes --render-profile ${MANIMPROFILE} \
+		${MANIMSVGPPFLAGS} ${PPFLAGS} \
 		--snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) \
 		--diagrams-dir ${DIAGRAMSDIR}
 
-# Render: Python → SVG frame directories under media/svg/Talk/
+# Render: Python → SVG frame directories under media/svg/<scene>/, one scene
+# per slide; only scenes whose code changed are rendered again, in parallel
+# under the manim resource limits
 ${BASE}.manim-svg.rendered: ${BASE}.manim-svg.py
-	manim ${MANIMSVGFLAGS} --renderer svg $< Talk
+	${MANIMSCENES} render $< --renderer svg ${VERBOSE:+--verbose} -- manim ${MANIMSVGFLAGS} --renderer svg
 	touch $@
 
-# Generate: SVG frame directories → RevealJS HTML
+# Generate: SVG frame directories of every scene, in slide order, packed
+# into one deduplicated archive per animation → RevealJS HTML
 ${BASE}.manim-svg.html: ${BASE}.manim-svg.rendered
-	python -m lamd.util.svg_to_html media/svg/Talk ${BASE}.manim-svg.html \
+	python -m lamd.util.svg_pack $$(${MANIMSCENES} list --prefix media/svg/ ${BASE}.manim-svg.py) ${MANIMSVGPACKFLAGS}
+	python -m lamd.util.svg_to_html $$(${MANIMSCENES} list --prefix media/svg/ ${BASE}.manim-svg.py) ${BASE}.manim-svg.html \
 		--title "$(TITLE)" --js-src "$(MANIMSVGJS)"
 
-.PHONY: manim-svg
+# Bundle: one self-contained HTML file, player and packed frames embedded,
+# for copying to a lecture machine without the media/ tree
+${BASE}.manim-svg.bundle.html: ${BASE}.manim-svg.html
+	python -m lamd.util.svg_to_html $$(${MANIMSCENES} list --prefix media/svg/ ${BASE}.manim-svg.py) $@ \
+		--title "$(TITLE)" --bundle
+
+.PHONY: manim-svg manim-svg-bundle
 manim-svg: ${BASE}.manim-svg.html
+manim-svg-bundle: ${BASE}.manim-svg.bundle.html
@@ -4,74 +4,43 @@
 # When profiling: TIME_CMD = $(SCRIPTDIR)/profile-command
 # When normal: TIME_CMD = (empty)
 
-# Extract all fields in one call instead of 21 separate calls
-# This reduces redundant file I/O and Python startup overhead from ~6s to ~0.5s
-# Write batch output to temp file to avoid Make variable issues with multiline content
-# NOTE: Always use Python mdfield for batch (mdfield-server shell script doesn't support batch)
-_FIELDS_CACHE:=$(shell mktemp)
-_FIELDS_EXTRACTED:=$(shell $(TIME_CMD) mdfield batch $(BASE).md --fields date categories layout macrosdir slidesheader postssheader assignment notation bibdir snippetsdir diagramsdir writediagramsdir postsdir practicalsdir notesdir notebooksdir slidesdir texdir week session people > $(_FIELDS_CACHE))
-
-# Parse individual fields from batch output
-DATE:=$(shell grep '^date:' $(_FIELDS_CACHE) | sed 's/^date://')
-CATEGORIES:=$(shell grep '^categories:' $(_FIELDS_CACHE) | sed 's/^categories://')
-LAYOUT:=$(shell grep '^layout:' $(_FIELDS_CACHE) | sed 's/^layout://')
-MACROSDIR:=$(shell grep '^macrosdir:' $(_FIELDS_CACHE) | sed 's/^macrosdir://')
-SLIDESHEADER:=$(shell grep '^slidesheader:' $(_FIELDS_CACHE) | sed 's/^slidesheader://')
-POSTSHEADER:=$(shell grep '^postssheader:' $(_FIELDS_CACHE) | sed 's/^postssheader://')
-ASSIGNMENT:=$(shell grep '^assignment:' $(_FIELDS_CACHE) | sed 's/^assignment://')
-NOTATION:=$(shell grep '^notation:' $(_FIELDS_CACHE) | sed 's/^notation://')
-BIBDIRECTORY:=$(shell grep '^bibdir:' $(_FIELDS_CACHE) | sed 's/^bibdir://')
-SNIPPETSDIR:=$(shell grep '^snippetsdir:' $(_FIELDS_CACHE) | sed 's/^snippetsdir://')
-DIAGRAMSDIR:=$(shell grep '^diagramsdir:' $(_FIELDS_CACHE) | sed 's/^diagramsdir://')
-WRITEDIAGRAMSDIR:=$(shell grep '^writediagramsdir:' $(_FIELDS_CACHE) | sed 's/^writediagramsdir://')
-POSTSDIR:=$(shell grep '^postsdir:' $(_FIELDS_CACHE) | sed 's/^postsdir://')
-PRACTICALSDIR:=$(shell grep '^practicalsdir:' $(_FIELDS_CACHE) | sed 's/^practicalsdir://')
-NOTESDIR:=$(shell grep '^notesdir:' $(_FIELDS_CACHE) | sed 's/^notesdir://')
-NOTEBOOKSDIR:=$(shell grep '^notebooksdir:' $(_FIELDS_CACHE) | sed 's/^notebooksdir://')
-SLIDESDIR:=$(shell grep '^slidesdir:' $(_FIELDS_CACHE) | sed 's/^slidesdir://')
-TEXDIR:=$(shell grep '^texdir:' $(_FIELDS_CACHE) | sed 's/^texdir://')
-WEEK:=$(shell grep '^week:' $(_FIELDS_CACHE) | sed 's/^week://')
-SESSION:=$(shell grep '^session:' $(_FIELDS_CACHE) | sed 's/^session://')
-PEOPLEYAML:=$(shell grep '^people:' $(_FIELDS_CACHE) | sed 's/^people://')
-
-# Clean up temp file immediately after extraction
-_FIELDS_CLEANUP:=$(shell rm -f $(_FIELDS_CACHE))
+# Frontmatter fields, dependency lists and pandoc flags are computed once by
+# lamd-vars and cached in .lamd/$(BASE).vars.mk. The file is a target of its
+# own: when the talk source, its include closure or _lamd.yml change, make
+# regenerates it and restarts, so a no-op make never starts Python here.
+LAMDVARS:=.lamd/$(BASE).vars.mk
+-include $(LAMDVARS)
 
 MATHJAX="https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.1/MathJax.js?config=TeX-AMS-MML_SVG"
 REVEALJS="https://inverseprobability.com/talks/slides/reveal.js/"
 
-PREFIX=$(shell flags prefix ${BASE})
+PREFIX=$(FLAGS_PREFIX)
 
 # Local calls for the preprocessor and inkscape
 INKSCAPE=/Applications/Inkscape.app/Contents/MacOS/inkscape
 PP=mdpp
 
-PPFLAGS=-T
-PPFLAGS=$(shell flags pp $(BASE))
+include $(MAKEFILESDIR)/make-resources.mk
+
+PPFLAGS=$(FLAGS_PP)
 
 # Bibliography information not yet automatically extracted
-BIBFLAGS=--bibliography=${BIBDIRECTORY}/lawrence.bib --bibliography=${BIBDIRECTORY}/other.bib --bibliography=${BIBDIRECTORY}/zbooks.bib 
-BIBDEPS=${BIBDIRECTORY}/lawrence.bib ${BIBDIRECTORY}/other.bib ${BIBDIRECTORY}/zbooks.bib 
+BIBFILES=${BIBDIRECTORY}/lawrence.bib ${BIBDIRECTORY}/other.bib ${BIBDIRECTORY}/zbooks.bib
+BIBFLAGS=$(addprefix --bibliography=,$(BIBFILES))
+BIBDEPS=$(BIBFILES)
 
-CITEFLAGS=--citeproc --csl=${INCLUDESDIR}/elsevier-harvard.csl ${BIBFLAGS}
+# citeproc only gets the entries the talk cites: lamd-bib writes them once per
+# talk to $(BIBSUBSET), a target of the source, its includes and the .bib files.
+# The citeproc rules depend on it through CITEDEPS; the natbib LaTeX rules keep
+# the full BIBFLAGS for bibtex.
+BIBSUBSET:=.lamd/$(BASE).bib.json
+CITEDEPS=$(BIBSUBSET)
+CITEBIBFLAGS=--bibliography=$(BIBSUBSET)
 
-PDSFLAGS=-s ${CITEFLAGS} --mathjax=${MATHJAX}
+CITEFLAGS=--citeproc --csl=${INCLUDESDIR}/elsevier-harvard.csl ${CITEBIBFLAGS}
 
+PDSFLAGS=-s ${CITEFLAGS} --mathjax=${MATHJAX}
 
-# Extract all dependency types in one call instead of 6 separate calls
-# This reduces redundant file I/O from ~28s to ~2-3s
-# Write batch output to temp file to avoid Make variable issues with multiline content
-_DEPS_CACHE:=$(shell mktemp)
-# Only pass --snippets-path if SNIPPETSDIR is defined (use shell conditional)
-_DEPS_EXTRACTED:=$(shell if [ -n "$(SNIPPETSDIR)" ]; then $(TIME_CMD) dependencies batch $(BASE).md --snippets-path $(SNIPPETSDIR) --diagrams-dir $(DIAGRAMSDIR) > $(_DEPS_CACHE); else $(TIME_CMD) dependencies batch $(BASE).md --diagrams-dir $(DIAGRAMSDIR) > $(_DEPS_CACHE); fi)
-DEPS:=$(shell grep '^inputs:' $(_DEPS_CACHE) | sed 's/^inputs://')
-DIAGDEPS:=$(shell grep '^diagrams:' $(_DEPS_CACHE) | sed 's/^diagrams://')
-DOCXDEPS:=$(shell grep '^docxdiagrams:' $(_DEPS_CACHE) | sed 's/^docxdiagrams://')
-PPTXDEPS:=$(shell grep '^pptxdiagrams:' $(_DEPS_CACHE) | sed 's/^pptxdiagrams://')
-TEXDEPS:=$(shell grep '^texdiagrams:' $(_DEPS_CACHE) | sed 's/^texdiagrams://')
-DYNAMIC_DEPS:=$(shell grep '^all:' $(_DEPS_CACHE) | sed 's/^all://')
-# Clean up temp file immediately after extraction
-_CLEANUP:=$(shell rm -f $(_DEPS_CACHE))
 
 # Add "talk-people.gpp" as the first entry to trigger a rebuild if the people file changes
 ALL := talk-people.gpp $(DYNAMIC_DEPS)
@@ -82,12 +51,42 @@ include_dynamic_deps:
 		echo "Including dynamic dependencies: $(DYNAMIC_DEPS)"; \
 	fi
 
-POSTFLAGS=$(shell flags post $(BASE))
-PPTXFLAGS=$(shell flags pptx $(BASE)) --resource-path .:$(INCLUDESDIR):$(SLIDESDIR)
-DOCXFLAGS=$(shell flags docx $(BASE)) --resource-path .:$(INCLUDESDIR):$(SLIDESDIR)
-SLIDEFLAGS=$(shell flags reveal $(BASE))
-MANIMFLAGS=$(shell flags manim $(BASE))
-MANIMCONVERTFLAGS=$(shell flags manim-convert $(BASE))
+# Regenerate the cached variables (defined after the first rule above so it
+# does not become the default goal)
+$(LAMDVARS): $(BASE).md $(wildcard _lamd.yml _config.yml) $(wildcard $(LAMDVARS_INPUTS))
+	$(TIME_CMD) lamd-vars $(BASE) --output $@
+
+$(BIBSUBSET): $(BASE).md $(DEPS) $(BIBFILES)
+	$(TIME_CMD) lamd-bib subset $(BASE).md $(BIBFILES) --output $@ --inputs $(filter-out $(BASE).md,$(DEPS)) > /dev/null
+
+# Manim render profile, draft, preview or final (see lamd.manim_profiles):
+# maketalk --render-profile, else 'manim:' in the frontmatter or _lamd.yml
+MANIMPROFILE ?= $(or $(FLAGS_MANIM_PROFILE),preview)
+# The render profile and the directory Manim renders it to (e.g. "preview
+# 480p15", see lamd.manim_profiles). The stamp is compared and rewritten when
+# make reads this file, only if the profile has changed, so the Manim scenes
+# are generated again with the new profile while make --dry-run (maketalk
+# --plan) still sees unchanged scenes as up to date.
+MANIMPROFILESTAMP:=.lamd/$(BASE).manim-profile
+ifneq ($(wildcard $(LAMDVARS)),)
+MANIMRENDER:=$(MANIMPROFILE) $(MANIMDIR_$(MANIMPROFILE))
+$(shell mkdir -p $(dir $(MANIMPROFILESTAMP)); [ "$$(cat $(MANIMPROFILESTAMP) 2>/dev/null)" = "$(MANIMRENDER)" ] || echo "$(MANIMRENDER)" > $(MANIMPROFILESTAMP))
+endif
+
+POSTFLAGS=$(FLAGS_POST)
+PPTXFLAGS=$(FLAGS_PPTX) --resource-path .:$(INCLUDESDIR):$(SLIDESDIR)
+DOCXFLAGS=$(FLAGS_DOCX) --resource-path .:$(INCLUDESDIR):$(SLIDESDIR)
+SLIDEFLAGS=$(FLAGS_REVEAL)
+MANIMFLAGS=$(FLAGS_MANIM)
+MANIMCONVERTFLAGS=$(FLAGS_MANIM_CONVERT)
+# Responsive image variants (\includepngresponsive and friends) of the images
+# lamd-vars lists in RASTERDEPS, written next to each image unless
+# rastervariantsdir is set in _lamd.yml. Talks without any skip the pass.
+RASTERFLAGS=$(if $(RASTERVARIANTSDIR),--target-dir $(RASTERVARIANTSDIR)) $(RASTERDEPS)
+# Minify published SVGs (svgoptimise: safe or aggressive in _lamd.yml)
+OPTIMISEFLAGS=$(if $(SVGOPTIMISE),--optimise $(SVGOPTIMISE))
+# Shared diagram store (diagramsstore/diagramsstoreurl in _lamd.yml)
+STOREFLAGS=--store $(DIAGRAMSSTORE) --url $(DIAGRAMSSTOREURL) --snippets-dir $(SNIPPETSDIR) $(if $(DIAGRAMSDIR),--diagrams-dir $(DIAGRAMSDIR)) $(OPTIMISEFLAGS)
 
 .PHONY: check-snippetsdir
 check-snippetsdir:
@@ -5,19 +5,14 @@
 	sed -i -e 's/height=\(.*\)\%/height=0.\1\\textheight/g' $@
 
 
-${BASE}.notes.pdf: ${BASE}.notes.aux ${BASE}.notes.bbl ${BASE}.notes.tex
-	pdflatex -shell-escape ${BASE}.notes.tex
+# lamd-latex reruns pdflatex and bibtex only when the .aux/.bbl/.toc change.
+${BASE}.notes.pdf: ${BASE}.notes.tex ${BIBDEPS}
+	${LATEXMK} -shell-escape ${BASE}.notes.tex
 	cp ${BASE}.notes.pdf ${NOTESDIR}/${OUT}.notes.pdf
 
-${BASE}.notes.bbl: ${BASE}.notes.aux ${BIBDEPS}
-	bibtex ${BASE}.notes
-
-${BASE}.notes.aux: ${BASE}.notes.tex
-	pdflatex -shell-escape ${BASE}.notes.tex
-
 
 ${BASE}.notes.tex: ${BASE}.notes.tex.markdown 
-	pandoc  -s \
+	${PANDOC}  -s \
 		--template ${TEMPLATESDIR}/pandoc/pandoc-notes-tex-template.tex \
 		--number-sections \
 		--natbib \
@@ -27,7 +22,7 @@ ${BASE}.notes.tex: ${BASE}.notes.tex.markdown
 		${BASE}.notes.tex.markdown 
 
 ${BASE}.include.tex: ${BASE}.notes.tex.markdown ${TEXDEPS}
-	pandoc  -s \
+	${PANDOC}  -s \
 		--template ${TEMPLATESDIR}/pandoc/pandoc-include-tex-template.tex \
 		--number-sections \
 		--natbib \
@@ -36,12 +31,12 @@ ${BASE}.include.tex: ${BASE}.notes.tex.markdown ${TEXDEPS}
 		-o ${BASE}.include.tex  \
 		${BASE}.notes.tex.markdown 
 	cp ${BASE}.include.tex ${TEXDIR}/${BASE}.include.tex
-	${SCRIPTDIR}/copy_web_diagrams.sh ${VERBOSE:+--verbose} ${BASE}.md texdiagrams ${TEXDIR}/diagrams ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
+	${SYNCDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md texdiagrams ${TEXDIR}/diagrams ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
 
-${BASE}.tex: ${BASE}.tex.markdown
-	pandoc --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-tex-template ${PDSFLAGS} \
+${BASE}.tex: ${BASE}.tex.markdown ${CITEDEPS}
+	${CITEPROC} --template ${TEMPLATESDIR}/pandoc/pandoc-jekyll-tex-template ${PDSFLAGS} \
 	       --markdown-headings=atx \
 	       ${TEXFLAGS} \
                --to latex \
                --out ${BASE}.tex  ${BASE}.tex.markdown 
-	${SCRIPTDIR}/copy_web_diagrams.sh ${VERBOSE:+--verbose} ${BASE}.md texdiagrams ${TEXDIR}/diagrams ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
+	${SYNCDIAGRAMS} ${VERBOSE:+--verbose} ${BASE}.md texdiagrams ${TEXDIR}/diagrams ${SLIDESDIR} ${DIAGRAMSDIR} ${SNIPPETSDIR}
@@ -1,13 +1,15 @@
 # Manim continuous video pipeline (raw Manim → MP4)
-# Preprocessing: markdown → Python (raw Manim Scene subclass)
-%.manim-video.py: %.md ${DEPS}
-	${PP} $< -o $@ --to manim-video --format slides --code none ${PPFLAGS} \
+# Preprocessing: markdown → Python (raw Manim Scene subclass), with the
+# quality, frame rate and caching of the render profile MANIMPROFILE
+%.manim-video.py: %.md ${DEPS} ${MANIMPROFILESTAMP}
+	${PP} $< -o $@ --to manim-video --format slides --code none --render-profile ${MANIMPROFILE} ${PPFLAGS} \
 		--snippets-path ${SNIPPETSDIR} --macros-path=$(MACROSDIR) --diagrams-dir ${DIAGRAMSDIR}
 
-# Render with raw manim and copy output MP4
+# Render with raw manim and copy output MP4 from the directory named after the
+# profile's resolution and frame rate, e.g. 480p15, as recorded in the stamp
 ${BASE}.manim-video.mp4: ${BASE}.manim-video.py
-	manim render ${MANIMFLAGS} $< Talk -ql
-	cp media/videos/${BASE}.manim-video/480p15/Talk.mp4 $@
+	${MANIMRUN} render ${MANIMFLAGS} $< Talk
+	cp "media/videos/${BASE}.manim-video/$$(cut -d' ' -f2 ${MANIMPROFILESTAMP})/Talk.mp4" $@
 
 .PHONY: manim-video
 manim-video: ${BASE}.manim-video.mp4
@@ -12,7 +12,85 @@ import sys
 from typing import Optional
 
 import lamd
+from lamd.manim_profiles import PROFILES
 from lamd.profiler import BuildProfiler
+from lamd.resources import makefile_export
+
+
+def make_goal(args: argparse.Namespace, base: str) -> str:
+    """
+    Return the make goal corresponding to the requested format and output options.
+
+    Args:
+        args: Parsed maketalk command line arguments (uses ``format`` and ``to``)
+        base: Base name of the talk (filename without extension)
+
+    Returns:
+        str: The make target to build (e.g. ``all``, ``slides``, ``talk.slides.html``)
+    """
+    if args.format and args.to in ("manim", "manim-video", "manim-svg"):
+        # Manim output is not sub-divided by --format; ignore --format
+        if args.to == "manim":
+            return "manim"
+        elif args.to == "manim-svg":
+            return "manim-svg"
+        else:
+            return f"{base}.manim-video.mp4"
+    elif args.format and args.to:
+        # Build specific format and output type
+        return f"{base}.{args.format}.{args.to}"
+    elif args.format:
+        # Build all formats of a specific type
+        return str(args.format)
+    elif args.to:
+        # Build all content in a specific output format
+        if args.to == "manim-video":
+            return f"{base}.manim-video.mp4"
+        return str(args.to)
+    # Build everything
+    return "all"
+
+
+# Targets that --first can prioritise, keyed by the name used on the command line
+FIRST_TARGETS = {
+    "slides": "{base}.slides.html",
+    "notes": "{base}.notes.html",
+    "posts": "{base}.posts.html",
+    "pptx": "{base}.pptx",
+    "docx": "{base}.docx",
+    "ipynb": "{base}.ipynb",
+    "pdf": "{base}.notes.pdf",
+}
+
+
+def first_target(choice: str, base: str) -> str:
+    """
+    Return the make target to build first for a --first choice.
+
+    ``auto`` picks the most recently viewed output: with the default
+    ``relatime`` mount option the access time of an output only moves past its
+    modification time once it has been opened after being built.
+
+    Args:
+        choice: One of the FIRST_TARGETS keys or ``auto``
+        base: Base name of the talk (filename without extension)
+
+    Returns:
+        str: The make target to build first
+    """
+    if choice != "auto":
+        return FIRST_TARGETS[choice].format(base=base)
+
+    viewed = []
+    for template in FIRST_TARGETS.values():
+        target = template.format(base=base)
+        if os.path.exists(target):
+            stat = os.stat(target)
+            if stat.st_atime > stat.st_mtime:
+                viewed.append((stat.st_atime, target))
+    if viewed:
+        return max(viewed)[1]
+    return FIRST_TARGETS["slides"].format(base=base)
 
 
 def main() -> int:
@@ -32,7 +110,12 @@ def main() -> int:
         "  maketalk talk.md                    # Create all output formats (fast mode)\n"
         "  maketalk talk.md --format slides    # Create slides only\n"
         "  maketalk talk.md --format notes     # Create notes only\n"
-        "  maketalk talk.md --to html          # Output to HTML format\n",
+        "  maketalk talk.md --to html          # Output to HTML format\n"
+        "  maketalk talk.md --first slides     # Build slides first, the rest in the background\n"
+        "  maketalk talk.md --plan             # Show what would be rebuilt and how long it may take\n"
+        "  maketalk talk.md --watch            # Rebuild slides HTML whenever sources change\n"
+        "  maketalk talk.md --to manim-svg --render-profile final  # Full-quality Manim render\n"
+        "  maketalk talk.md --pandoc-server    # Send pandoc conversions to one long-running server\n",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
@@ -54,6 +137,24 @@ def main() -> int:
         "--profile", action="store_true", help="Enable detailed performance profiling (shows where build time is spent)"
     )
 
+    parser.add_argument(
+        "--render-profile",
+        "--profile-render",
+        dest="render_profile",
+        type=str,
+        choices=list(PROFILES),
+        help="Render Manim targets with this profile's quality, frame rate and caching "
+        "(overrides 'manim:' in the frontmatter or _lamd.yml; default preview)",
+    )
+
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=None,
+        help="Number of parallel make jobs; heavy tools are still capped per class by 'resources' in _lamd.yml",
+    )
+
     parser.add_argument(
         "--git-cache-minutes",
         type=int,
@@ -61,6 +162,38 @@ def main() -> int:
         help="Cache git fetch results for N minutes (default: 5). Set to 0 to always check remote.",
     )
 
+    parser.add_argument(
+        "--first",
+        type=str,
+        choices=list(FIRST_TARGETS) + ["auto"],
+        help="Build and report this output first, then continue with the remaining targets in the background "
+        "('auto' picks the most recently viewed output)",
+    )
+
+    parser.add_argument(
+        "--plan",
+        nargs="?",
+        const="text",
+        choices=["text", "json"],
+        help="Print which targets would be rebuilt and why, with estimated durations from "
+        "previous --profile runs, without building anything",
+    )
+
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and rebuild when the talk, its includes, macros or _lamd.yml change "
+        "(defaults to slides HTML when no --format/--to is given)",
+    )
+
+    parser.add_argument("--poll", action="store_true", help="In watch mode, poll for changes instead of using inotify")
+
+    parser.add_argument(
+        "--pandoc-server",
+        action="store_true",
+        help="Run text conversions through a 'pandoc server' started for this build (requires pandoc 3)",
+    )
+
     args = parser.parse_args()
 
     # Convert git cache minutes to seconds for internal use
@@ -115,6 +248,9 @@ def main() -> int:
                 sys.exit(1)
 
             git_dir = os.path.join(answer, ".git")
+            if args.plan:
+                # A dry run must not touch the network or the working trees
+                continue
             if os.path.isdir(git_dir):
                 # Smart pull: only pull if not recently checked (within last hour)
                 # This avoids repeated network calls for short build cycles
@@ -167,6 +303,7 @@ def main() -> int:
         with open("makefile", "w+") as f:
             f.write(f"BASE={base}\n")
             f.write(f"LAMDDIR={dirname}\n")
+            f.write(f"LAMDPYTHON={sys.executable}\n")
             f.write(f"MAKEFILESDIR={make_dir}\n")
             f.write(f"INCLUDESDIR={includes_dir}\n")
             f.write(f"TEMPLATESDIR={templates_dir}\n")
@@ -182,9 +319,14 @@ def main() -> int:
                 f.write("\n# Profiling disabled\n")
                 f.write("TIME_CMD=\n")
 
+            # Per-class concurrency limits for lamd-run (see lamd.resources)
+            f.write("\n")
+            f.write(makefile_export(iface, args.jobs))
+
             f.write("\n")
             f.write("include $(MAKEFILESDIR)/make-talk-flags.mk\n")
             f.write("include $(MAKEFILESDIR)/make-talk.mk\n")
+            f.write(profiler.makefile_recipe_profiling(script_dir))
 
     # Make sure we have the latest files
     with profiler.measure("Local git pull"):
@@ -214,7 +356,7 @@ def main() -> int:
                 if fetch_age < git_cache_seconds:
                     should_check_remote = False
 
-        if should_check_remote:
+        if should_check_remote and not args.plan:
             try:
                 # Fetch remote info
                 subprocess.run(["git", "fetch"], capture_output=True, timeout=10, check=False)
@@ -233,48 +375,89 @@ def main() -> int:
                 os.system("git pull")
         # else: recently checked or not in git repo, skip pull
 
+    # Parallel jobs are passed through MAKEFLAGS so watch and background builds inherit them
+    if args.jobs:
+        os.environ["MAKEFLAGS"] = f"-j{args.jobs} {os.environ.get('MAKEFLAGS', '')}".strip()
+
+    # Like MAKEFLAGS, exported so watch and background builds use the same profile
+    if args.render_profile:
+        os.environ["MANIMPROFILE"] = args.render_profile
+
     # Build the make command based on format and output options
-    make_cmd = "make"
+    goal = make_goal(args, base)
+    if args.watch and not (args.format or args.to):
+        # Watch mode is for editing sessions: default to the fastest useful output
+        goal = f"{base}.slides.html"
+    make_cmd = f"make {goal}"
+
+    if args.plan:
+        from lamd.paths import state_path
+        from lamd.plan import build_plan, format_plan, format_plan_json
+
+        plan = build_plan(goal, history_file=state_path("profile-history.json"))
+        print(format_plan_json(plan, goal) if args.plan == "json" else format_plan(plan, goal))
+        return 0
+
+    if args.pandoc_server:
+        import atexit
+
+        from lamd.pandoc_server import SERVER_ENV, PandocServer
+
+        # An already exported server (e.g. one shared by a batch of talks) is reused
+        if not os.environ.get(SERVER_ENV):
+            server = PandocServer()
+            if server.start():
+                os.environ[SERVER_ENV] = server.url
+                atexit.register(server.stop)
+            else:
+                print("Warning: could not start 'pandoc server' (pandoc 3 is required); running pandoc directly.")
+
+    if args.watch:
+        from lamd import mdfield
+        from lamd.watch import WatchBuilder
+
+        # Keep the lynguine server warm across rebuilds for mdfield lookups
+        if mdfield.SERVER_MODE_AVAILABLE:
+            os.environ.setdefault("LAMD_USE_SERVER", "1")
+        macros_dir = iface["macrosdir"] if "macrosdir" in iface else os.path.join(dirname, "macros")
+        builder = WatchBuilder(
+            args.filename,
+            goal,
+            snippets_path=iface["snippetsdir"],
+            macros_dir=macros_dir,
+            polling=args.poll,
+        )
+        builder.start_build(set())
+        return builder.run()
+
+    if args.first:
+        import subprocess
+        import time
 
-    if args.format and args.to in ("manim", "manim-video", "manim-svg"):
-        # Manim output is not sub-divided by --format; ignore --format
-        if args.to == "manim":
-            make_cmd += " manim"
-        elif args.to == "manim-svg":
-            make_cmd += " manim-svg"
-        else:
-            make_cmd += f" {base}.manim-video.mp4"
-    elif args.format and args.to:
-        # Build specific format and output type
-        target = f"{base}.{args.format}.{args.to}"
-        make_cmd += f" {target}"
-    elif args.format:
-        # Build all formats of a specific type
-        if args.format == "slides":
-            make_cmd += " slides"
-        elif args.format == "notes":
-            make_cmd += " notes"
-    elif args.to:
-        # Build all content in a specific output format
-        if args.to == "html":
-            make_cmd += " html"
-        elif args.to == "pptx":
-            make_cmd += " pptx"
-        elif args.to == "pdf":
-            make_cmd += " pdf"
-        elif args.to == "tex":
-            make_cmd += " tex"
-        elif args.to == "docx":
-            make_cmd += " docx"
-        elif args.to == "manim":
-            make_cmd += " manim"
-        elif args.to == "manim-video":
-            make_cmd += f" {base}.manim-video.mp4"
-        elif args.to == "manim-svg":
-            make_cmd += " manim-svg"
-    else:
-        # Build everything
-        make_cmd += " all"
+        from lamd.paths import state_path
+
+        # Interactive feedback is not gated on the slowest format: build the
+        # requested target, report it, then let make finish the rest.
+        target = first_target(args.first, base)
+        start = time.perf_counter()
+        with profiler.measure(f"Priority target ({target})"):
+            exit_code = os.system(f"make {target}")
+        if args.profile:
+            profiler.parse_target_profile()
+            profiler.save_history(state_path("profile-history.json"))
+        if exit_code != 0:
+            print(f"Error: building {target} failed; not starting background build.")
+            return exit_code
+        print(f"Ready: {target} ({time.perf_counter() - start:.1f}s)")
+
+        log_file = state_path(f"{base}.background.log")
+        with open(log_file, "w") as log:
+            background = subprocess.Popen(["make", goal], stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        print(f"Building remaining targets ({goal}) in the background: pid {background.pid}, log {log_file}")
+        if args.profile:
+            profiler.report()
+            profiler.cleanup()
+        return 0
 
     # Run the make command (this is where most of the time is spent)
     with profiler.measure("Make execution (total)"):
@@ -282,7 +465,10 @@ def main() -> int:
 
     # Generate profiling report if enabled
     if args.profile:
+        from lamd.paths import state_path
+
         profiler.report()
+        profiler.save_history(state_path("profile-history.json"))
         profiler.cleanup()
 
     return exit_code
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Generate the cached make variables for a talk.
+
+``make-talk-flags.mk`` used to compute the talk's frontmatter fields,
+dependency lists and pandoc flags with ``$(shell ...)`` calls every time the
+makefile was read, which cost several seconds of Python start-up even for a
+no-op ``make``. ``lamd-vars`` computes all of them in one process and writes
+them to ``.lamd/<base>.vars.mk``, which the makefile includes.
+
+The generated file is itself a make target depending on the talk source, its
+include closure (recorded in the file as ``LAMDVARS_INPUTS``) and
+``_lamd.yml``/``_config.yml``; when any of these change make regenerates it
+and restarts, otherwise the cached values are read directly.
+
+Usage:
+    lamd-vars BASE [--output FILE]
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+import lynguine.util.yaml as ny
+
+from lamd import mdfield
+from lamd.dependencies import extract_batch, resolve_diagrams_dir
+from lamd.flags import flags_for
+from lamd.manim_profiles import PROFILES, render_directory
+from lamd.paths import state_path
+
+CONFIG_FILES = ["_lamd.yml", "_config.yml"]
+
+# (make variable, frontmatter/config field)
+FIELD_VARIABLES: List[Tuple[str, str]] = [
+    ("DATE", "date"),
+    ("CATEGORIES", "categories"),
+    ("LAYOUT", "layout"),
+    ("MACROSDIR", "macrosdir"),
+    ("SLIDESHEADER", "slidesheader"),
+    ("POSTSHEADER", "postssheader"),
+    ("ASSIGNMENT", "assignment"),
+    ("NOTATION", "notation"),
+    ("BIBDIRECTORY", "bibdir"),
+    ("SNIPPETSDIR", "snippetsdir"),
+    ("DIAGRAMSDIR", "diagramsdir"),
+    ("DIAGRAMSSTORE", "diagramsstore"),
+    ("DIAGRAMSSTOREURL", "diagramsstoreurl"),
+    ("SVGOPTIMISE", "svgoptimise"),
+    ("RASTERVARIANTSDIR", "rastervariantsdir"),
+    ("WRITEDIAGRAMSDIR", "writediagramsdir"),
+    ("POSTSDIR", "postsdir"),
+    ("PRACTICALSDIR", "practicalsdir"),
+    ("NOTESDIR", "notesdir"),
+    ("NOTEBOOKSDIR", "notebooksdir"),
+    ("SLIDESDIR", "slidesdir"),
+    ("TEXDIR", "texdir"),
+    ("WEEK", "week"),
+    ("SESSION", "session"),
+    ("PEOPLEYAML", "people"),
+]
+
+# (make variable, dependencies batch key)
+DEPENDENCY_VARIABLES: List[Tuple[str, str]] = [
+    ("DEPS", "inputs"),
+    ("DIAGDEPS", "diagrams"),
+    ("DOCXDEPS", "docxdiagrams"),
+    ("PPTXDEPS", "pptxdiagrams"),
+    ("TEXDEPS", "texdiagrams"),
+    ("RASTERDEPS", "rasterimages"),
+    ("DYNAMIC_DEPS", "all"),
+]
+
+# (make variable, flags output type)
+FLAG_VARIABLES: List[Tuple[str, str]] = [
+    ("FLAGS_PREFIX", "prefix"),
+    ("FLAGS_PP", "pp"),
+    ("FLAGS_POST", "post"),
+    ("FLAGS_PPTX", "pptx"),
+    ("FLAGS_DOCX", "docx"),
+    ("FLAGS_REVEAL", "reveal"),
+    ("FLAGS_MANIM", "manim"),
+    ("FLAGS_MANIM_CONVERT", "manim-convert"),
+    ("FLAGS_MANIM_PROFILE", "manim-profile"),
+]
+
+
+def escape_make(value: str) -> str:
+    """Escape a value for the right-hand side of a simply-expanded make assignment."""
+    return " ".join(value.split()).replace("$", "$$").replace("#", r"\#")
+
+
+def talk_variables(base: str, use_server: bool = False) -> Dict[str, str]:
+    """
+    Compute the make variables for a talk.
+
+    Args:
+        base: The base part of the talk filename
+        use_server: Whether to extract fields through the lynguine server
+
+    Returns:
+        Mapping of make variable name to (unescaped) value
+    """
+    filename = base + ".md"
+    values: Dict[str, str] = {}
+
+    fields = mdfield.extract_fields_batch([field for _, field in FIELD_VARIABLES], filename, CONFIG_FILES, use_server)
+    for variable, field in FIELD_VARIABLES:
+        values[variable] = mdfield.format_field_value(field, fields.get(field, ""))
+
+    diagrams_dir = resolve_diagrams_dir(values["DIAGRAMSDIR"] or None)
+    batch = extract_batch(filename, diagrams_dir, values["SNIPPETSDIR"] or "..")
+    for variable, key in DEPENDENCY_VARIABLES:
+        values[variable] = " ".join(batch[key])
+
+    for variable, output in FLAG_VARIABLES:
+        values[variable] = flags_for(output, base) or ""
+
+    # Where Manim renders each profile, for the manim-video rule
+    for name in PROFILES:
+        values[f"MANIMDIR_{name}"] = render_directory(name)
+
+    # Files whose edits can change any of the values above
+    values["LAMDVARS_INPUTS"] = values["DEPS"]
+    return values
+
+
+def write_vars(base: str, path: str, values: Dict[str, str]) -> None:
+    """
+    Write the variables as a makefile fragment.
+
+    The file is written to a temporary name and renamed into place so that an
+    interrupted run never leaves a truncated fragment for make to include.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    lines = [f"# Generated by lamd-vars from {base}.md; do not edit."]
+    lines += [f"{name}:={escape_make(value)}" for name, value in values.items()]
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Write ``.lamd/<base>.vars.mk`` for a talk.
+
+    Returns:
+        int: 0 for success, 1 if the talk or its configuration is invalid
+    """
+    parser = argparse.ArgumentParser(description="Generate the cached make variables for a talk.")
+    parser.add_argument("base", type=str, help="The base part of the talk filename")
+    parser.add_argument("-o", "--output", type=str, help="Output file (default .lamd/<base>.vars.mk)")
+
+    args = parser.parse_args(argv)
+
+    use_server = os.environ.get("LAMD_USE_SERVER", "0") == "1" and mdfield.SERVER_MODE_AVAILABLE
+
+    try:
+        values = talk_variables(args.base, use_server=use_server)
+    except (ny.FileFormatError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    write_vars(args.base, args.output or state_path(f"{args.base}.vars.mk"), values)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
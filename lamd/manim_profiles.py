@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Named render profiles for the Manim targets.
+
+A profile sets, in one place, how every Manim pipeline (``manim`` slides,
+``manim-video`` and ``manim-svg``) renders a talk:
+
+============  ==============  ==========  =========  ===============
+profile       quality         frame rate  keyframes  manim caching
+============  ==============  ==========  =========  ===============
+``draft``     480p            10          yes        on
+``preview``   480p            15          no         on
+``final``     1080p           30          no         off
+============  ==============  ==========  =========  ===============
+
+``preview`` is the default and matches the long-standing ``-ql`` renders.
+``draft`` also renders simple animations of SVG talks as single keyframes
+(see ``mdpp --keyframes``), and ``final`` renders every animation from
+scratch rather than reusing Manim's partial movie files.
+
+``mdpp --render-profile NAME`` writes the profile's settings into the
+generated scene's ``config``, so they are part of every scene's hash (see
+:mod:`lamd.manim_scenes`): the renders of each profile are kept side by
+side, switching back to a profile renders nothing new, and a final render of
+an unchanged slide is only ever done once.
+
+The profile is chosen with ``maketalk --render-profile NAME``, or in the
+frontmatter or ``_lamd.yml``::
+
+    manim: final                  # a profile name
+    manim:
+      profile: draft
+      flags: --disable_caching    # extra flags for the render command
+"""
+
+from typing import Any, Dict
+
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "draft": {"quality": "low_quality", "frame_rate": 10, "keyframes": True, "disable_caching": False},
+    "preview": {"quality": "low_quality", "frame_rate": 15, "keyframes": False, "disable_caching": False},
+    "final": {"quality": "high_quality", "frame_rate": 30, "keyframes": False, "disable_caching": True},
+}
+
+DEFAULT_PROFILE = "preview"
+
+# Pixel height of each Manim quality, which names its output directory
+QUALITY_HEIGHTS = {
+    "low_quality": 480,
+    "medium_quality": 720,
+    "high_quality": 1080,
+    "production_quality": 1440,
+    "fourk_quality": 2160,
+}
+
+
+def render_directory(name: str) -> str:
+    """
+    Return the directory Manim writes a profile's videos to, such as ``480p15``.
+
+    Raises:
+        KeyError: If the profile is unknown
+    """
+    profile = PROFILES[name]
+    return f"{QUALITY_HEIGHTS[profile['quality']]}p{profile['frame_rate']}"
+
+
+def profile_config(name: str) -> str:
+    """
+    Return the lines of a generated scene that apply a render profile.
+
+    Args:
+        name: One of the ``PROFILES`` keys
+
+    Returns:
+        Python assignments to Manim's ``config``, ending in a blank line
+
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile '{name}' (choose from {', '.join(PROFILES)})")
+    profile = PROFILES[name]
+    # quality sets a frame rate of its own, so the profile's frame rate comes after it
+    return (
+        f"# lamd render profile: {name}\n"
+        f'config.quality = "{profile["quality"]}"\n'
+        f"config.frame_rate = {profile['frame_rate']}\n"
+        f"config.disable_caching = {profile['disable_caching']}\n\n"
+    )
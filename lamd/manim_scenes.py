@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Per-slide Manim scenes, rendered only when their code changes.
+
+``mdpp --to manim`` and ``--to manim-svg`` write the whole talk as one
+``class Talk`` whose ``construct`` plays every slide, so editing one slide
+re-renders the talk. With ``--split-scenes`` mdpp instead passes its output
+through :func:`split_scenes`, which cuts the body at the ``# lamd-slide``
+marker the slide macros (``\\newslide``, ``\\section``, ...) emit and writes
+one scene class per slide, named after a hash of the code that renders it::
+
+    class LamdScene_3f9a0c1b2d4e(Slide):
+        def construct(self):
+            self.play(FadeIn(lamd_text(r\"\"\"Introduction\"\"\")))
+            ...
+
+    LAMD_SCENES = ["LamdScene_3f9a0c1b2d4e", "LamdScene_81be22c07a95"]
+
+The hash covers the file header (imports, renderer configuration), the
+slide's code, the runtime helper copied as ``_lamd_manim.py`` and the
+content of any diagram or image the slide loads, so a scene's name changes
+exactly when its rendering would. ``LAMD_SCENES`` lists the scenes in
+presentation order.
+
+``lamd-manim-scenes render`` runs the render command for the scenes that have
+no output yet, one process per scene over a pool of workers that hold
+``manim`` resource slots (see :mod:`lamd.resources`), and reports how long
+each scene took. ``lamd-manim-scenes list`` prints the scene names for the
+command that stitches them together (``manim-slides convert`` or
+``lamd.util.svg_to_html``). Each slide starts from an empty canvas: code in
+``\\slidesmanim`` cannot use objects created on an earlier slide.
+
+Usage::
+
+    lamd-manim-scenes render talk.manim.py --renderer slides -- manim-slides render -ql
+    manim-slides convert --to html $(lamd-manim-scenes list talk.manim.py) talk.manim.html
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+SLIDE_MARKER = "# lamd-slide"
+SCENE_PREFIX = "LamdScene_"
+HASH_LENGTH = 12
+RENDERERS = ("slides", "svg")
+
+_HELPER = os.path.join(os.path.dirname(__file__), "util", "lamd_manim_helper.py")
+_CLASS = re.compile(r"^class Talk\((\w+)\):\s*$")
+_LOADED_FILE = re.compile(r"(?:SVGMobject|ImageMobject)\(\s*['\"]([^'\"]+)['\"]")
+_NEXT_SLIDE = "self.next_slide()"
+
+
+def _code_lines(lines: Sequence[str]) -> List[str]:
+    """Return the lines of *lines* that are neither blank nor comments."""
+    return [line for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def _slide_chunks(body: Sequence[str]) -> List[List[str]]:
+    """Cut the lines of a ``construct`` body at the slide markers, dropping slides with no code."""
+    chunks: List[List[str]] = [[]]
+    for line in body:
+        if line.strip() == SLIDE_MARKER:
+            chunks.append([])
+        else:
+            chunks[-1].append(line)
+    slides = []
+    for chunk in chunks:
+        code = _code_lines(chunk)
+        # The scene boundary is the slide boundary: a leading next_slide() would add an empty slide
+        if code and code[0].strip() == _NEXT_SLIDE:
+            chunk = chunk[chunk.index(code[0]) + 1 :]
+            code = code[1:]
+        if code:
+            slides.append(chunk)
+    return slides
+
+
+def _file_digest(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+
+def scene_hash(header: str, code: str, base_dir: str = ".") -> str:
+    """
+    Return the content hash naming a slide's scene.
+
+    Args:
+        header: The file header (imports and configuration) the scene runs under
+        code: The scene's ``construct`` body
+        base_dir: Directory the diagrams and images the code loads are relative to
+    """
+    digest = hashlib.sha256()
+    for part in (header, code, _file_digest(_HELPER)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for path in _LOADED_FILE.findall(code):
+        digest.update(f"{path}:{_file_digest(os.path.join(base_dir, path))}\0".encode("utf-8"))
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def split_scenes(source: str, base_dir: str = ".") -> Tuple[str, List[str]]:
+    """
+    Rewrite a generated single-scene talk as one scene class per slide.
+
+    Args:
+        source: Python source with a ``class Talk`` holding every slide
+        base_dir: Directory the diagrams and images the code loads are relative to
+
+    Returns:
+        The rewritten source and the scene names in presentation order
+        (identical slides share one scene, which is listed at each position)
+
+    Raises:
+        ValueError: If the source has no ``class Talk`` with a ``construct`` method
+    """
+    lines = source.splitlines()
+    start = next((i for i, line in enumerate(lines) if _CLASS.match(line)), len(lines))
+    if start + 1 >= len(lines) or lines[start + 1].strip() != "def construct(self):":
+        raise ValueError("No 'class Talk' with a construct method to split")
+    base = lines[start][len("class Talk(") : lines[start].index(")")]
+    header = "\n".join(lines[:start]).rstrip() + "\n"
+
+    order: List[str] = []
+    classes: Dict[str, str] = {}
+    for chunk in _slide_chunks(lines[start + 2 :]):
+        code = "\n".join(chunk).strip("\n") + "\n"
+        name = SCENE_PREFIX + scene_hash(header, code, base_dir)
+        classes.setdefault(name, f"class {name}({base}):\n    def construct(self):\n{code}")
+        order.append(name)
+    if not order:
+        name = SCENE_PREFIX + scene_hash(header, "", base_dir)
+        classes[name] = f"class {name}({base}):\n    def construct(self):\n        pass\n"
+        order.append(name)
+
+    parts = [header] + list(classes.values()) + [f"LAMD_SCENES = {json.dumps(order)}\n"]
+    return "\n\n".join(parts), order
+
+
+def scene_names(path: str) -> List[str]:
+    """
+    Return the scenes of a split talk in presentation order, without importing it.
+
+    Raises:
+        ValueError: If the file does not define ``LAMD_SCENES``
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "LAMD_SCENES" for t in node.targets):
+            return [str(name) for name in ast.literal_eval(node.value)]
+    raise ValueError(f"{path} defines no LAMD_SCENES; generate it with 'mdpp --split-scenes'")
+
+
+def rendered(scene: str, renderer: str, media_dir: str = "media", slides_dir: str = "slides") -> bool:
+    """Return True if the output of *scene* exists where *renderer* writes it."""
+    if renderer == "slides":
+        return os.path.isfile(os.path.join(slides_dir, f"{scene}.json"))
+    return os.path.isfile(os.path.join(media_dir, "svg", scene, "animation_0", "animation.json"))
+
+
+def stale_scenes(path: str, renderer: str, command: Sequence[str], state: Mapping[str, Mapping[str, Any]]) -> List[str]:
+    """
+    Return the scenes of a split talk that must be rendered.
+
+    A scene is stale when its output is missing or it was last rendered by a
+    different command (e.g. at another quality).
+
+    Args:
+        path: The split talk
+        renderer: ``slides`` (manim-slides) or ``svg`` (the SVG renderer)
+        command: The render command
+        state: Scene name to the record of its last render
+    """
+    signature = shlex.join(command)
+    unique = list(dict.fromkeys(scene_names(path)))
+    return [scene for scene in unique if (state.get(scene) or {}).get("command") != signature or not rendered(scene, renderer)]
+
+
+def _state_file(renderer: str) -> str:
+    from lamd.paths import state_path
+
+    return state_path(f"manim-scenes.{renderer}.json")
+
+
+def _load_state(renderer: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(_state_file(renderer)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {scene: record for scene, record in state.items() if isinstance(record, dict)}
+
+
+def _collect(scene: str, renderer: str, media_dir: str) -> None:
+    """Move a scene's output from its private media directory to where the stitching step reads it."""
+    if renderer == "svg":
+        target = os.path.join("media", "svg", scene)
+        shutil.rmtree(target, ignore_errors=True)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(os.path.join(media_dir, "svg", scene), target)
+    # manim-slides writes slides/<scene>.json and slides/files/<scene>/ itself
+    shutil.rmtree(media_dir, ignore_errors=True)
+
+
+def render_scene(
+    path: str, scene: str, renderer: str, command: Sequence[str], limits: Mapping[str, Mapping[str, Optional[int]]]
+) -> float:
+    """
+    Render one scene in its own process, holding a ``manim`` resource slot.
+
+    Each render gets a private media directory, so concurrent renders do not
+    write the same LaTeX and partial movie files; the output is then moved
+    into the layout ``manim-slides convert`` and ``svg_to_html`` read.
+
+    Args:
+        path: The split talk
+        scene: Scene to render
+        renderer: ``slides`` or ``svg``
+        command: Render command; a media directory, the talk and the scene are appended
+        limits: Resource limits (see :mod:`lamd.resources`)
+
+    Returns:
+        Seconds spent rendering, excluding any wait for a slot
+
+    Raises:
+        subprocess.CalledProcessError: If the render command fails
+    """
+    from lamd.paths import state_path
+    from lamd.resources import ResourceSlot
+
+    media_dir = os.path.dirname(state_path("manim-media", scene, "render"))
+    with ResourceSlot("manim", limits):
+        start = time.perf_counter()
+        try:
+            subprocess.run(list(command) + ["--media_dir", media_dir, path, scene], check=True)
+        except subprocess.CalledProcessError:
+            shutil.rmtree(media_dir, ignore_errors=True)
+            raise
+        seconds = time.perf_counter() - start
+    _collect(scene, renderer, media_dir)
+    return seconds
+
+
+def render(
+    path: str, renderer: str, command: Sequence[str], verbose: bool = False, jobs: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Render the stale scenes of a split talk in parallel.
+
+    Scenes are rendered by a pool of *jobs* workers, each running one scene at
+    a time under a ``manim`` resource slot, so the ``resources.manim`` jobs and
+    memory limits in ``_lamd.yml`` cap what runs at once across all builds.
+
+    Args:
+        path: The split talk
+        renderer: ``slides`` or ``svg``
+        command: Render command
+        verbose: Report how many scenes are rendered
+        jobs: Number of workers (default: the ``manim`` resource class's jobs)
+
+    Returns:
+        Seconds spent rendering each scene rendered
+
+    Raises:
+        subprocess.CalledProcessError: If a scene fails to render (the others are still rendered and recorded)
+        OSError: If a scene's output cannot be collected
+    """
+    from lamd.cache import write_atomic
+    from lamd.resources import load_limits
+
+    state = _load_state(renderer)
+    stale = stale_scenes(path, renderer, command, state)
+    if verbose:
+        total = len(set(scene_names(path)))
+        print(f"lamd-manim-scenes: rendering {len(stale)} of {total} scenes", file=sys.stderr)
+    limits = load_limits()
+    workers = max(1, jobs or int(limits.get("manim", {}).get("jobs") or 1))
+    timings: Dict[str, float] = {}
+    failed: Optional[Exception] = None
+    with ThreadPoolExecutor(max_workers=min(workers, len(stale) or 1)) as pool:
+        futures = {pool.submit(render_scene, path, scene, renderer, command, limits): scene for scene in stale}
+        for future in as_completed(futures):
+            scene = futures[future]
+            try:
+                timings[scene] = future.result()
+            except (subprocess.CalledProcessError, OSError) as e:
+                failed = e
+                print(f"lamd-manim-scenes: {scene} failed: {e}", file=sys.stderr)
+                continue
+            print(f"lamd-manim-scenes: {scene} rendered in {timings[scene]:.1f}s", file=sys.stderr)
+            state[scene] = {"command": shlex.join(command), "seconds": round(timings[scene], 2)}
+    if timings:
+        write_atomic(_state_file(renderer), json.dumps(state, indent=1, sort_keys=True).encode("utf-8"))
+    if failed is not None:
+        raise failed
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    List or render the per-slide scenes of a split Manim talk.
+
+    Returns:
+        int: 0 for success, 1 for failure
+    """
+    parser = argparse.ArgumentParser(
+        description="Render only the changed slide scenes of a Manim talk.",
+        epilog="Example:\n  lamd-manim-scenes render talk.manim.py --renderer slides -- manim-slides render -ql\n",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    sub = parser.add_subparsers(dest="action", required=True)
+    listing = sub.add_parser("list", help="Print the scene names in presentation order")
+    listing.add_argument("talk", help="Python file written by 'mdpp --split-scenes'")
+    listing.add_argument("--prefix", default="", help="Prefix each name (e.g. media/svg/)")
+    rendering = sub.add_parser("render", help="Render the scenes without up-to-date output")
+    rendering.add_argument("talk", help="Python file written by 'mdpp --split-scenes'")
+    rendering.add_argument("--renderer", choices=RENDERERS, default="slides", help="Where the command writes its output")
+    rendering.add_argument("-j", "--jobs", type=int, help="Scenes rendered at once (default: resources.manim.jobs)")
+    rendering.add_argument("-v", "--verbose", action="store_true", help="Report how many scenes are rendered")
+    # The render command follows "--" and may carry options of its own
+    argv = list(sys.argv[1:] if argv is None else argv)
+    split = argv.index("--") if "--" in argv else len(argv)
+    command = argv[split + 1 :]
+    args = parser.parse_args(argv[:split])
+
+    try:
+        if args.action == "list":
+            print(" ".join(args.prefix + name for name in scene_names(args.talk)))
+            return 0
+        if not command:
+            parser.error("a render command is required after --")
+        render(args.talk, args.renderer, command, args.verbose, args.jobs)
+    except (OSError, ValueError, SyntaxError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except subprocess.CalledProcessError as e:
+        print(f"Error: render failed with exit code {e.returncode}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
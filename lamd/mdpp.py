@@ -17,6 +17,7 @@ from typing import Any
 import frontmatter as fm
 
 from lamd.config.interface import Interface
+from lamd.manim_profiles import PROFILES, profile_config
 from lamd.validation import (
     ValidationError,
     validate_code_level,
@@ -110,6 +111,43 @@ _MANIM_SVG_HEADER = (
     "class Talk(Scene):\n"
     "    def construct(self):\n"
 )
+# --keyframes: fades, writes and transforms become one frame plus a CSS transition
+# (see lamd_manim_helper.KeyframeMixin); everything else is still sampled at 15fps.
+_MANIM_SVG_KEYFRAME_HEADER = (
+    "from manim import *\n"
+    "from manim.constants import RendererType\n"
+    "from _lamd_manim import lamd_text, lamd_display_math, KeyframeMixin\n\n"
+    "config.renderer = RendererType.SVG\n"
+    "config.frame_rate = 15\n\n"
+    "class KeyframeScene(KeyframeMixin, Scene):\n"
+    "    pass\n\n"
+    "class Talk(KeyframeScene):\n"
+    "    def construct(self):\n"
+)
+
+
+def manim_header(args: argparse.Namespace) -> str:
+    """Return the Python header of a Manim target, with its render profile applied.
+
+    Args:
+        args: Command line arguments (uses ``to``, ``keyframes`` and ``render_profile``).
+
+    Returns:
+        str: The header, ending in the ``construct`` method of ``class Talk``.
+    """
+    profile = PROFILES[args.render_profile] if args.render_profile else {}
+    if args.to == "manim":
+        header = _MANIM_SLIDES_HEADER
+    elif args.to == "manim-svg":
+        keyframes = args.keyframes or profile.get("keyframes", False)
+        header = _MANIM_SVG_KEYFRAME_HEADER if keyframes else _MANIM_SVG_HEADER
+    else:
+        header = _MANIM_VIDEO_HEADER
+    if args.render_profile:
+        # After the header's own config, so that the profile's settings win.
+        start = header.index("\nclass ") + 1
+        header = header[:start] + profile_config(args.render_profile) + header[start:]
+    return header
 
 
 def setup_gpp_arguments(args: argparse.Namespace, iface: dict[str, Any]) -> list[str]:
@@ -470,6 +508,27 @@ def main() -> int:
         ),
     )
 
+    parser.add_argument(
+        "--keyframes",
+        default=False,
+        action="store_true",
+        help="For --to manim-svg, render fades, writes and transforms as one keyframe each, interpolated with CSS",
+    )
+
+    parser.add_argument(
+        "--render-profile",
+        default=None,
+        choices=list(PROFILES),
+        help="For Manim targets, render with this profile's quality, frame rate and caching (see lamd.manim_profiles)",
+    )
+
+    parser.add_argument(
+        "--split-scenes",
+        default=False,
+        action="store_true",
+        help="For --to manim and manim-svg, write one scene per slide named by a hash of its code (see lamd.manim_scenes)",
+    )
+
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="Enable verbose output for detailed processing information"
     )
@@ -530,12 +589,7 @@ def main() -> int:
             # begins with the appropriate class header so that gpp expands the
             # macros directly into the method body.
             tmp_file += ".gpp.py"
-            if args.to == "manim":
-                python_header = _MANIM_SLIDES_HEADER
-            elif args.to == "manim-svg":
-                python_header = _MANIM_SVG_HEADER
-            else:
-                python_header = _MANIM_VIDEO_HEADER
+            python_header = manim_header(args)
             # Strip YAML frontmatter from the source: keep only the body.
             with open(args.filename) as f:
                 source_post = fm.load(f)
@@ -620,6 +674,17 @@ def main() -> int:
                         with open(args.output, "w") as _f:
                             _f.write(_math_converted)
 
+        # One scene per slide, so that only edited slides are rendered again.
+        if args.split_scenes and args.to in ("manim", "manim-svg") and args.output and os.path.isfile(args.output):
+            from lamd.manim_scenes import split_scenes
+
+            with open(args.output) as _f:
+                _split, _scenes = split_scenes(_f.read(), os.path.dirname(os.path.abspath(args.output)))
+            with open(args.output, "w") as _f:
+                _f.write(_split)
+            if args.verbose:
+                print(f"Split {args.output} into {len(set(_scenes))} scenes")
+
         # For Manim targets, copy the runtime helper alongside the output.
         if args.to in ("manim", "manim-video", "manim-svg") and args.output:
             import shutil
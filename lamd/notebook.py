@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Write Jupyter notebooks directly from mdpp's ipynb-mode output.
+
+``mdpp --to ipynb`` already marks the notebook structure with pandoc fenced
+divs (see ``talk-macros-ipynb.gpp``)::
+
+    ::: {.cell .markdown}
+    Some text
+    :::
+
+    ::: {.cell .code}
+    ```{.python}
+    import numpy as np
+    ```
+    :::
+
+``lamd-notebook`` splits the markdown on those divs and writes nbformat 4
+JSON itself. The title, author, date and abstract cells that the
+``pandoc-jekyll-ipynb-template`` used to add are built from the frontmatter.
+Citations are the only part that still needs pandoc: when the source cites
+anything and ``--citeproc`` is given, one pandoc run renders them into
+markdown before the cells are split. An ``@word`` only counts as a citation
+when the ``--bibliography`` holds that key, so a Python decorator or an email
+address in a cell does not send the notebook through pandoc. The previous rules ran pandoc twice per
+notebook, once through the template and once to write the notebook.
+
+Usage::
+
+    lamd-notebook talk.notes.ipynb.markdown -o talk.ipynb --citeproc --csl=style.csl --bibliography=refs.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import frontmatter
+
+from lamd import pandoc_server
+from lamd.bibliography import BibIndex, cite_keys
+from lamd.cache import write_atomic
+
+CELL_TYPES = ("markdown", "code", "raw")
+
+_DIV_OPEN = re.compile(r"^:{3,}\s*(?:\{(?P<attrs>[^}]*)\}|[\w-]+)\s*:*\s*$")
+_DIV_CLOSE = re.compile(r"^:{3,}\s*$")
+_FENCE = re.compile(r"^\s*(?P<fence>`{3,}|~{3,})")
+
+# pandoc options that make a run render citations
+_CITEPROC_FLAGS = ("--citeproc", "-C")
+
+
+def _cell_type(attrs: Optional[str]) -> Optional[str]:
+    """Return the cell type of a div's attributes, or None if it is not a cell."""
+    classes = [word[1:] for word in (attrs or "").split() if word.startswith(".")]
+    if "cell" not in classes:
+        return None
+    for cell_type in CELL_TYPES:
+        if cell_type in classes:
+            return cell_type
+    return "markdown"
+
+
+def _closes(line: str, fence: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith(fence) and set(stripped) == {fence[0]}
+
+
+def _classify(body: str) -> Iterator[Tuple[str, str]]:
+    """
+    Label each line as ``fence``, ``code``, ``open``, ``close`` or ``text``.
+
+    Lines inside fenced code blocks are ``code`` whatever they contain; for
+    ``open`` the attributes of the div are returned instead of the line.
+    """
+    fence: Optional[str] = None
+    for line in body.splitlines():
+        if fence is not None:
+            if _closes(line, fence):
+                fence = None
+                yield "fence", line
+            else:
+                yield "code", line
+            continue
+        match = _FENCE.match(line)
+        if match:
+            fence = match.group("fence")
+            yield "fence", line
+            continue
+        match = _DIV_OPEN.match(line)
+        if match:
+            yield "open", match.group("attrs") or ""
+        elif _DIV_CLOSE.match(line):
+            yield "close", line
+        else:
+            yield "text", line
+
+
+def _add_cell(cells: List[Tuple[str, str]], cell_type: str, lines: List[str]) -> None:
+    """Append the collected lines as a cell, unless they are blank, and reset them."""
+    source = "\n".join(lines).strip("\n")
+    if source.strip():
+        cells.append((cell_type, source))
+    lines.clear()
+
+
+def split_cells(body: str) -> List[Tuple[str, str]]:
+    """
+    Split mdpp ipynb-mode markdown into notebook cells.
+
+    Text outside the cell divs becomes markdown cells. Other fenced divs are
+    unwrapped, since Jupyter does not render them. A code cell keeps only the
+    contents of its code blocks.
+
+    Args:
+        body: Markdown without frontmatter
+
+    Returns:
+        List of (cell type, source) pairs, empty cells omitted
+    """
+    cells: List[Tuple[str, str]] = []
+    cell_type: Optional[str] = None
+    lines: List[str] = []
+    depth = 0
+    for label, line in _classify(body):
+        if label == "open":
+            kind = _cell_type(line) if cell_type is None and depth == 0 else None
+            if kind is None:
+                depth += 1
+            else:
+                _add_cell(cells, "markdown", lines)
+                cell_type = kind
+        elif label == "close":
+            if depth:
+                depth -= 1
+            elif cell_type is not None:
+                _add_cell(cells, cell_type, lines)
+                cell_type = None
+        elif cell_type != "code" or label == "code":
+            lines.append(line)
+        elif lines and lines[-1]:
+            # Separate consecutive code blocks of one cell by a blank line
+            lines.append("")
+    _add_cell(cells, cell_type or "markdown", lines)
+    return cells
+
+
+def _author_line(author: Any) -> str:
+    if not isinstance(author, dict):
+        return f"### {author}"
+    name = " ".join(str(author[part]) for part in ("given", "family") if author.get(part))
+    if author.get("url"):
+        name = f"[{name}]({author['url']})"
+    if author.get("institute"):
+        name += f", {author['institute']}"
+    return f"### {name}"
+
+
+def header_cells(metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Build the title and abstract cells from a talk's frontmatter.
+
+    Args:
+        metadata: Frontmatter of the mdpp output
+
+    Returns:
+        List of (cell type, source) pairs
+    """
+    title: List[str] = []
+    if metadata.get("title"):
+        title.append(f"# {metadata['title']}")
+    authors = metadata.get("author") or []
+    for author in authors if isinstance(authors, list) else [authors]:
+        title.append(_author_line(author))
+    if metadata.get("date"):
+        title.append(f"### {metadata['date']}")
+    cells = [("markdown", "\n\n".join(title))] if title else []
+    if metadata.get("abstract"):
+        cells.append(("markdown", f"**Abstract**: {str(metadata['abstract']).strip()}"))
+    return cells
+
+
+def bibliography_keys(pandoc_args: List[str]) -> Optional[Set[str]]:
+    """
+    Return the keys of the bibliographies named by ``--bibliography`` options.
+
+    CSL-JSON files (such as the talk's ``lamd-bib subset``) are read directly
+    and BibTeX files through the bibliography index.
+
+    Returns:
+        Set of keys, or None when no bibliography is given or one cannot be
+        read, so that pandoc decides what is cited
+    """
+    paths = [arg.split("=", 1)[1] for arg in pandoc_args if arg.startswith("--bibliography=")]
+    paths += [value for option, value in zip(pandoc_args, pandoc_args[1:]) if option == "--bibliography"]
+    if not paths:
+        return None
+    keys: Set[str] = set()
+    try:
+        for path in paths:
+            if path.endswith(".json"):
+                with open(path, encoding="utf-8") as f:
+                    keys.update(str(entry["id"]) for entry in json.load(f))
+        bibfiles = [path for path in paths if not path.endswith(".json")]
+        if bibfiles:
+            keys.update(BibIndex(bibfiles).refresh().keys())
+    except (OSError, ValueError, KeyError, TypeError, subprocess.CalledProcessError):
+        return None
+    return keys
+
+
+def render_citations(text: str, pandoc_args: List[str]) -> str:
+    """
+    Render citations in the markdown with a single pandoc run.
+
+    Args:
+        text: Markdown including its frontmatter (for ``nocite`` and friends)
+        pandoc_args: citeproc options (``--citeproc``, ``--csl``, ``--bibliography``)
+
+    Returns:
+        Markdown with citations and the reference list rendered; *text*'s
+        body unchanged when there is nothing to cite
+
+    Raises:
+        RuntimeError: If pandoc fails
+    """
+    if not any(arg in _CITEPROC_FLAGS for arg in pandoc_args):
+        return frontmatter.loads(text).content
+    cited = cite_keys(text)
+    known = bibliography_keys(pandoc_args) if cited else None
+    if cited == set() or (cited is not None and known is not None and not cited & known):
+        return frontmatter.loads(text).content
+    with tempfile.TemporaryDirectory(prefix="lamd-notebook-") as tmp:
+        source = os.path.join(tmp, "source.markdown")
+        output = os.path.join(tmp, "cited.markdown")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write(text)
+        argv = ["--from", "markdown", "--to", "markdown-citations", "--wrap=preserve", "--markdown-headings=atx"]
+        status = pandoc_server.run(argv + pandoc_args + ["--output", output, source])
+        if status != 0:
+            raise RuntimeError(f"pandoc exited with status {status}")
+        with open(output, encoding="utf-8") as f:
+            return f.read()
+
+
+def _cell(index: int, cell_type: str, source: str) -> Dict[str, Any]:
+    cell: Dict[str, Any] = {
+        "cell_type": cell_type,
+        "id": hashlib.sha1(f"{index}\0{source}".encode("utf-8")).hexdigest()[:8],
+        "metadata": {},
+        "source": source.splitlines(keepends=True),
+    }
+    if cell_type == "code":
+        cell["execution_count"] = None
+        cell["outputs"] = []
+    return cell
+
+
+def build_notebook(text: str, pandoc_args: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Convert mdpp ipynb-mode markdown into an nbformat 4 notebook.
+
+    Args:
+        text: Contents of a ``*.ipynb.markdown`` file
+        pandoc_args: citeproc options passed to pandoc when the text cites anything
+
+    Returns:
+        The notebook as a JSON-serialisable dictionary
+    """
+    metadata = frontmatter.loads(text).metadata
+    cells = header_cells(metadata) + split_cells(render_citations(text, pandoc_args or []))
+    return {
+        "cells": [_cell(i, cell_type, source) for i, (cell_type, source) in enumerate(cells)],
+        "metadata": metadata.get("jupyter") or {},
+        "nbformat": 4,
+        "nbformat_minor": 5,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Write a notebook from an ``*.ipynb.markdown`` file.
+
+    Options other than ``--output`` are passed to pandoc for citeproc.
+
+    Returns:
+        int: Exit code
+    """
+    parser = argparse.ArgumentParser(
+        description="Write a Jupyter notebook from mdpp ipynb-mode markdown.",
+        epilog="Unrecognised options (--citeproc, --csl, --bibliography, ...) are passed to pandoc.",
+    )
+    parser.add_argument("input", help="mdpp output (*.ipynb.markdown)")
+    parser.add_argument("-o", "--output", "--out", required=True, help="Notebook to write")
+    args, pandoc_args = parser.parse_known_args(argv)
+
+    try:
+        with open(args.input, encoding="utf-8") as f:
+            text = f.read()
+        notebook = build_notebook(text, pandoc_args)
+    except (OSError, RuntimeError) as e:
+        print(f"lamd-notebook: {e}", file=sys.stderr)
+        return 1
+    write_atomic(args.output, json.dumps(notebook, indent=1, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Run pandoc conversions through a local ``pandoc server``.
+
+A talk build runs pandoc a dozen times, and each run pays the Haskell runtime
+start-up and re-reads its templates and CSL. ``pandoc server`` (pandoc 3)
+keeps one process alive and accepts conversions as JSON over HTTP.
+
+``lamd-pandoc`` takes an ordinary pandoc command line. When
+``LAMD_PANDOC_SERVER`` names a running server, it translates the command
+into a server request: template, CSL, bibliography and header files are
+sent inline, since the server cannot read the filesystem. Anything the
+server cannot do exactly runs the ``pandoc`` executable instead:
+
+- binary outputs (docx, pptx)
+- options outside :data:`VALUE_OPTIONS` and :data:`FLAG_OPTIONS`
+- a server that is unreachable or rejects the request
+
+The output is therefore the same either way.
+
+The makefiles run this file as a script (``python -P pandoc_server.py``)
+rather than through the ``lamd-pandoc`` console script. It imports only the
+standard library, while importing the ``lamd`` package loads lynguine and
+would cost more start-up time than the server saves.
+
+``maketalk --pandoc-server`` starts a server for the duration of a build.
+For a batch of talks, start one yourself and export its URL::
+
+    pandoc server --port 3030 &
+    export LAMD_PANDOC_SERVER=http://127.0.0.1:3030
+"""
+
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+
+SERVER_ENV = "LAMD_PANDOC_SERVER"
+
+# Output formats the server returns as text; binary formats need resource files
+TEXT_FORMATS = {"html", "html5", "revealjs", "latex", "markdown", "ipynb", "plain", "gfm", "commonmark"}
+_EXTENSION_FORMATS = {".html": "html", ".tex": "latex", ".markdown": "markdown", ".md": "markdown", ".ipynb": "ipynb"}
+
+# Options taking a value: command-line name -> server (defaults-file) key
+VALUE_OPTIONS = {
+    "-f": "from",
+    "--from": "from",
+    "-r": "from",
+    "--read": "from",
+    "-t": "to",
+    "--to": "to",
+    "-w": "to",
+    "--write": "to",
+    "-o": "output-file",
+    "--out": "output-file",
+    "--output": "output-file",
+    "--template": "template",
+    "-V": "variables",
+    "--variable": "variables",
+    "-M": "metadata",
+    "--metadata": "metadata",
+    "-c": "css",
+    "--css": "css",
+    "--csl": "csl",
+    "--bibliography": "bibliography",
+    "-H": "include-in-header",
+    "--include-in-header": "include-in-header",
+    "-B": "include-before-body",
+    "--include-before-body": "include-before-body",
+    "-A": "include-after-body",
+    "--include-after-body": "include-after-body",
+    "--slide-level": "slide-level",
+    "--markdown-headings": "markdown-headings",
+    "--wrap": "wrap",
+}
+
+# Options without a value: command-line name -> (server key, value)
+FLAG_OPTIONS = {
+    "-s": ("standalone", True),
+    "--standalone": ("standalone", True),
+    "-C": ("citeproc", True),
+    "--citeproc": ("citeproc", True),
+    "-N": ("number-sections", True),
+    "--number-sections": ("number-sections", True),
+    "--natbib": ("cite-method", "natbib"),
+}
+
+# Server keys whose values are files the server must be sent
+_FILE_KEYS = ("csl", "bibliography", "include-in-header", "include-before-body", "include-after-body")
+_LIST_KEYS = ("css",) + _FILE_KEYS[1:]
+
+
+class Unsupported(Exception):
+    """The command line cannot be run exactly through the server."""
+
+
+def _metadata_value(value: str) -> Any:
+    """Interpret a ``-M KEY=VAL`` value as pandoc does (YAML booleans, otherwise strings)."""
+    lowered = value.lower()
+    if lowered in ("true", "yes", "on"):
+        return True
+    if lowered in ("false", "no", "off"):
+        return False
+    return value
+
+
+def _split_options(argv: List[str]) -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+    """Split a pandoc command line into (option, value) pairs and input files."""
+    options: List[Tuple[str, Optional[str]]] = []
+    inputs: List[str] = []
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith("--") and "=" in arg:
+            name, value = arg.split("=", 1)
+            options.append((name, value))
+        elif arg == "--mathjax" or arg in FLAG_OPTIONS:
+            options.append((arg, None))
+        elif arg in VALUE_OPTIONS:
+            if i + 1 >= len(argv):
+                raise Unsupported(f"{arg} needs a value")
+            options.append((arg, argv[i + 1]))
+            i += 1
+        elif arg.startswith("-") and arg != "-":
+            raise Unsupported(arg)
+        else:
+            inputs.append(arg)
+        i += 1
+    return options, inputs
+
+
+def build_request(argv: List[str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Translate a pandoc command line into a ``pandoc server`` request.
+
+    Args:
+        argv: pandoc arguments (without the program name)
+
+    Returns:
+        The JSON request and the output file (None for stdout)
+
+    Raises:
+        Unsupported: If the conversion must run through the pandoc executable
+        OSError: If an input or referenced file cannot be read
+    """
+    options, inputs = _split_options(argv)
+    request: Dict[str, Any] = {}
+    files: Dict[str, str] = {}
+    for name, value in options:
+        if name == "--mathjax":
+            request["html-math-method"] = {"method": "mathjax", "url": value} if value else {"method": "mathjax"}
+            continue
+        if name in FLAG_OPTIONS:
+            if value is not None:
+                raise Unsupported(name)
+            key, flag = FLAG_OPTIONS[name]
+            request[key] = flag
+            continue
+        if name not in VALUE_OPTIONS or value is None:
+            raise Unsupported(name)
+        key = VALUE_OPTIONS[name]
+        if key in ("variables", "metadata"):
+            field, _, setting = value.partition("=")
+            request.setdefault(key, {})[field] = _metadata_value(setting) if key == "metadata" else setting or "true"
+        elif key == "slide-level":
+            request[key] = int(value)
+        elif key in _LIST_KEYS:
+            request.setdefault(key, []).append(value)
+        else:
+            request[key] = value
+        if key in _FILE_KEYS:
+            with open(value, "rb") as f:
+                files[value] = base64.b64encode(f.read()).decode("ascii")
+
+    output = request.pop("output-file", None)
+    to = request.get("to") or _EXTENSION_FORMATS.get(os.path.splitext(output or "")[1])
+    if to is None or to.split("+")[0].split("-")[0] not in TEXT_FORMATS:
+        raise Unsupported(f"output format {to!r}")
+    request["to"] = to
+    request.setdefault("from", "markdown")
+    if "template" in request:
+        # The server takes the template's contents; like pandoc, add the
+        # writer name as extension to a template path without one
+        template = request["template"]
+        if not os.path.splitext(template)[1]:
+            template += "." + to.split("+")[0].split("-")[0]
+        with open(template, encoding="utf-8") as f:
+            request["template"] = f.read()
+    if len(inputs) != 1:
+        raise Unsupported("exactly one input file is supported")
+    with open(inputs[0], encoding="utf-8") as f:
+        request["text"] = f.read()
+    if files:
+        request["files"] = files
+    return request, output
+
+
+def convert(url: str, request: Dict[str, Any], timeout: float = 120.0) -> Dict[str, Any]:
+    """
+    Submit a conversion to the server.
+
+    Returns:
+        The server's JSON response (``output``, ``base64``, ``messages``)
+
+    Raises:
+        OSError: If the server is unreachable or reports an error
+    """
+    data = json.dumps(request).encode("utf-8")
+    req = urllib.request.Request(
+        url, data=data, headers={"Content-Type": "application/json", "Accept": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        result: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
+    if "output" not in result:
+        raise OSError(f"unexpected pandoc server response: {str(result)[:200]}")
+    return result
+
+
+def run(argv: List[str], url: Optional[str] = None) -> int:
+    """
+    Run a pandoc command line, through the server when possible.
+
+    Args:
+        argv: pandoc arguments (without the program name)
+        url: Server URL (default ``$LAMD_PANDOC_SERVER``; pandoc is run directly when unset)
+
+    Returns:
+        int: Exit code
+    """
+    url = url or os.environ.get(SERVER_ENV)
+    if url:
+        try:
+            request, output = build_request(argv)
+            result = convert(url, request)
+        except Unsupported:
+            pass
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"lamd-pandoc: running pandoc directly ({e})\n")
+        else:
+            for message in result.get("messages") or []:
+                sys.stderr.write(f"[{message.get('verbosity', 'INFO')}] {message.get('message', message)}\n")
+            text = result["output"]
+            if output:
+                mode, content = ("wb", base64.b64decode(text)) if result.get("base64") else ("w", text)
+                with open(output, mode) as f:
+                    f.write(content)
+            else:
+                sys.stdout.write(text)
+            return 0
+    return subprocess.call(["pandoc"] + argv)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port: int = sock.getsockname()[1]
+        return port
+
+
+class PandocServer:
+    """A ``pandoc server`` process started for the duration of a build."""
+
+    def __init__(self, port: Optional[int] = None):
+        """
+        Initialize the server handle.
+
+        Args:
+            port: Port to listen on (a free port is chosen when None)
+        """
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process: Optional[subprocess.Popen[bytes]] = None
+
+    def start(self, wait: float = 10.0) -> bool:
+        """
+        Start the server and wait until it accepts connections.
+
+        Returns:
+            True if the server is ready, False if pandoc has no server mode
+        """
+        try:
+            self.process = subprocess.Popen(
+                ["pandoc", "server", "--port", str(self.port)],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return False
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                return False
+            try:
+                with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                    return True
+            except OSError:
+                time.sleep(0.05)
+        self.stop()
+        return False
+
+    def stop(self) -> None:
+        """Stop the server."""
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run pandoc with the given arguments, through ``$LAMD_PANDOC_SERVER`` when possible.
+
+    Returns:
+        int: pandoc's exit code
+    """
+    return run(sys.argv[1:] if argv is None else argv)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,7 @@ from typing import Mapping, MutableMapping
 import lynguine.util.yaml as ny
 
 DEFAULT_DIAGRAMS_DIR = "diagrams"
+STATE_DIR = ".lamd"
 
 
 def get_build_cwd(explicit: str | None = None) -> str:
@@ -22,6 +23,13 @@ def get_build_cwd(explicit: str | None = None) -> str:
     return os.path.abspath(explicit or os.getcwd())
 
 
+def state_path(*parts: str, cwd: str | None = None) -> str:
+    """Return a path inside the per-build ``.lamd`` state directory, creating its parent."""
+    path = os.path.join(get_build_cwd(cwd), STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
 def _expand(value: str) -> str:
     return os.path.expandvars(value)
 
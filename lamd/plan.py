@@ -0,0 +1,115 @@
+"""
+Build-plan dry run for lamd builds.
+
+Runs ``make --dry-run --debug=v`` for a goal and reports which targets would
+be rebuilt and why (a missing file or a prerequisite newer than the target),
+together with an estimated duration per target taken from the timings that
+``maketalk --profile`` records in ``.lamd/profile-history.json``.
+
+Recipes are not executed, although make still evaluates the parse-time
+``$(shell ...)`` calls in the makefiles in order to read them.
+"""
+
+import json
+import re
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from lamd.profiler import estimate_duration, load_history
+
+# GNU make quotes names as 'name' (older versions use `name')
+_Q = r"[`'](?P<{0}>[^']+)'"
+_MUST_REMAKE = re.compile(r"Must remake target " + _Q.format("target"))
+_NOT_EXIST = re.compile(r"File " + _Q.format("target") + r" does not exist")
+_NEWER = re.compile(r"Prerequisite " + _Q.format("prereq") + r" is newer than target " + _Q.format("target"))
+
+
+def _is_file_target(target: str) -> bool:
+    """Return True for targets that name files (phony goals such as ``all`` have no extension)."""
+    return "." in target and not target.startswith("check-")
+
+
+def parse_make_debug(output: str) -> List[Dict[str, Any]]:
+    """
+    Extract the targets make would rebuild from ``make -n --debug=v`` output.
+
+    Args:
+        output: Combined stdout/stderr of the dry run
+
+    Returns:
+        List of ``{"target": str, "reasons": [str, ...]}`` in build order
+    """
+    reasons: Dict[str, List[str]] = {}
+    plan: List[Dict[str, Any]] = []
+    for line in output.splitlines():
+        line = line.strip()
+        match = _NOT_EXIST.search(line)
+        if match:
+            reasons.setdefault(match.group("target"), []).append("output missing")
+            continue
+        match = _NEWER.search(line)
+        if match:
+            reasons.setdefault(match.group("target"), []).append(f"{match.group('prereq')} changed")
+            continue
+        match = _MUST_REMAKE.search(line)
+        if match:
+            target = match.group("target")
+            if _is_file_target(target) and all(entry["target"] != target for entry in plan):
+                plan.append({"target": target, "reasons": reasons.get(target, ["forced"])})
+    return plan
+
+
+def build_plan(goal: str, history_file: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Dry-run make for *goal* and attach duration estimates.
+
+    Args:
+        goal: The make goal (e.g. ``all`` or ``talk.slides.html``)
+        history_file: Timing history written by ``maketalk --profile``
+
+    Returns:
+        Planned targets with ``target``, ``reasons`` and ``estimate`` (seconds or None)
+    """
+    result = subprocess.run(
+        ["make", "--dry-run", "--debug=v", goal],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    history = load_history(history_file) if history_file else {}
+    plan = parse_make_debug(result.stdout + result.stderr)
+    for entry in plan:
+        entry["estimate"] = estimate_duration(history, entry["target"])
+    return plan
+
+
+def format_plan(plan: List[Dict[str, Any]], goal: str) -> str:
+    """Return a human-readable table of the planned targets."""
+    if not plan:
+        return f"Nothing to rebuild for '{goal}'."
+
+    lines = [f"Build plan for '{goal}' ({len(plan)} targets):", "-" * 70]
+    known = 0.0
+    unknown = 0
+    for entry in plan:
+        estimate = entry["estimate"]
+        if estimate is None:
+            unknown += 1
+            cost = "     ?"
+        else:
+            known += estimate
+            cost = f"{estimate:6.1f}s"
+        lines.append(f"  {cost}  {entry['target']}")
+        lines.append(f"           because {', '.join(entry['reasons'])}")
+    lines.append("-" * 70)
+    total = f"Estimated total: {known:.1f}s"
+    if unknown:
+        total += f" (+{unknown} targets without history; run 'maketalk --profile' to record timings)"
+    lines.append(total)
+    return "\n".join(lines)
+
+
+def format_plan_json(plan: List[Dict[str, Any]], goal: str) -> str:
+    """Return the plan as JSON, e.g. for CI schedulers ordering talks by cost."""
+    total = sum(entry["estimate"] or 0.0 for entry in plan)
+    return json.dumps({"goal": goal, "estimate": total, "targets": plan}, indent=2)
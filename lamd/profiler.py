@@ -6,13 +6,47 @@ Part of CIP-0009 Phase 1: Performance Profiling Infrastructure
 This module provides two-level profiling:
 1. Python wrapper level: config loading, git operations, makefile generation
 2. Makefile level: actual build operations (pandoc, mdpp, mdfield, etc.)
+
+Makefile recipes are timed per target, and those timings are kept as a
+history that ``maketalk --plan`` uses to estimate rebuild costs.
 """
 
+import json
 import os
+import statistics
 import time
 from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Generator, List, Optional
+from typing import Any, Dict, Generator, List, Optional
+
+# Number of recent runs kept per target in the timing history
+HISTORY_SAMPLES = 5
+
+
+def load_history(path: str) -> Dict[str, Any]:
+    """
+    Load the per-target timing history.
+
+    Args:
+        path: History file written by :meth:`BuildProfiler.save_history`
+
+    Returns:
+        Mapping of target name to ``{"samples": [seconds, ...]}`` (empty if unavailable)
+    """
+    try:
+        with open(path) as f:
+            history: Dict[str, Any] = json.load(f)
+            return history
+    except (OSError, ValueError):
+        return {}
+
+
+def estimate_duration(history: Dict[str, Any], target: str) -> Optional[float]:
+    """Return the median recorded duration of *target*, or None without history."""
+    samples = history.get(target, {}).get("samples", [])
+    if not samples:
+        return None
+    return float(statistics.median(samples))
 
 
 class BuildProfiler:
@@ -28,14 +62,18 @@ class BuildProfiler:
         self.enabled = enabled
         self.wrapper_timings: Dict[str, float] = {}  # Python wrapper timing
         self.make_timings: Dict[str, List[float]] = {}  # Makefile operations (aggregated)
+        self.target_timings: Dict[str, float] = {}  # Makefile recipes (per target)
         self.start_time: Optional[float] = None
 
         # Create unique profile file for this build
         self.profile_file: Optional[str]
+        self.target_profile_file: Optional[str]
         if self.enabled:
             self.profile_file = f"/tmp/lamd_profile_{os.getpid()}.log"
+            self.target_profile_file = f"/tmp/lamd_profile_{os.getpid()}.targets.log"
         else:
             self.profile_file = None
+            self.target_profile_file = None
 
     def start(self) -> None:
         """Start overall build timing."""
@@ -72,10 +110,34 @@ class BuildProfiler:
         This sets:
         - LAMD_PROFILE=1: Signals to Makefiles that profiling is enabled
         - LAMD_PROFILE_FILE: Path to the profile log file
+        - LAMD_TARGET_PROFILE_FILE: Path to the per-target recipe log file
         """
         if self.enabled and self.profile_file:
             os.environ["LAMD_PROFILE"] = "1"
             os.environ["LAMD_PROFILE_FILE"] = self.profile_file
+        if self.enabled and self.target_profile_file:
+            os.environ["LAMD_TARGET_PROFILE_FILE"] = self.target_profile_file
+
+    def makefile_recipe_profiling(self, script_dir: str) -> str:
+        """
+        Return makefile lines that time every recipe line against its target.
+
+        The lines must come after the makefile includes so that the parse-time
+        ``$(shell ...)`` calls (already timed through TIME_CMD) are not wrapped.
+
+        Args:
+            script_dir: Directory containing the ``profile-recipe`` script
+
+        Returns:
+            Makefile text (empty when profiling is disabled)
+        """
+        if not self.enabled:
+            return ""
+        return (
+            "\n# Time each recipe line against its target (history for maketalk --plan)\n"
+            "export LAMD_TARGET=$@\n"
+            f"SHELL={os.path.join(script_dir, 'profile-recipe')}\n"
+        )
 
     def parse_makefile_profile(self) -> None:
         """
@@ -112,6 +174,58 @@ class BuildProfiler:
         except IOError as e:
             print(f"Warning: Could not read profile file: {e}")
 
+    def parse_target_profile(self) -> None:
+        """
+        Parse per-target recipe timings written by the profile-recipe script.
+
+        Each line has the form ``elapsed|target``; the recipe lines of a target
+        are summed.
+        """
+        if not self.enabled or not self.target_profile_file:
+            return
+
+        profile_path = Path(self.target_profile_file)
+        if not profile_path.exists():
+            return
+
+        try:
+            with open(profile_path) as f:
+                for line in f:
+                    elapsed_str, _, target = line.strip().partition("|")
+                    try:
+                        elapsed = float(elapsed_str)
+                    except ValueError:
+                        continue
+                    if target:
+                        self.target_timings[target] = self.target_timings.get(target, 0.0) + elapsed
+        except IOError as e:
+            print(f"Warning: Could not read target profile file: {e}")
+
+    def save_history(self, path: str) -> None:
+        """
+        Merge this build's per-target timings into the history file.
+
+        Args:
+            path: History file (typically ``.lamd/profile-history.json``)
+        """
+        if not self.enabled:
+            return
+        if not self.target_timings:
+            self.parse_target_profile()
+        if not self.target_timings:
+            return
+
+        history = load_history(path)
+        for target, elapsed in self.target_timings.items():
+            samples = history.setdefault(target, {}).setdefault("samples", [])
+            samples.append(round(elapsed, 3))
+            del samples[:-HISTORY_SAMPLES]
+        try:
+            with open(path, "w") as f:
+                json.dump(history, f, indent=2, sort_keys=True)
+        except OSError as e:
+            print(f"Warning: Could not write timing history: {e}")
+
     def _categorize_command(self, command: str) -> str:
         """
         Categorize a make command for reporting.
@@ -153,6 +267,8 @@ class BuildProfiler:
 
         # Parse makefile profile data
         self.parse_makefile_profile()
+        if not self.target_timings:
+            self.parse_target_profile()
 
         print("\n" + "=" * 70)
         print("Build Performance Profile (Hierarchical)")
@@ -206,14 +322,23 @@ class BuildProfiler:
                 pct = (total / overall) * 100 if overall > 0 else 0
                 print(f"  {i}. {category:30s}: {total:5.1f}s ({pct:4.1f}% of total)")
 
+        if self.target_timings:
+            print("\n⏱  Slowest Targets:")
+            slowest = sorted(self.target_timings.items(), key=lambda x: -x[1])
+            for target, total in slowest[:5]:
+                print(f"  {target:50s}: {total:6.2f}s")
+
         print("=" * 70 + "\n")
 
     def cleanup(self) -> None:
-        """Clean up temporary profile file."""
-        if self.enabled and self.profile_file:
-            profile_path = Path(self.profile_file)
-            if profile_path.exists():
-                try:
-                    profile_path.unlink()
-                except OSError:
-                    pass  # Ignore cleanup errors
+        """Clean up temporary profile files."""
+        if not self.enabled:
+            return
+        for profile_file in (self.profile_file, self.target_profile_file):
+            if profile_file:
+                profile_path = Path(profile_file)
+                if profile_path.exists():
+                    try:
+                        profile_path.unlink()
+                    except OSError:
+                        pass  # Ignore cleanup errors
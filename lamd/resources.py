@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Resource-class concurrency limits for heavy external tools.
+
+When builds run in parallel (``maketalk --jobs N``), ``pdflatex``, ``pandoc
+--citeproc``, ``inkscape`` and ``manim`` have very different CPU and memory
+profiles. The makefiles run these tools through ``lamd-run CLASS COMMAND...``,
+which holds one of a fixed number of per-class slots while the command runs.
+Slots are ``flock`` locks in a per-user directory, so the caps apply across
+every build on the host, not just within one ``make``.
+
+Limits are configured in the ``resources`` section of ``_lamd.yml``::
+
+    resources:
+      manim:
+        jobs: 2        # at most two concurrent renders
+        memory: 3G     # each render needs about 3G free before it starts
+      latex:
+        jobs: 4
+
+``memory`` is a per-command reservation: a command only starts once the
+system reports that much memory available, and the class never runs more
+commands than ``budget / memory`` when a class-wide ``budget`` is also given.
+
+maketalk and makecv write the resolved limits into the generated makefile as
+``LAMD_RESOURCES`` so that ``lamd-run`` does not need to parse ``_lamd.yml``
+for every command. They only do so for parallel builds or when ``resources``
+is configured; otherwise the tools run directly, with no wrapper at all.
+
+The makefiles run this file as a script (``python -P resources.py``) rather
+than through the ``lamd-run`` console script: it imports only the standard
+library, while importing the ``lamd`` package loads lynguine and costs most
+of a second per command.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Mapping, Optional
+
+RESOURCE_CLASSES = ["latex", "pandoc", "citeproc", "inkscape", "manim"]
+
+_CPUS = os.cpu_count() or 1
+
+# Defaults keep the light tools at one job per core and serialise manim,
+# whose renders are the ones that exhaust memory on build hosts.
+DEFAULT_LIMITS: Dict[str, Dict[str, Any]] = {
+    "latex": {"jobs": _CPUS},
+    "pandoc": {"jobs": _CPUS},
+    "citeproc": {"jobs": _CPUS},
+    "inkscape": {"jobs": max(1, _CPUS // 2)},
+    "manim": {"jobs": 1, "memory": "2G"},
+}
+
+_UNITS = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_memory(value: Any) -> Optional[int]:
+    """
+    Parse a memory size such as ``512M`` or ``4G`` into bytes.
+
+    Args:
+        value: Size as an integer number of bytes or a string with a K/M/G/T suffix
+
+    Returns:
+        Size in bytes, or None when no size is given
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().rstrip("B")
+    if text and text[-1] in _UNITS:
+        return int(float(text[:-1]) * _UNITS[text[-1]])
+    return int(float(text))
+
+
+def resource_limits(config: Optional[Mapping[str, Any]] = None) -> Dict[str, Dict[str, Optional[int]]]:
+    """
+    Merge user configuration over the defaults and normalise the values.
+
+    Args:
+        config: The ``resources`` mapping from ``_lamd.yml`` (may be None)
+
+    Returns:
+        Mapping of class name to ``{"jobs": int, "memory": bytes|None, "budget": bytes|None}``
+    """
+    limits: Dict[str, Dict[str, Optional[int]]] = {}
+    names = list(RESOURCE_CLASSES) + [name for name in (config or {}) if name not in RESOURCE_CLASSES]
+    for name in names:
+        merged: Dict[str, Any] = dict(DEFAULT_LIMITS.get(name, {"jobs": _CPUS}))
+        user = (config or {}).get(name) or {}
+        if not isinstance(user, Mapping):
+            raise ValueError(f"resources.{name} in _lamd.yml must be a mapping, found {user!r}")
+        merged.update(user)
+        jobs = max(1, int(merged.get("jobs") or 1))
+        memory = parse_memory(merged.get("memory"))
+        budget = parse_memory(merged.get("budget"))
+        if memory and budget:
+            jobs = max(1, min(jobs, budget // memory))
+        limits[name] = {"jobs": jobs, "memory": memory, "budget": budget}
+    return limits
+
+
+def makefile_export(iface: Mapping[str, Any], jobs: Optional[int] = None) -> str:
+    """
+    Return the makefile lines that run heavy tools under the resolved limits.
+
+    Args:
+        iface: The talk's configuration
+        jobs: Parallel make jobs (``--jobs``)
+
+    Returns:
+        ``LAMD_RESOURCES`` and the ``LAMDRUN`` command, or an empty string for a
+        serial build with no ``resources`` configured, which needs no slots
+    """
+    config = iface["resources"] if "resources" in iface else None
+    if config is None and (jobs or 1) <= 1:
+        return ""
+    limits = json.dumps(resource_limits(config), separators=(",", ":"))
+    return f"export LAMD_RESOURCES={limits}\nLAMDRUN={sys.executable} -P {os.path.abspath(__file__)}\n"
+
+
+def load_limits() -> Dict[str, Dict[str, Optional[int]]]:
+    """Load limits from ``LAMD_RESOURCES``, falling back to ``_lamd.yml`` in the current directory."""
+    exported = os.environ.get("LAMD_RESOURCES")
+    if exported:
+        loaded: Dict[str, Dict[str, Optional[int]]] = json.loads(exported)
+        return loaded
+
+    import lynguine.util.yaml as ny
+
+    try:
+        iface = ny.Interface.from_file(["_lamd.yml", "_config.yml"], directory=".")
+        config = iface["resources"] if "resources" in iface else None
+    except (ny.FileFormatError, OSError):
+        config = None
+    return resource_limits(config)
+
+
+def available_memory() -> Optional[int]:
+    """Return available system memory in bytes, or None where it cannot be determined."""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def lock_dir() -> str:
+    """Return the per-user directory holding slot lock files."""
+    path = os.path.join(tempfile.gettempdir(), f"lamd-{os.getuid()}", "slots")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class ResourceSlot:
+    """Context manager holding one concurrency slot of a resource class."""
+
+    def __init__(self, resource_class: str, limits: Mapping[str, Mapping[str, Optional[int]]], poll: float = 0.1):
+        """
+        Initialize the slot.
+
+        Args:
+            resource_class: Name of the resource class (e.g. ``manim``)
+            limits: Resolved limits as returned by :func:`resource_limits`
+            poll: Seconds between attempts while waiting for a slot
+        """
+        limit = limits.get(resource_class) or {"jobs": _CPUS, "memory": None}
+        self.resource_class = resource_class
+        self.jobs = int(limit.get("jobs") or 1)
+        self.memory = limit.get("memory")
+        self.poll = poll
+        self.handle: Optional[Any] = None
+        self.waited = 0.0
+
+    def _slot_path(self, slot: int) -> str:
+        return os.path.join(lock_dir(), f"{self.resource_class}.{slot}.lock")
+
+    def _others_idle(self, held: int) -> bool:
+        """Return True when no other slot of this class is in use."""
+        for slot in range(self.jobs):
+            if slot == held:
+                continue
+            with open(self._slot_path(slot), "w") as handle:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return False
+                fcntl.flock(handle, fcntl.LOCK_UN)
+        return True
+
+    def _try_acquire(self) -> bool:
+        for slot in range(self.jobs):
+            handle = open(self._slot_path(slot), "w")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                handle.close()
+                continue
+            # Hold the slot only if there is room for this command's reservation;
+            # a lone command always runs, as waiting cannot free any more memory.
+            free = available_memory()
+            if self.memory and free is not None and free < self.memory and not self._others_idle(slot):
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+                return False
+            self.handle = handle
+            return True
+        return False
+
+    def __enter__(self) -> "ResourceSlot":
+        start = time.perf_counter()
+        while not self._try_acquire():
+            time.sleep(self.poll)
+        self.waited = time.perf_counter() - start
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+
+
+def run(resource_class: str, command: List[str], limits: Optional[Mapping[str, Mapping[str, Optional[int]]]] = None) -> int:
+    """
+    Run a command while holding a slot of its resource class.
+
+    Args:
+        resource_class: Name of the resource class
+        command: Command line to execute
+        limits: Resolved limits (loaded from the environment/config when None)
+
+    Returns:
+        int: The command's exit code
+    """
+    with ResourceSlot(resource_class, limits if limits is not None else load_limits()) as slot:
+        if slot.waited >= 1.0:
+            sys.stderr.write(f"lamd-run: waited {slot.waited:.1f}s for a {resource_class} slot\n")
+        return subprocess.call(command)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run a command under a resource-class concurrency limit.
+
+    Returns:
+        int: The wrapped command's exit code
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a build command under a resource-class concurrency limit.",
+        epilog="Example:\n  lamd-run manim manim render talk.manim-video.py Talk -ql\n",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("resource_class", type=str, nargs="?", help=f"Resource class (e.g. {', '.join(RESOURCE_CLASSES)})")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="The command to run")
+    parser.add_argument("--show", action="store_true", help="Print the resolved limits and exit")
+
+    args = parser.parse_args(argv)
+
+    if args.show:
+        print(json.dumps(load_limits(), indent=2))
+        return 0
+
+    command = args.command[1:] if args.command[:1] == ["--"] else args.command
+    if not args.resource_class or not command:
+        parser.error("a resource class and a command are required")
+    return run(args.resource_class, command)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
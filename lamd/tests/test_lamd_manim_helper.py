@@ -5,6 +5,7 @@ fakes via ``unittest.mock.patch`` so that the tests can run in a plain CI
 environment without a Manim installation.
 """
 
+import copy
 import sys
 import types
 import unittest
@@ -24,6 +25,9 @@ def _make_fake_manim():
             self.text = text
             self.font_size = font_size
 
+        def copy(self):
+            return copy.copy(self)
+
         def __repr__(self):
             return f"MarkupText({self.text!r})"
 
@@ -32,6 +36,9 @@ def _make_fake_manim():
             self.latex = latex
             self.font_size = font_size
 
+        def copy(self):
+            return copy.copy(self)
+
         def __repr__(self):
             return f"MathTex({self.latex!r})"
 
@@ -49,6 +56,8 @@ def _make_fake_manim():
     fake.MarkupText = FakeMarkupText
     fake.MathTex = FakeMathTex
     fake.VGroup = FakeVGroup
+    fake.DOWN = (0, -1, 0)
+    fake.LEFT = (-1, 0, 0)
     return fake
 
 
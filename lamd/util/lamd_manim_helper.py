@@ -10,19 +10,55 @@ The helpers parse lightweight Markdown (bold, italic, inline math, display
 math) and return Manim ``VGroup`` / ``MathTex`` / ``MarkupText`` objects so
 that generated Manim code stays clean and readable.
 
+Typesetting cache
+-----------------
+The same notation is typeset on slide after slide and talk after talk.
+Every ``MathTex`` and ``MarkupText`` the helpers build is memoised for the
+life of the process, keyed by its source string, font size and keyword
+arguments, and later calls get a copy.  Manim's own LaTeX and text SVG
+directories are pointed at a cache shared by every render on the host
+(``$LAMD_MANIM_CACHE``, default ``$LAMD_CACHE_DIR/manim`` or
+``~/.cache/lamd/manim``), so an equation compiled by one render, or by the
+render of another talk, costs a file read instead of a LaTeX run.  Renders
+running in parallel take a lock per string before typesetting it, so they
+never read an SVG another render is still writing.  Set
+``LAMD_MANIM_CACHE=off`` to keep Manim's per-render directories.
+
+Keyframe scenes
+---------------
+Most slides only fade, write or transform text and equations into place, yet
+the SVG renderer samples every such animation into a full SVG per frame.  A
+scene built on :class:`KeyframeMixin` (``mdpp --to manim-svg --keyframes``)
+renders only the end state of those animations, as a single frame, and
+records the transition and its run time in ``keyframes.json`` beside the
+scene's ``animation_N`` directories.  :mod:`lamd.util.svg_to_html` then plays
+the transition in the browser with CSS.  Any other animation is rendered
+frame by frame as usual.
+
 Design constraints
 ------------------
 * Must not import anything at module level that is unavailable in the test
   environment (Manim is NOT installed in CI).  All Manim imports are guarded
   inside each function body.
+* Must not import ``lamd``: the file is copied next to the generated scene and
+  imported from there.
 * The public API is intentionally minimal for Phase 1; richer Markdown
   support (links, code spans, headings) is deferred to Phase 2.
 """
 
 from __future__ import annotations
 
+import contextlib
+import hashlib
+import json
+import os
 import re
-from typing import TYPE_CHECKING, Any, Dict, List
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
 
 if TYPE_CHECKING:
     from manim import MarkupText, MathTex, VGroup
@@ -49,6 +85,74 @@ _ITALIC_RE = re.compile(r"\*(.+?)\*")
 _BULLET_RE = re.compile(r"^\s*\*\s+", re.MULTILINE)
 
 
+# Mobjects already built in this process, by (class, source, font size, kwargs).
+_MEMO: Dict[Tuple[str, str, int, str], Any] = {}
+
+# The shared cache directory, once Manim's configuration points at it.
+_SHARED_CACHE: Optional[str] = None
+
+
+def _cache_root() -> Optional[str]:
+    """Return the shared typesetting cache directory, or None when disabled."""
+    root = os.environ.get("LAMD_MANIM_CACHE")
+    if root and root.lower() in ("0", "off", "false", "no"):
+        return None
+    if not root:
+        base = os.environ.get("LAMD_CACHE_DIR") or os.path.join(
+            os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "lamd"
+        )
+        root = os.path.join(base, "manim")
+    return root
+
+
+def _use_shared_cache() -> Optional[str]:
+    """Point Manim's LaTeX and text SVG directories at the shared cache (once per process)."""
+    global _SHARED_CACHE
+    if _SHARED_CACHE is not None:
+        return _SHARED_CACHE
+    root = _cache_root()
+    if root is None:
+        return None
+    try:
+        from manim import config
+    except ImportError:
+        return None
+    for key, name in (("tex_dir", "Tex"), ("text_dir", "texts")):
+        path = os.path.join(root, name)
+        os.makedirs(path, exist_ok=True)
+        config[key] = path
+    _SHARED_CACHE = root
+    return root
+
+
+@contextlib.contextmanager
+def _typesetting_lock(kind: str, source: str) -> Iterator[None]:
+    """Hold a host-wide lock on one string while it is typeset into the shared cache."""
+    root = _use_shared_cache()
+    if root is None or fcntl is None:
+        yield
+        return
+    key = hashlib.sha256(f"{kind}\0{source}".encode("utf-8")).hexdigest()
+    locks = os.path.join(root, "locks")
+    os.makedirs(locks, exist_ok=True)
+    with open(os.path.join(locks, key[:16] + ".lock"), "w") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _memoised(cls: Callable[..., Any], source: str, font_size: int, kwargs: Dict[str, Any]) -> Any:
+    """Return ``cls(source, font_size=font_size, **kwargs)``, built once per process and copied after."""
+    kind = getattr(cls, "__name__", repr(cls))
+    key = (kind, source, font_size, repr(sorted(kwargs.items())))
+    if key not in _MEMO:
+        with _typesetting_lock(kind, source):
+            _MEMO[key] = cls(source, font_size=font_size, **kwargs)
+    return _MEMO[key].copy()
+
+
 def _md_to_pango(text: str) -> str:
     """Convert a small subset of Markdown to Pango markup.
 
@@ -83,9 +187,9 @@ def _process_inline_segment(
         if i % 2 == 0:
             pango = _md_to_pango(part)
             if pango.strip():
-                mobjects.append(MarkupText(pango, font_size=font_size, **kwargs))
+                mobjects.append(_memoised(MarkupText, pango, font_size, kwargs))
         else:
-            mobjects.append(MathTex(part.strip(), font_size=font_size, **kwargs))
+            mobjects.append(_memoised(MathTex, part.strip(), font_size, kwargs))
     return mobjects
 
 
@@ -149,7 +253,7 @@ def lamd_text(
             # Display-math block
             latex = seg.strip()
             if latex:
-                mobjects.append(MathTex(latex, font_size=display_font_size, **kwargs))
+                mobjects.append(_memoised(MathTex, latex, display_font_size, kwargs))
         else:
             # Plain / inline-math segment
             mobjects.extend(_process_inline_segment(seg, font_size, kwargs))
@@ -189,4 +293,61 @@ def lamd_display_math(
     """
     from manim import MathTex
 
-    return MathTex(latex_string, font_size=font_size, **kwargs)
+    return _memoised(MathTex, latex_string, font_size, kwargs)
+
+
+# Animations a keyframe scene replaces by their end state, and the CSS
+# transition that stands in for them.
+KEYFRAME_TRANSITIONS = {
+    "FadeIn": "fade",
+    "FadeOut": "fade",
+    "Transform": "fade",
+    "ReplacementTransform": "fade",
+    "Write": "wipe",
+}
+
+
+class KeyframeMixin:
+    """Render simple animations of a Manim ``Scene`` as one keyframe each.
+
+    Mix in ahead of ``Scene``::
+
+        class KeyframeScene(KeyframeMixin, Scene):
+            pass
+
+    ``self.play`` calls whose animations are all listed in
+    :data:`KEYFRAME_TRANSITIONS` jump straight to their end state, render it
+    as a single frame and record ``{"transition", "duration"}`` under the
+    animation's directory name in ``keyframes.json``.  Other calls are played
+    as usual.
+    """
+
+    def play(self, *animations: Any, **kwargs: Any) -> None:
+        names = {type(animation).__name__ for animation in animations}
+        if not animations or not names <= set(KEYFRAME_TRANSITIONS):
+            super().play(*animations, **kwargs)  # type: ignore[misc]
+            return
+        from manim import config
+
+        duration = kwargs.get("run_time") or max(getattr(a, "run_time", 1.0) for a in animations)
+        transition = "wipe" if names == {"Write"} else "fade"
+        # The same steps Scene.play takes around the frames it renders.
+        for animation in animations:
+            animation._setup_scene(self)
+            animation.begin()
+            animation.finish()
+            animation.clean_up_from_scene(self)
+        index = self.renderer.num_plays  # type: ignore[attr-defined]
+        self.wait(1 / config.frame_rate)  # type: ignore[attr-defined]
+        self._record_keyframe(f"animation_{index}", {"transition": transition, "duration": round(duration, 3)})
+
+    def _record_keyframe(self, name: str, entry: Dict[str, Any]) -> None:
+        """Add *entry* to this scene's ``keyframes.json`` under *name*."""
+        from manim import config
+
+        keyframes = self.__dict__.setdefault("_lamd_keyframes", {})
+        keyframes[name] = entry
+        directory = os.path.join(config.media_dir, "svg", type(self).__name__)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "keyframes.json"), "w") as f:
+            json.dump(keyframes, f, indent=1, sort_keys=True)
@@ -0,0 +1,203 @@
+"""Pack manim SVG animation frames into one deduplicated, compressed archive.
+
+``manim --renderer svg`` writes every frame of an animation as its own SVG
+file under ``animation_N/``, 15 per second, so a title that is held on
+screen for three seconds is stored (and downloaded) 45 times.  Packing an
+animation directory:
+
+* hashes every frame and keeps each distinct frame once;
+* collapses runs of identical frames into ``[frame, count]`` entries of a
+  ``sequence``, so holds and static tails cost one entry;
+* optionally stores each distinct frame as a delta against the previous one
+  (the text between their common prefix and suffix), with a full keyframe
+  every :data:`KEYFRAME_INTERVAL` frames;
+* writes the frames, as JSON, to one gzip archive, ``frames.json.gz``.
+
+The manifest, ``pack.json``, sits next to ``animation.json``::
+
+    {"version": 1, "fps": 15, "width": 1920, "height": 1080,
+     "frame_count": 45, "duration": 3.0, "unique": 2,
+     "sequence": [[0, 1], [1, 44]],
+     "archive": "frames.json.gz", "bytes": 5120}
+
+:mod:`lamd.util.svg_to_html` plays packed animations with
+``lamd-svg-player.js`` (from ``lamd/includes``), which fetches the archive,
+inflates it with the browser's ``DecompressionStream`` and rebuilds the
+frames.  An animation whose pack is newer than its ``animation.json`` is
+not packed again.  Animations a keyframe scene rendered as a single frame
+(see :func:`lamd.util.svg_to_html.keyframe_entries`) are left as they are.
+
+Usage (CLI)::
+
+    python -m lamd.util.svg_pack media/svg/Talk --delta --prune
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import sys
+from typing import Any, Union
+
+from lamd.cache import write_atomic
+from lamd.util.svg_to_html import find_animations, keyframe_entries
+
+PACK_VERSION = 1
+MANIFEST = "pack.json"
+ARCHIVE = "frames.json.gz"
+
+# A full frame every this many distinct frames bounds how far back a player must decode.
+KEYFRAME_INTERVAL = 30
+
+Frame = Union[str, list[Any]]
+
+
+def frame_files(anim_dir: pathlib.Path) -> list[pathlib.Path]:
+    """Return the frame SVGs of an animation directory in frame order."""
+
+    def index(path: pathlib.Path) -> int:
+        digits = "".join(c for c in path.stem if c.isdigit())
+        return int(digits) if digits else 0
+
+    return sorted((p for p in anim_dir.glob("*.svg")), key=index)
+
+
+def delta(previous: str, frame: str) -> list[Any]:
+    """Return ``[prefix, suffix, middle]``: *frame* is ``previous[:prefix] + middle + previous[-suffix:]``."""
+    prefix = len(os.path.commonprefix([previous, frame]))
+    limit = min(len(previous), len(frame)) - prefix
+    suffix = 0
+    while suffix < limit and previous[-1 - suffix] == frame[-1 - suffix]:
+        suffix += 1
+    return [prefix, suffix, frame[prefix : len(frame) - suffix]]
+
+
+def apply_delta(previous: str, entry: Frame) -> str:
+    """Rebuild a frame from its archive entry (a full frame or a :func:`delta`)."""
+    if isinstance(entry, str):
+        return entry
+    prefix, suffix, middle = entry
+    return previous[:prefix] + str(middle) + previous[len(previous) - suffix :]
+
+
+def encode_frames(frames: list[str], use_delta: bool = False, keyframe_interval: int = KEYFRAME_INTERVAL) -> list[Frame]:
+    """Return the archive entries for the distinct *frames*, as deltas where that is shorter."""
+    entries: list[Frame] = []
+    for i, frame in enumerate(frames):
+        if use_delta and i % keyframe_interval:
+            entry = delta(frames[i - 1], frame)
+            if len(entry[2]) + 16 < len(frame):
+                entries.append(entry)
+                continue
+        entries.append(frame)
+    return entries
+
+
+def _is_current(anim_dir: pathlib.Path) -> bool:
+    manifest, archive = anim_dir / MANIFEST, anim_dir / ARCHIVE
+    if not manifest.is_file() or not archive.is_file():
+        return False
+    return manifest.stat().st_mtime >= (anim_dir / "animation.json").stat().st_mtime
+
+
+def pack_animation(
+    anim_dir: pathlib.Path,
+    use_delta: bool = False,
+    prune: bool = False,
+    keyframe_interval: int = KEYFRAME_INTERVAL,
+) -> dict[str, Any] | None:
+    """Pack one ``animation_N/`` directory.
+
+    Args:
+        anim_dir: Directory holding ``animation.json`` and the frame SVGs.
+        use_delta: Store distinct frames as deltas against the previous one.
+        prune: Remove the frame SVGs once they are packed.
+        keyframe_interval: Distinct frames between full keyframes.
+
+    Returns:
+        The manifest written, or *None* if the existing pack is up to date.
+
+    Raises:
+        FileNotFoundError: If the directory has no ``animation.json`` or frames.
+    """
+    if _is_current(anim_dir):
+        return None
+    info = json.loads((anim_dir / "animation.json").read_text(encoding="utf-8"))
+    files = frame_files(anim_dir)
+    if not files:
+        raise FileNotFoundError(f"No frames to pack in {str(anim_dir)!r}")
+
+    distinct: list[str] = []
+    seen: dict[str, int] = {}
+    sequence: list[list[int]] = []
+    for path in files:
+        frame = path.read_text(encoding="utf-8")
+        index = seen.setdefault(hashlib.sha256(frame.encode("utf-8")).hexdigest(), len(distinct))
+        if index == len(distinct):
+            distinct.append(frame)
+        if sequence and sequence[-1][0] == index:
+            sequence[-1][1] += 1
+        else:
+            sequence.append([index, 1])
+
+    entries = encode_frames(distinct, use_delta, keyframe_interval)
+    data = gzip.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8"), mtime=0)
+    write_atomic(str(anim_dir / ARCHIVE), data)
+    fps = info.get("fps") or 15
+    manifest = {
+        "version": PACK_VERSION,
+        "fps": fps,
+        "width": info.get("width"),
+        "height": info.get("height"),
+        "frame_count": len(files),
+        "duration": round(len(files) / fps, 3),
+        "unique": len(distinct),
+        "sequence": sequence,
+        "archive": ARCHIVE,
+        "bytes": len(data),
+    }
+    write_atomic(str(anim_dir / MANIFEST), json.dumps(manifest, separators=(",", ":")))
+    if prune:
+        for path in files:
+            path.unlink()
+    return manifest
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Deduplicate and pack manim SVG animation frames into one compressed archive per animation.",
+    )
+    parser.add_argument(
+        "animation_root",
+        type=pathlib.Path,
+        nargs="+",
+        help="Root directories containing animation_N/ subdirectories (e.g. media/svg/Talk).",
+    )
+    parser.add_argument("--delta", action="store_true", help="Store frames as deltas against the previous frame.")
+    parser.add_argument("--prune", action="store_true", help="Remove the frame SVGs once packed.")
+    args = parser.parse_args(argv)
+
+    packed = frames = unique = 0
+    try:
+        for root in args.animation_root:
+            anims = find_animations(root)
+            keyframes = keyframe_entries(anims)
+            for anim_dir in (d for d in anims if d not in keyframes):
+                manifest = pack_animation(anim_dir, use_delta=args.delta, prune=args.prune)
+                if manifest is not None:
+                    packed += 1
+                    frames += manifest["frame_count"]
+                    unique += manifest["unique"]
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        return 1
+    print(f"Packed {packed} animation(s): {frames} frames, {unique} distinct")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
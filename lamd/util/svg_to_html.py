@@ -1,15 +1,42 @@
 """Generate a RevealJS HTML presentation from manim SVG animation directories.
 
 Each ``animation_N/`` subdirectory produced by ``manim --renderer svg``
-becomes one RevealJS ``<section data-manim-svg="...">`` slide.  The
+becomes one RevealJS ``<section data-manim-svg="...">`` slide.  Several
+animation roots (one per scene, see :mod:`lamd.manim_scenes`) are stitched
+together in the order given.  The
 ``js/manim-svg.js`` plugin from the lawrennd/manim fork is included as a
 ``<script>`` tag and plays back the per-frame SVGs by cycling them on the
 RevealJS slide-background layer.
 
+Animations packed by :mod:`lamd.util.svg_pack` become
+``<section data-lamd-svg="...">`` slides instead, played by
+``lamd-svg-player.js`` from ``lamd/includes``, which fetches one compressed
+archive per animation rather than every frame.
+
+A presentation manifest, ``<output>.json``, lists every animation the
+player plays, in slide order, with its frame count, bytes and duration.
+The player reads it when the page opens and then fetches only the current
+animation and the next ``--prefetch`` ones.
+
+With ``--bundle`` the presentation is written as one self-contained HTML
+file for offline delivery: every animation is packed (if it is not already),
+its compressed archive is embedded as base64 alongside the manifest, and
+the player is inlined, so no frame directories or scripts need copying.
+Only reveal.js itself is still loaded from ``--reveal-cdn``.
+
+Scenes rendered with ``mdpp --keyframes`` record in ``keyframes.json`` the
+animations they rendered as a single end-state frame.  Each becomes a
+``<section class="lamd-keyframe">`` that fades (or, for ``Write``, wipes)
+that frame in over the last frame of the animation before it, with a CSS
+animation of the recorded duration; no player script is involved.
+
 Usage (CLI)::
 
     python -m lamd.util.svg_to_html media/svg/Talk mytalk.manim-svg.html \\
         --title "My Talk" --js-src /path/to/js/manim-svg.js
+    python -m lamd.util.svg_to_html media/svg/LamdScene_3f9a media/svg/LamdScene_81be \\
+        mytalk.manim-svg.html
+    python -m lamd.util.svg_to_html media/svg/Talk mytalk.bundle.html --bundle
 
 Usage (API)::
 
@@ -25,12 +52,13 @@ Usage (API)::
 from __future__ import annotations
 
 import argparse
+import base64
 import json
 import os
 import pathlib
 import shutil
 import sys
-from typing import Optional
+from typing import Any, Optional, Sequence, Union
 
 REVEAL_CDN = "https://cdn.jsdelivr.net/npm/reveal.js@5"
 
@@ -43,7 +71,7 @@ _HTML_TEMPLATE = """\
   <title>{title}</title>
   <link rel="stylesheet" href="{reveal_cdn}/dist/reveal.css" />
   <link rel="stylesheet" href="{reveal_cdn}/dist/theme/black.css" />
-</head>
+{styles}</head>
 <body>
 <div class="reveal">
   <div class="slides">
@@ -51,11 +79,12 @@ _HTML_TEMPLATE = """\
   </div>
 </div>
 <script src="{reveal_cdn}/dist/reveal.js"></script>
-<script src="{js_src_ref}"></script>
+{scripts}
 <script>
   Reveal.initialize({{
     hash: true,
-    plugins: [ManimSVG],
+    lamdSvg: {{ manifest: "{manifest}", prefetch: {prefetch} }},
+    plugins: [{plugins}],
   }});
 </script>
 </body>
@@ -71,6 +100,45 @@ _TITLE_SECTION = """\
 _ANIM_SECTION = """\
     <section data-manim-svg="{rel_path}" data-manim-loop="false"></section>"""
 
+_PACKED_SECTION = """\
+    <section data-lamd-svg="{rel_path}" data-lamd-svg-loop="false"></section>"""
+
+_BUNDLE_SCRIPT = """\
+<script>
+{player}
+</script>
+<script type="application/json" id="lamd-svg-bundle">{bundle}</script>"""
+
+_KEYFRAME_SECTION = """\
+    <section class="lamd-keyframe" data-lamd-keyframe="{transition}">{underlay}
+      <img class="lamd-keyframe-to" src="{src}" alt="" style="animation-duration: {duration}s" />
+    </section>"""
+
+_KEYFRAME_UNDERLAY = """
+      <img class="lamd-keyframe-from" src="{src}" alt="" />"""
+
+# Reveal marks the slide on screen "present", which starts its transition.
+_KEYFRAME_STYLE = """\
+  <style>
+    .reveal section.lamd-keyframe { height: 100%; }
+    .reveal section.lamd-keyframe img { position: absolute; top: 0; left: 0; width: 100%; height: 100%; margin: 0; }
+    .reveal section.present .lamd-keyframe-to { animation-name: lamd-fade; animation-fill-mode: both; }
+    .reveal section.present[data-lamd-keyframe="wipe"] .lamd-keyframe-to { animation-name: lamd-wipe; }
+    @keyframes lamd-fade { from { opacity: 0; } to { opacity: 1; } }
+    @keyframes lamd-wipe { from { clip-path: inset(0 100% 0 0); } to { clip-path: inset(0 0 0 0); } }
+  </style>
+"""
+
+KEYFRAMES = "keyframes.json"
+
+# Player for animations packed by lamd.util.svg_pack.
+PLAYER_JS = pathlib.Path(__file__).resolve().parent.parent / "includes" / "lamd-svg-player.js"
+
+
+def is_packed(anim_dir: pathlib.Path) -> bool:
+    """Return True if *anim_dir* has been packed by :mod:`lamd.util.svg_pack`."""
+    return (anim_dir / "pack.json").is_file() and (anim_dir / "frames.json.gz").is_file()
+
 
 def find_animations(root: pathlib.Path) -> list[pathlib.Path]:
     """Return animation_N directories sorted by animation index N."""
@@ -81,6 +149,16 @@ def find_animations(root: pathlib.Path) -> list[pathlib.Path]:
     return [d for d in dirs if (d / "animation.json").exists()]
 
 
+def keyframe_entries(anims: list[pathlib.Path]) -> dict[pathlib.Path, dict[str, Any]]:
+    """Return the recorded transition of each animation in *anims* that was rendered as one keyframe."""
+    recorded: dict[pathlib.Path, dict[str, Any]] = {}
+    for root in {anim.parent for anim in anims}:
+        if (root / KEYFRAMES).is_file():
+            entries = json.loads((root / KEYFRAMES).read_text(encoding="utf-8"))
+            recorded.update({root / name: entry for name, entry in entries.items()})
+    return {anim: recorded[anim] for anim in anims if anim in recorded}
+
+
 def _relative_path(anim_dir: pathlib.Path, output_path: pathlib.Path) -> str:
     """Return a path to *anim_dir* relative to *output_path*'s parent directory."""
     try:
@@ -117,46 +195,174 @@ def _locate_js_plugin(js_src: Optional[pathlib.Path]) -> Optional[pathlib.Path]:
     return None
 
 
+def animation_summary(anim_dir: pathlib.Path, output_path: pathlib.Path) -> dict[str, Any]:
+    """Return the manifest entry of one animation: where it is, how many frames, bytes and seconds."""
+    if is_packed(anim_dir):
+        pack = json.loads((anim_dir / "pack.json").read_text(encoding="utf-8"))
+        entry = {key: pack[key] for key in ("fps", "frame_count", "unique", "duration", "bytes", "archive", "sequence")}
+    else:
+        info = json.loads((anim_dir / "animation.json").read_text(encoding="utf-8"))
+        frames = sorted(anim_dir.glob("*.svg"))
+        fps = info.get("fps") or 15
+        entry = {
+            "fps": fps,
+            "frame_count": len(frames),
+            "duration": round(len(frames) / fps, 3),
+            "bytes": sum(f.stat().st_size for f in frames),
+        }
+    return {"path": _relative_path(anim_dir, output_path), "packed": is_packed(anim_dir), **entry}
+
+
+def write_manifest(anims: list[pathlib.Path], output_path: pathlib.Path) -> pathlib.Path:
+    """Write the presentation manifest next to *output_path* (``talk.manim-svg.html`` → ``talk.manim-svg.json``).
+
+    The manifest lists every animation in slide order with its frame count,
+    download size and duration, so the player can fetch animations as they are
+    needed instead of all at once.
+
+    Returns:
+        The manifest path.
+    """
+    animations = [animation_summary(d, output_path) for d in anims]
+    manifest = {
+        "version": 1,
+        "animations": animations,
+        "frame_count": sum(a["frame_count"] for a in animations),
+        "bytes": sum(a["bytes"] for a in animations),
+        "duration": round(sum(a["duration"] for a in animations), 3),
+    }
+    manifest_path = output_path.with_suffix(".json")
+    manifest_path.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    return manifest_path
+
+
+def _install_scripts(anims: list[pathlib.Path], output_dir: pathlib.Path, js_src: Optional[pathlib.Path]) -> tuple[str, str]:
+    """Copy the players the animations need next to the output; return their script tags and plugin names."""
+    players = []
+    if any(is_packed(d) for d in anims):
+        players.append((PLAYER_JS, "LamdSVG"))
+    if not all(is_packed(d) for d in anims):
+        resolved_js = _locate_js_plugin(js_src)
+        if resolved_js is None:
+            raise FileNotFoundError("Cannot find manim-svg.js. Install lawrennd/manim or set --js-src.")
+        players.append((resolved_js, "ManimSVG"))
+
+    # Copy each player alongside the output HTML so it can be served locally.
+    for source, _ in players:
+        dest = output_dir / source.name
+        if source.resolve() != dest.resolve():
+            shutil.copy2(source, dest)
+    scripts = "\n".join(f'<script src="{source.name}"></script>' for source, _ in players)
+    return scripts, ", ".join(plugin for _, plugin in players)
+
+
+def _frame_src(frame: pathlib.Path, output_path: pathlib.Path, bundle: bool) -> str:
+    """Return an ``<img>`` source for one frame: a relative path, or a data URI when bundling."""
+    if bundle:
+        return "data:image/svg+xml;base64," + base64.b64encode(frame.read_bytes()).decode("ascii")
+    return _relative_path(frame, output_path)
+
+
+def _keyframe_section(
+    anim_dir: pathlib.Path,
+    previous: Optional[pathlib.Path],
+    entry: dict[str, Any],
+    output_path: pathlib.Path,
+    bundle: bool,
+) -> str:
+    """Return the section transitioning from the last frame of *previous* to the keyframe of *anim_dir*."""
+    frames = sorted(anim_dir.glob("*.svg"))
+    if not frames:
+        raise FileNotFoundError(f"No keyframe in {str(anim_dir)!r}")
+    # The scene as it stood before the animation; absent at the start of a scene or once frames are pruned.
+    earlier = sorted(previous.glob("*.svg")) if previous is not None else []
+    underlay = _KEYFRAME_UNDERLAY.format(src=_frame_src(earlier[-1], output_path, bundle)) if earlier else ""
+    return _KEYFRAME_SECTION.format(
+        transition=entry["transition"],
+        duration=entry["duration"],
+        underlay=underlay,
+        src=_frame_src(frames[-1], output_path, bundle),
+    )
+
+
+def _sections(
+    anims: list[pathlib.Path], keyframes: dict[pathlib.Path, dict[str, Any]], output_path: pathlib.Path, bundle: bool
+) -> str:
+    """Return the slide sections for *anims*, in order."""
+    sections = []
+    for i, anim_dir in enumerate(anims):
+        if anim_dir in keyframes:
+            previous = anims[i - 1] if i and anims[i - 1].parent == anim_dir.parent else None
+            sections.append(_keyframe_section(anim_dir, previous, keyframes[anim_dir], output_path, bundle))
+        else:
+            template = _PACKED_SECTION if is_packed(anim_dir) else _ANIM_SECTION
+            sections.append(template.format(rel_path=_relative_path(anim_dir, output_path)))
+    return "\n".join(sections)
+
+
+def _bundle_scripts(anims: list[pathlib.Path], output_path: pathlib.Path) -> str:
+    """Pack *anims* where needed and return the inlined player and embedded archives as script tags."""
+    # svg_pack imports this module for find_animations.
+    from lamd.util.svg_pack import pack_animation
+
+    animations = []
+    for anim_dir in anims:
+        pack_animation(anim_dir, use_delta=True)
+        entry = animation_summary(anim_dir, output_path)
+        entry["data"] = base64.b64encode((anim_dir / entry["archive"]).read_bytes()).decode("ascii")
+        animations.append(entry)
+    # "</" would end the script element early; "<\/" is the same JSON string.
+    data = json.dumps({"version": 1, "animations": animations}, separators=(",", ":")).replace("</", "<\\/")
+    return _BUNDLE_SCRIPT.format(player=PLAYER_JS.read_text(encoding="utf-8"), bundle=data)
+
+
 def generate_html(
-    animation_root: pathlib.Path,
+    animation_root: Union[pathlib.Path, Sequence[pathlib.Path]],
     output_path: pathlib.Path,
     title: str = "",
     js_src: Optional[pathlib.Path] = None,
     theme: str = "black",
     reveal_cdn: str = REVEAL_CDN,
+    prefetch: int = 1,
+    bundle: bool = False,
 ) -> None:
     """Generate a RevealJS HTML file from an animation root directory.
 
     Args:
-        animation_root: Directory containing ``animation_N/`` subdirectories.
+        animation_root: Directory containing ``animation_N/`` subdirectories, or a
+            sequence of them whose animations are played in turn.
         output_path: Destination ``.html`` file.
         title: Presentation title (shown as a leading title slide if non-empty).
         js_src: Path to ``manim-svg.js``; auto-detected if *None*.
         theme: RevealJS theme name (default: ``"black"``).
         reveal_cdn: Base URL for RevealJS CDN assets.
+        prefetch: Packed animations after the current one to fetch ahead of time.
+        bundle: Write one self-contained file, with the player and every
+            animation's packed frames embedded, instead of linking to them.
     """
-    anims = find_animations(animation_root)
+    roots = [animation_root] if isinstance(animation_root, pathlib.Path) else list(animation_root)
+    anims = [anim for root in roots for anim in find_animations(root)]
     if not anims:
         raise FileNotFoundError(
-            f"No animation directories found under {animation_root!r}. " "Run 'manim --renderer svg' first."
+            f"No animation directories found under {', '.join(str(r) for r in roots)!r}. " "Run 'manim --renderer svg' first."
         )
 
     output_path = output_path.resolve()
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Resolve JS plugin.
-    resolved_js = _locate_js_plugin(js_src)
-    if resolved_js is None:
-        raise FileNotFoundError("Cannot find manim-svg.js. Install lawrennd/manim or set --js-src.")
-
-    # Copy the plugin alongside the output HTML so it can be served locally.
-    js_dest = output_path.parent / "manim-svg.js"
-    if resolved_js.resolve() != js_dest.resolve():
-        shutil.copy2(resolved_js, js_dest)
-    js_src_ref = "manim-svg.js"
+    # Keyframe animations are played with CSS; the others need a player.
+    keyframes = keyframe_entries(anims)
+    played = [d for d in anims if d not in keyframes]
+    if bundle:
+        # Everything the player needs is embedded; nothing is fetched but reveal.js.
+        scripts, plugins, manifest = _bundle_scripts(played, output_path), "LamdSVG", ""
+    else:
+        # Resolve and copy the players: packed animations use lamd-svg-player.js, others manim-svg.js.
+        scripts, plugins = _install_scripts(played, output_path.parent, js_src)
+        # The player fetches this, then only the animations around the current slide.
+        manifest = write_manifest(played, output_path).name
 
-    # Build section list.
-    sections = "\n".join(_ANIM_SECTION.format(rel_path=_relative_path(d, output_path)) for d in anims)
+    sections = _sections(anims, keyframes, output_path, bundle)
 
     title_slide = _TITLE_SECTION.format(title=title) if title else ""
 
@@ -165,7 +371,11 @@ def generate_html(
         reveal_cdn=reveal_cdn.rstrip("/").replace("/dist/theme/black.css", "").rstrip("/"),
         title_slide=title_slide,
         sections=sections,
-        js_src_ref=js_src_ref,
+        styles=_KEYFRAME_STYLE if keyframes else "",
+        scripts=scripts,
+        plugins=plugins,
+        manifest=manifest,
+        prefetch=max(0, prefetch),
     )
 
     # Fix the CDN paths — the template uses a single base variable.
@@ -183,7 +393,8 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument(
         "animation_root",
         type=pathlib.Path,
-        help="Root directory containing animation_N/ subdirectories (e.g. media/svg/Talk).",
+        nargs="+",
+        help="Root directories containing animation_N/ subdirectories (e.g. media/svg/Talk), in slide order.",
     )
     parser.add_argument(
         "output",
@@ -214,6 +425,18 @@ def main(argv: list[str] | None = None) -> int:
         help=f"RevealJS CDN base URL (default: {REVEAL_CDN}).",
     )
 
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=1,
+        help="Packed animations after the current one to fetch ahead of time (default: 1).",
+    )
+    parser.add_argument(
+        "--bundle",
+        action="store_true",
+        help="Write one self-contained HTML file with the player and packed frames embedded.",
+    )
+
     args = parser.parse_args(argv)
 
     try:
@@ -224,6 +447,8 @@ def main(argv: list[str] | None = None) -> int:
             js_src=args.js_src,
             theme=args.theme,
             reveal_cdn=args.reveal_cdn,
+            prefetch=args.prefetch,
+            bundle=args.bundle,
         )
         return 0
     except FileNotFoundError as exc:
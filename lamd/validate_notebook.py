@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Validate generated Jupyter notebooks in one process.
+
+``lamd-validate`` checks any number of notebooks. For each it reports
+the cell count, the count of each cell type, and where the notebook breaks
+the nbformat 4 schema:
+
+- the top-level keys and ``nbformat`` version
+- cell types, ``source`` and ``metadata``
+- code cell ``outputs`` and ``execution_count``
+- cell ids, which nbformat 4.5 requires to be present and unique
+
+A notebook fails if it breaks the schema or has fewer cells (or code or
+markdown cells) than required.
+
+Notebooks larger than :data:`STREAM_THRESHOLD` are parsed a cell at a time
+when the optional ``ijson`` package is installed (``pip install
+lamd[notebooks]``), so a notebook with large embedded outputs is never held
+in memory whole. Without it they are loaded whole and checked the same way.
+
+Usage::
+
+    lamd-validate talk.ipynb talk.full.ipynb talk.slides.ipynb --min-cells 5
+    lamd-validate notebooks/*.ipynb --json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import ijson
+
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Notebooks at least this large are stream-parsed when ijson is available
+STREAM_THRESHOLD = 8 * 1024 * 1024
+
+# Per-notebook cap on reported schema errors
+MAX_ERRORS = 20
+
+CELL_KEYS = {
+    "markdown": {"id", "cell_type", "metadata", "attachments", "source"},
+    "raw": {"id", "cell_type", "metadata", "attachments", "source"},
+    "code": {"id", "cell_type", "metadata", "source", "outputs", "execution_count"},
+}
+NOTEBOOK_KEYS = {"cells", "metadata", "nbformat", "nbformat_minor"}
+
+_CELL_ID = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+
+def _source_ok(source: Any) -> bool:
+    return isinstance(source, str) or (isinstance(source, list) and all(isinstance(line, str) for line in source))
+
+
+def check_cell(cell: Any) -> List[str]:
+    """
+    Check one cell against the nbformat 4 schema.
+
+    Args:
+        cell: Parsed cell
+
+    Returns:
+        List of problems (empty if the cell is valid); the id is checked by the caller
+    """
+    if not isinstance(cell, dict):
+        return ["not an object"]
+    cell_type = cell.get("cell_type")
+    if cell_type not in CELL_KEYS:
+        return [f"unknown cell_type {cell_type!r}"]
+    problems = []
+    unexpected = set(cell) - CELL_KEYS[cell_type]
+    if unexpected:
+        problems.append(f"unexpected keys {sorted(unexpected)}")
+    if not _source_ok(cell.get("source")):
+        problems.append("source must be a string or list of strings")
+    if not isinstance(cell.get("metadata"), dict):
+        problems.append("metadata must be an object")
+    if cell_type == "code":
+        if not isinstance(cell.get("outputs"), list):
+            problems.append("outputs must be a list")
+        count = cell.get("execution_count", "missing")
+        if count is not None and (isinstance(count, bool) or not isinstance(count, int)):
+            problems.append("execution_count must be an integer or null")
+    return problems
+
+
+def _load_cells(path: str, top: Dict[str, Any]) -> Iterator[Any]:
+    """Parse the whole notebook; fill *top* with its top-level fields and yield its cells."""
+    with open(path, encoding="utf-8") as f:
+        notebook = json.load(f)
+    if not isinstance(notebook, dict):
+        raise ValueError("notebook is not a JSON object")
+    top.update(notebook)
+    cells = notebook.get("cells")
+    yield from cells if isinstance(cells, list) else []
+
+
+def _stream_cells(path: str, top: Dict[str, Any]) -> Iterator[Any]:
+    """
+    Stream-parse the notebook with ijson, yielding one cell at a time.
+
+    *top* receives the scalar top-level fields, with placeholders for
+    ``cells`` and ``metadata``, as they are seen.
+    """
+    scalars = ("string", "number", "boolean", "null")
+    with open(path, "rb") as f:
+        builder = None
+        for prefix, event, value in ijson.parse(f):
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == "cells.item" and event in ("end_map", "end_array"):
+                    yield builder.value
+                    builder = None
+            elif prefix == "cells.item":
+                if event in scalars:
+                    yield value
+                else:
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+            elif prefix == "" and event == "map_key":
+                top[value] = None
+            elif prefix in ("cells", "metadata") and event in ("start_map", "start_array"):
+                top[prefix] = {} if event == "start_map" else []
+            elif prefix in top and event in scalars:
+                top[prefix] = value
+
+
+def _check_cells(cells: Iterable[Any], report: Dict[str, Any]) -> int:
+    """
+    Count and check cells, adding to *report*.
+
+    Returns:
+        int: Number of cells without an id
+    """
+    ids: Dict[str, int] = {}
+    missing_ids = 0
+    for index, cell in enumerate(cells):
+        report["cells"] += 1
+        cell_type = str(cell.get("cell_type") if isinstance(cell, dict) else None)
+        report["types"][cell_type] = report["types"].get(cell_type, 0) + 1
+        report["errors"].extend(f"cell {index}: {problem}" for problem in check_cell(cell))
+        cell_id = cell.get("id") if isinstance(cell, dict) else None
+        if cell_id is None:
+            missing_ids += 1
+        elif not isinstance(cell_id, str) or not _CELL_ID.match(cell_id):
+            report["errors"].append(f"cell {index}: invalid id {cell_id!r}")
+        elif cell_id in ids:
+            report["errors"].append(f"cell {index}: duplicate id {cell_id!r} (cell {ids[cell_id]})")
+        else:
+            ids[cell_id] = index
+    return missing_ids
+
+
+def check_notebook(top: Dict[str, Any], missing_ids: int = 0) -> List[str]:
+    """
+    Check a notebook's top-level fields against the nbformat 4 schema.
+
+    Args:
+        top: Top-level fields (the values of ``cells`` and ``metadata`` only need the right type)
+        missing_ids: Number of cells without an id
+
+    Returns:
+        List of problems (empty if valid)
+    """
+    problems = []
+    unexpected = set(top) - NOTEBOOK_KEYS
+    if unexpected:
+        problems.append(f"unexpected top-level keys {sorted(unexpected)}")
+    if not isinstance(top.get("cells"), list):
+        problems.append("cells must be a list")
+    if not isinstance(top.get("metadata"), dict):
+        problems.append("metadata must be an object")
+    if top.get("nbformat") != 4:
+        problems.append(f"nbformat must be 4, not {top.get('nbformat')!r}")
+    minor = top.get("nbformat_minor")
+    if isinstance(minor, bool) or not isinstance(minor, int):
+        problems.append("nbformat_minor must be an integer")
+    elif minor >= 5 and missing_ids:
+        problems.append(f"{missing_ids} cells have no id (required by nbformat 4.{minor})")
+    return problems
+
+
+def validate_notebook(
+    path: str, min_cells: int = 1, min_code: int = 0, min_markdown: int = 0, stream: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    Validate one notebook.
+
+    Args:
+        path: Notebook file
+        min_cells: Minimum number of cells
+        min_code: Minimum number of code cells
+        min_markdown: Minimum number of markdown cells
+        stream: Force (True) or disable (False) streaming; by default large
+            notebooks are streamed when ijson is installed
+
+    Returns:
+        Report with keys ``path``, ``ok``, ``cells``, ``types``, ``errors`` and ``streamed``
+    """
+    if stream is None:
+        stream = IJSON_AVAILABLE and os.path.isfile(path) and os.path.getsize(path) >= STREAM_THRESHOLD
+    report: Dict[str, Any] = {"path": path, "ok": False, "cells": 0, "types": {}, "errors": [], "streamed": stream}
+    errors: List[str] = report["errors"]
+    top: Dict[str, Any] = {}
+    try:
+        missing_ids = _check_cells((_stream_cells if stream else _load_cells)(path, top), report)
+    except (OSError, ValueError) as e:  # json and ijson parse errors are ValueErrors
+        errors.append(f"cannot read notebook: {e}")
+        return report
+    errors.extend(check_notebook(top, missing_ids))
+    if len(errors) > MAX_ERRORS:
+        errors[MAX_ERRORS:] = [f"... {len(errors) - MAX_ERRORS} more"]
+
+    for required, count, label in (
+        (min_cells, report["cells"], "cells"),
+        (min_code, report["types"].get("code", 0), "code cells"),
+        (min_markdown, report["types"].get("markdown", 0), "markdown cells"),
+    ):
+        if count < required:
+            errors.append(f"{count} {label} (expected >= {required})")
+    report["ok"] = not errors
+    return report
+
+
+def validate_notebooks(paths: Iterable[str], **limits: Any) -> List[Dict[str, Any]]:
+    """
+    Validate a batch of notebooks.
+
+    Args:
+        paths: Notebook files
+        **limits: Passed to :func:`validate_notebook`
+
+    Returns:
+        One report per notebook, in order
+    """
+    return [validate_notebook(path, **limits) for path in paths]
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Format a report as one summary line plus one indented line per problem."""
+    types = ", ".join(f"{count} {cell_type}" for cell_type, count in sorted(report["types"].items()))
+    summary = f"{report['path']}: {report['cells']} cells" + (f" ({types})" if types else "")
+    lines = [("✅ " if report["ok"] else "❌ ") + summary]
+    lines.extend(f"    {error}" for error in report["errors"])
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Validate notebooks given on the command line.
+
+    Returns:
+        int: 0 if every notebook is valid, 1 otherwise
+    """
+    parser = argparse.ArgumentParser(description="Validate Jupyter notebooks (cell counts and nbformat 4 schema).")
+    parser.add_argument("notebooks", nargs="*", help="Notebook files")
+    parser.add_argument("--min-cells", type=int, default=1, help="Minimum number of cells (default: 1)")
+    parser.add_argument("--min-code", type=int, default=0, help="Minimum number of code cells")
+    parser.add_argument("--min-markdown", type=int, default=0, help="Minimum number of markdown cells")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    args = parser.parse_args(argv)
+
+    reports = validate_notebooks(
+        args.notebooks, min_cells=args.min_cells, min_code=args.min_code, min_markdown=args.min_markdown
+    )
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        for report in reports:
+            print(format_report(report), file=sys.stdout if report["ok"] else sys.stderr)
+    return 0 if all(report["ok"] for report in reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
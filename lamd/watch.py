@@ -0,0 +1,303 @@
+"""
+Watch mode for lamd builds.
+
+Rebuilds a talk whenever its sources change. The watched set is the talk
+source, its include closure (as reported by ``lynguine.util.talk``), the
+macros directory and ``_lamd.yml``. Events are collected through inotify when
+the optional ``inotify_simple`` package is installed and by polling file
+modification times otherwise.
+
+Bursts of events (editors typically write a file several times on save) are
+debounced into a single rebuild, and a build that is still running when new
+changes arrive is cancelled and restarted so stale output is never waited on.
+
+Changes to the talk source or its includes are left to ``make`` to resolve
+incrementally. Changes to macros or ``_lamd.yml`` are not visible to ``make``
+as prerequisites, so those rebuilds run ``make -W <talk>.md`` to mark the
+talk source as changed and regenerate everything derived from it.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+import lynguine.util.talk as nt
+
+# inotify support (optional dependency, Linux only)
+try:
+    import inotify_simple
+
+    INOTIFY_AVAILABLE = True
+except ImportError:
+    INOTIFY_AVAILABLE = False
+    inotify_simple = None
+
+CONFIG_FILES = ["_lamd.yml", "_config.yml"]
+
+
+def collect_watch_paths(filename: str, snippets_path: Optional[str] = None, macros_dir: Optional[str] = None) -> Set[str]:
+    """
+    Return the set of files whose modification should trigger a rebuild.
+
+    Args:
+        filename: The talk markdown file
+        snippets_path: Directory used to resolve snippet includes
+        macros_dir: Directory containing the ``*.gpp`` macro files
+
+    Returns:
+        Set of absolute file paths to watch
+    """
+    paths = {os.path.abspath(filename)}
+    try:
+        inputs = nt.extract_inputs(filename, snippets_path=snippets_path or "..")
+    except Exception as e:
+        sys.stderr.write(f"Warning: could not resolve includes for {filename}: {e}\n")
+        inputs = []
+    paths.update(os.path.abspath(p) for p in inputs or [] if os.path.isfile(p))
+
+    for config_file in CONFIG_FILES:
+        if os.path.isfile(config_file):
+            paths.add(os.path.abspath(config_file))
+
+    if macros_dir and os.path.isdir(macros_dir):
+        for entry in os.listdir(macros_dir):
+            if entry.endswith(".gpp"):
+                paths.add(os.path.abspath(os.path.join(macros_dir, entry)))
+    return paths
+
+
+class PollingWatcher:
+    """Detect file changes by polling modification times."""
+
+    def __init__(self, paths: Iterable[str], interval: float = 0.25):
+        """
+        Initialize the polling watcher.
+
+        Args:
+            paths: Files to watch
+            interval: Seconds between polls
+        """
+        self.interval = interval
+        self.mtimes: Dict[str, Optional[float]] = {}
+        self.update(paths)
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def update(self, paths: Iterable[str]) -> None:
+        """Replace the watched set, keeping known modification times."""
+        self.mtimes = {p: self.mtimes[p] if p in self.mtimes else self._mtime(p) for p in paths}
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for changes to the watched files.
+
+        Args:
+            timeout: Maximum seconds to wait (``None`` waits indefinitely)
+
+        Returns:
+            Set of paths that changed (empty if the timeout expired)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for path, old in self.mtimes.items():
+                new = self._mtime(path)
+                if new != old:
+                    self.mtimes[path] = new
+                    changed.add(path)
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self) -> None:
+        """Release watcher resources."""
+
+
+class InotifyWatcher:
+    """Detect file changes through inotify (requires ``inotify_simple``)."""
+
+    # Editors often save by writing a new file and renaming it over the old one,
+    # so watch the containing directories rather than the files themselves.
+    _FLAGS = ("CLOSE_WRITE", "MOVED_TO", "CREATE", "DELETE")
+
+    def __init__(self, paths: Iterable[str]):
+        """
+        Initialize the inotify watcher.
+
+        Args:
+            paths: Files to watch
+        """
+        self.inotify = inotify_simple.INotify()
+        self.mask = 0
+        for name in self._FLAGS:
+            self.mask |= getattr(inotify_simple.flags, name)
+        self.paths: Set[str] = set()
+        self.watches: Dict[int, str] = {}
+        self.update(paths)
+
+    def update(self, paths: Iterable[str]) -> None:
+        """Replace the watched set, adding watches for any new directories."""
+        self.paths = set(paths)
+        watched_dirs = set(self.watches.values())
+        for directory in {os.path.dirname(p) for p in self.paths} - watched_dirs:
+            if os.path.isdir(directory):
+                self.watches[self.inotify.add_watch(directory, self.mask)] = directory
+
+    def changes(self, timeout: Optional[float] = None) -> Set[str]:
+        """
+        Wait for changes to the watched files.
+
+        Args:
+            timeout: Maximum seconds to wait (``None`` waits indefinitely)
+
+        Returns:
+            Set of paths that changed (empty if the timeout expired)
+        """
+        read_timeout = None if timeout is None else int(timeout * 1000)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for event in self.inotify.read(timeout=read_timeout):
+                directory = self.watches.get(event.wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, event.name)
+                if path in self.paths:
+                    changed.add(path)
+            if changed or deadline is None or time.monotonic() >= deadline:
+                return changed
+
+    def close(self) -> None:
+        """Release watcher resources."""
+        self.inotify.close()
+
+
+def make_watcher(paths: Iterable[str], polling: bool = False) -> "PollingWatcher | InotifyWatcher":
+    """Return an inotify watcher when available, otherwise a polling watcher."""
+    if INOTIFY_AVAILABLE and not polling and sys.platform.startswith("linux"):
+        return InotifyWatcher(paths)
+    return PollingWatcher(paths)
+
+
+class WatchBuilder:
+    """Run debounced, cancellable ``make`` rebuilds as watched files change."""
+
+    def __init__(
+        self,
+        filename: str,
+        goal: str,
+        snippets_path: Optional[str] = None,
+        macros_dir: Optional[str] = None,
+        debounce: float = 0.2,
+        polling: bool = False,
+    ):
+        """
+        Initialize the watch builder.
+
+        Args:
+            filename: The talk markdown file
+            goal: The make goal to rebuild on change
+            snippets_path: Directory used to resolve snippet includes
+            macros_dir: Directory containing the ``*.gpp`` macro files
+            debounce: Seconds of quiet required before a rebuild starts
+            polling: Force the polling watcher even when inotify is available
+        """
+        self.filename = filename
+        self.goal = goal
+        self.snippets_path = snippets_path
+        self.macros_dir = macros_dir
+        self.debounce = debounce
+        self.watcher = make_watcher(self._paths(), polling=polling)
+        self.process: Optional[subprocess.Popen[bytes]] = None
+        self.started: float = 0.0
+
+    def _paths(self) -> Set[str]:
+        return collect_watch_paths(self.filename, self.snippets_path, self.macros_dir)
+
+    def _needs_force(self, changed: Set[str]) -> bool:
+        """Return True when a change is invisible to make's prerequisites."""
+        for path in changed:
+            if os.path.basename(path) in CONFIG_FILES or path.endswith(".gpp"):
+                return True
+        return False
+
+    def make_command(self, changed: Set[str]) -> List[str]:
+        """Return the make command line for a rebuild triggered by *changed*."""
+        cmd = ["make"]
+        if self._needs_force(changed):
+            cmd += ["-W", self.filename]
+        cmd.append(self.goal)
+        return cmd
+
+    def start_build(self, changed: Set[str]) -> None:
+        """Start a rebuild, cancelling any build that is still running."""
+        self.cancel_build()
+        cmd = self.make_command(changed)
+        print(f"[watch] {', '.join(sorted(os.path.relpath(p) for p in changed)) or 'start'} -> {' '.join(cmd)}")
+        self.started = time.perf_counter()
+        # Run make in its own process group so cancellation reaches pandoc/gpp children
+        self.process = subprocess.Popen(cmd, start_new_session=True)
+
+    def cancel_build(self) -> None:
+        """Terminate the running build, if any."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        print("[watch] cancelling stale build")
+        try:
+            os.killpg(self.process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+
+    def _report_finished(self) -> None:
+        if self.process is None or self.process.returncode is None:
+            return
+        elapsed = time.perf_counter() - self.started
+        status = "done" if self.process.returncode == 0 else f"failed (exit {self.process.returncode})"
+        print(f"[watch] {self.goal} {status} in {elapsed:.2f}s")
+        self.process = None
+        # The include closure may have changed with the edit
+        self.watcher.update(self._paths())
+
+    def run(self) -> int:
+        """
+        Watch for changes and rebuild until interrupted.
+
+        Returns:
+            int: 0 when stopped with Ctrl-C
+        """
+        print(f"[watch] watching {len(self._paths())} files for {self.goal} (Ctrl-C to stop)")
+        try:
+            while True:
+                changed = self.watcher.changes(timeout=0.5 if self.process else None)
+                if self.process is not None and self.process.poll() is not None:
+                    self._report_finished()
+                if not changed:
+                    continue
+                # Debounce: keep collecting until the burst of events settles
+                while True:
+                    more = self.watcher.changes(timeout=self.debounce)
+                    if not more:
+                        break
+                    changed |= more
+                self.start_build(changed)
+        except KeyboardInterrupt:
+            self.cancel_build()
+            print("\n[watch] stopped")
+        finally:
+            self.watcher.close()
+        return 0
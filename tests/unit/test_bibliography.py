@@ -0,0 +1,138 @@
+"""Unit tests for lamd.bibliography (per-talk bibliography subsetting)."""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.bibliography import BibIndex, cite_keys, main, subset_flags  # noqa: E402
+
+
+class TestCiteKeys:
+    def test_pandoc_citation_forms(self):
+        text = "As [@smith20; @doe:2001, p. 3] and @jones19 show, see also @{weird key}."
+        assert cite_keys(text) == {"smith20", "doe:2001", "jones19", "weird key"}
+
+    def test_email_addresses_are_not_citations(self):
+        assert cite_keys("Mail me@example.org or [@smith20].") == {"smith20"}
+
+    def test_nocite_all_means_every_entry(self):
+        assert cite_keys("---\nnocite: |\n  @*\n---\nText\n") is None
+
+
+def _fake_pandoc(entries):
+    """Return a subprocess.run stand-in converting ``<name>.bib`` to ``entries[name]``."""
+
+    def run(cmd, **kwargs):
+        name = os.path.splitext(os.path.basename(cmd[-1]))[0]
+        return subprocess.CompletedProcess(cmd, 0, stdout=json.dumps(entries[name]))
+
+    return run
+
+
+class TestBibIndex:
+    @pytest.fixture(autouse=True)
+    def bibliography(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAMD_CACHE_DIR", str(tmp_path / "cache"))
+        self.entries = {
+            "lawrence": [{"id": "smith20", "title": "A"}, {"id": "unused"}],
+            "zbooks": [{"id": "jones19", "title": "Ünïcode"}, {"id": "smith20", "title": "duplicate"}],
+        }
+        self.bibdir = tmp_path / "bib"
+        self.bibdir.mkdir()
+        for name in self.entries:
+            (self.bibdir / f"{name}.bib").write_text(f"% {name}\n")
+        (self.bibdir / "notes.txt").write_text("not a bibliography\n")
+
+    def _index(self):
+        with patch("lamd.bibliography.subprocess.run", side_effect=_fake_pandoc(self.entries)) as run:
+            index = BibIndex.from_bibdir(str(self.bibdir)).refresh()
+        return index, run.call_count
+
+    def test_lookup_prefers_first_file(self):
+        index, _ = self._index()
+        assert index.lookup("smith20") == {"id": "smith20", "title": "A"}
+        assert index.lookup("jones19") == {"id": "jones19", "title": "Ünïcode"}
+        assert index.lookup("missing") is None
+        assert index.keys() == ["smith20", "unused", "jones19"]
+
+    def test_unchanged_files_are_not_reconverted(self):
+        _, conversions = self._index()
+        assert conversions == 2
+        index, conversions = self._index()
+        assert conversions == 0
+        assert index.entry_count(str(self.bibdir / "zbooks.bib")) == 2
+
+    def test_changed_file_rebuilds_only_its_segment(self):
+        self._index()
+        self.entries["zbooks"].append({"id": "new21"})
+        (self.bibdir / "zbooks.bib").write_text("% zbooks, edited\n")
+        index, conversions = self._index()
+        assert conversions == 1
+        assert index.rebuilt == [str(self.bibdir / "zbooks.bib")]
+        assert index.lookup("new21") == {"id": "new21"}
+
+    def test_cli_lookup(self, capsys):
+        self._index()
+        assert main(["lookup", "jones19", "--bibdir", str(self.bibdir)]) == 0
+        assert json.loads(capsys.readouterr().out) == [{"id": "jones19", "title": "Ünïcode"}]
+        assert main(["lookup", "nope", "--bibdir", str(self.bibdir)]) == 1
+
+
+class TestSubset:
+    @pytest.fixture(autouse=True)
+    def bibliography(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAMD_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.chdir(tmp_path)
+        entries = {
+            "lawrence": [{"id": "smith20", "title": "A"}, {"id": "unused"}],
+            "zbooks": [{"id": "jones19"}, {"id": "smith20", "title": "duplicate"}],
+        }
+        self.bibfiles = []
+        for name in entries:
+            path = tmp_path / f"{name}.bib"
+            path.write_text(f"% {name}\n")
+            self.bibfiles.append(str(path))
+        with patch("lamd.bibliography.subprocess.run", side_effect=_fake_pandoc(entries)):
+            BibIndex(self.bibfiles).refresh()
+        (tmp_path / "talk.slides.html.markdown").write_text("See [@smith20; @jones19; @missing].\n")
+
+    def test_writes_only_cited_entries(self):
+        flag = subset_flags("talk.slides.html.markdown", self.bibfiles, output="subset.json")
+        assert flag == "--bibliography=subset.json"
+        with open("subset.json") as f:
+            entries = json.load(f)
+        assert entries == [{"id": "jones19"}, {"id": "smith20", "title": "A"}]
+
+    def test_citations_in_inputs_count(self):
+        with open("talk.md", "w") as f:
+            f.write("\\include{intro.md}\n")
+        with open("intro.md", "w") as f:
+            f.write("As in @jones19.\n")
+        subset_flags("talk.md", self.bibfiles, inputs=["intro.md"])
+        with open(os.path.join(".lamd", "talk.md.bib.json")) as f:
+            assert json.load(f) == [{"id": "jones19"}]
+
+    def test_nocite_all_writes_every_entry(self):
+        with open("talk.slides.html.markdown", "w") as f:
+            f.write("---\nnocite: '@*'\n---\n")
+        subset_flags("talk.slides.html.markdown", self.bibfiles, output="subset.json")
+        with open("subset.json") as f:
+            entries = json.load(f)
+        assert entries == [{"id": "jones19"}, {"id": "smith20", "title": "A"}, {"id": "unused"}]
+
+    def test_conversion_failure_is_an_error(self, tmp_path, capsys):
+        unparsed = tmp_path / "other.bib"
+        unparsed.write_text("@broken{\n")
+        error = subprocess.CalledProcessError(64, "pandoc")
+        with patch("lamd.bibliography.subprocess.run", side_effect=error):
+            with pytest.raises(subprocess.CalledProcessError):
+                subset_flags("talk.slides.html.markdown", [str(unparsed)])
+            assert main(["subset", "talk.slides.html.markdown", str(unparsed), "-o", "subset.json"]) == 1
+        assert "cannot subset the bibliography" in capsys.readouterr().err
+        assert not os.path.exists("subset.json")
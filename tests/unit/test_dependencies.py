@@ -297,7 +297,7 @@ Here's a citation \cite{Smith2020}.
 
         # Verify the output format (prefixed lines with dependency type names)
         calls = mock_print.call_args_list
-        assert len(calls) == 6
+        assert len(calls) == 7
 
         # Check each line starts with the correct prefix (dependency type names, not Makefile variables)
         assert calls[0][0][0].startswith("inputs:")
@@ -305,7 +305,8 @@ Here's a citation \cite{Smith2020}.
         assert calls[2][0][0].startswith("docxdiagrams:")
         assert calls[3][0][0].startswith("pptxdiagrams:")
         assert calls[4][0][0].startswith("texdiagrams:")
-        assert calls[5][0][0].startswith("all:")
+        assert calls[5][0][0] == "rasterimages:"
+        assert calls[6][0][0].startswith("all:")
 
         # Verify content
         assert "/custom/snippets/intro.md" in calls[0][0][0]
@@ -313,8 +314,8 @@ Here's a citation \cite{Smith2020}.
         assert "/path/to/diagrams/example.svg" in calls[1][0][0]
         assert "/path/to/diagrams/example.emf" in calls[2][0][0]
         assert "/path/to/diagrams/example.pdf" in calls[4][0][0]
-        assert "test.posts.html" in calls[5][0][0]
-        assert "test.slides.html" in calls[5][0][0]
+        assert "test.posts.html" in calls[6][0][0]
+        assert "test.slides.html" in calls[6][0][0]
 
     @patch("sys.argv", ["dependencies", "batch", "nonexistent.md"])
     @patch("lynguine.util.talk.extract_inputs")
@@ -343,13 +344,14 @@ Here's a citation \cite{Smith2020}.
 
         # Verify output contains empty values for diagram types
         calls = mock_print.call_args_list
-        assert len(calls) == 6
+        assert len(calls) == 7
 
         # All diagram-related lines should be empty (just the prefix with dependency type names)
         assert calls[1][0][0] == "diagrams:"
         assert calls[2][0][0] == "docxdiagrams:"
         assert calls[3][0][0] == "pptxdiagrams:"
         assert calls[4][0][0] == "texdiagrams:"
+        assert calls[5][0][0] == "rasterimages:"
 
     # Note: There's no extract_snippets function in lynguine.util.talk module,
     # but the code in dependencies.py refers to it. This test is left
@@ -0,0 +1,152 @@
+"""Unit tests for lamd.diagrams.convert and lamd.diagrams.cache (batched, cached Inkscape conversion).
+
+A small Python script stands in for Inkscape: in ``--shell`` mode it
+follows the ``file-open``/``export-filename``/``export-do`` actions, and
+otherwise converts the single file named on its command line.
+"""
+
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.diagrams.cache import ConversionCache, converter_version  # noqa: E402
+from lamd.diagrams.convert import (  # noqa: E402
+    convert,
+    main,
+    pending_conversions,
+    session_count,
+    shell_actions,
+    split_batches,
+)
+
+FAKE_INKSCAPE = """\
+#!{python}
+import os, sys
+log = os.environ["FAKE_INKSCAPE_LOG"]
+with open(log, "a") as f:
+    f.write(" ".join(sys.argv[1:2]) + "\\n")
+if sys.argv[1:] == ["--version"]:
+    print(os.environ.get("FAKE_INKSCAPE_VERSION", "Inkscape 1.3.2 (091e20e, 2023-11-25)"))
+elif sys.argv[1:] == ["--shell"]:
+    if os.environ.get("FAKE_INKSCAPE_NO_SHELL"):
+        sys.exit(1)
+    for line in sys.stdin:
+        actions = dict(a.strip().partition(":")[::2] for a in line.split(";"))
+        if "export-filename" in actions:
+            with open(actions["export-filename"], "w") as out:
+                out.write("converted " + actions["file-open"])
+else:
+    target = sys.argv[2].split("=", 1)[1]
+    with open(target, "w") as out:
+        out.write("converted " + sys.argv[1])
+"""
+
+
+@pytest.fixture
+def diagrams(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    inkscape = tmp_path / "inkscape"
+    inkscape.write_text(FAKE_INKSCAPE.format(python=sys.executable))
+    inkscape.chmod(inkscape.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("FAKE_INKSCAPE_LOG", str(tmp_path / "calls.log"))
+    monkeypatch.setenv("LAMD_CACHE_DIR", str(tmp_path / "cache"))
+    os.makedirs("diagrams/ml")
+    for name in ("gp", "kernel", "bayes"):
+        (tmp_path / "diagrams" / "ml" / f"{name}.svg").write_text("<svg/>" * (1 + len(name)))
+    (tmp_path / "diagrams" / "photo.png").write_text("png")
+    return tmp_path
+
+
+def _calls(tmp_path):
+    return (tmp_path / "calls.log").read_text().splitlines()
+
+
+LIMITS = {"inkscape": {"jobs": 2, "memory": None}}
+
+
+class TestPending:
+    def test_selects_missing_and_stale_targets(self, diagrams):
+        (diagrams / "diagrams/ml/gp.pdf").write_text("old")
+        os.utime("diagrams/ml/gp.pdf", (0, 0))
+        (diagrams / "diagrams/ml/kernel.pdf").write_text("fresh")
+        targets = ["diagrams/ml/gp.pdf", "diagrams/ml/kernel.pdf", "diagrams/ml/bayes.emf", "diagrams/photo.png"]
+        assert pending_conversions(targets + ["diagrams/ml/bayes.emf"]) == [
+            ("diagrams/ml/gp.svg", "diagrams/ml/gp.pdf"),
+            ("diagrams/ml/bayes.svg", "diagrams/ml/bayes.emf"),
+        ]
+
+    def test_batches(self, diagrams):
+        conversions = [(f"diagrams/ml/{n}.svg", f"diagrams/ml/{n}.pdf") for n in ("gp", "kernel", "bayes")]
+        assert session_count(3, LIMITS) == min(2, os.cpu_count() or 1)
+        batches = split_batches(conversions, 2)
+        assert batches[0][0][0] == "diagrams/ml/kernel.svg"
+        assert sorted(sum(batches, [])) == sorted(conversions)
+
+
+class TestConvert:
+    def test_one_session_converts_everything(self, diagrams):
+        conversions = [(f"diagrams/ml/{n}.svg", f"diagrams/ml/{n}.{ext}") for n in ("gp", "bayes") for ext in ("pdf", "emf")]
+        limits = {"inkscape": {"jobs": 1, "memory": None}}
+        assert convert(conversions, str(diagrams / "inkscape"), limits) == []
+        assert _calls(diagrams) == ["--shell"]
+        assert (diagrams / "diagrams/ml/bayes.emf").read_text() == "converted diagrams/ml/bayes.svg"
+
+    def test_falls_back_to_single_conversions(self, diagrams, monkeypatch):
+        monkeypatch.setenv("FAKE_INKSCAPE_NO_SHELL", "1")
+        conversions = [("diagrams/ml/gp.svg", "diagrams/ml/gp.pdf")]
+        assert convert(conversions, str(diagrams / "inkscape"), LIMITS) == []
+        assert _calls(diagrams) == ["--shell", "diagrams/ml/gp.svg"]
+
+    def test_missing_inkscape_reports_failures(self, diagrams):
+        conversions = [("diagrams/ml/gp.svg", "diagrams/ml/gp.pdf")]
+        assert convert(conversions, str(diagrams / "no-inkscape"), LIMITS) == conversions
+
+    def test_cli_skips_up_to_date_targets(self, diagrams, capsys):
+        inkscape = str(diagrams / "inkscape")
+        assert main(["diagrams/ml/gp.pdf", "diagrams/photo.png", "--inkscape", inkscape]) == 0
+        assert main(["diagrams/ml/gp.pdf", "--inkscape", inkscape, "-v"]) == 0
+        assert _calls(diagrams) == ["--version", "--shell"]
+        assert "0 of 1 diagrams to convert" in capsys.readouterr().err
+
+    def test_shell_actions(self):
+        expected = "file-open:a.svg; export-filename:a.pdf; export-do; file-close\nquit\n"
+        assert shell_actions([("a.svg", "a.pdf")]) == expected
+
+
+class TestConversionCache:
+    def _checkout(self, root, name):
+        """Create a checkout with the gp diagram (linking to a PNG) and return its PDF target."""
+        directory = root / name / "diagrams"
+        directory.mkdir(parents=True)
+        (directory / "gp.svg").write_text('<svg><image xlink:href="photo.png"/><a href="#top"/></svg>')
+        (directory / "photo.png").write_text("pixels")
+        return (str(directory / "gp.svg"), str(directory / "gp.pdf"))
+
+    def test_identical_diagram_converted_once(self, diagrams):
+        inkscape = str(diagrams / "inkscape")
+        first, second = self._checkout(diagrams, "one"), self._checkout(diagrams, "two")
+        for conversion in (first, second):
+            assert convert([conversion], inkscape, LIMITS, ConversionCache.for_converter(inkscape)) == []
+        assert _calls(diagrams) == ["--version", "--shell"]
+        with open(second[1]) as f:
+            assert f.read() == f"converted {first[0]}"
+
+    def test_key_covers_content_links_format_and_version(self, diagrams):
+        svg, pdf = self._checkout(diagrams, "one")
+        cache = ConversionCache("Inkscape 1.3.2")
+        key = cache.key(svg, pdf)
+        assert cache.key(svg, pdf.replace(".pdf", ".emf")) != key
+        assert ConversionCache("Inkscape 1.4").key(svg, pdf) != key
+        (diagrams / "one" / "diagrams" / "photo.png").write_text("new pixels")
+        assert cache.key(svg, pdf) != key
+
+    def test_version_is_remembered(self, diagrams):
+        inkscape = str(diagrams / "inkscape")
+        assert converter_version(inkscape) == "Inkscape 1.3.2 (091e20e, 2023-11-25)"
+        assert converter_version(inkscape) == "Inkscape 1.3.2 (091e20e, 2023-11-25)"
+        assert _calls(diagrams) == ["--version"]
+        assert converter_version(str(diagrams / "no-inkscape")) is None
@@ -0,0 +1,111 @@
+"""Unit tests for lamd.diagrams.optimise (SVG minification for web publishing)."""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.diagrams.optimise import main, optimise_svg, optimised_content, round_numbers  # noqa: E402
+from lamd.diagrams.sync import sync_diagrams  # noqa: E402
+
+INKSCAPE_SVG = """<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<!-- Created with Inkscape (http://www.inkscape.org/) -->
+<svg xmlns="http://www.w3.org/2000/svg"
+   xmlns:xlink="http://www.w3.org/1999/xlink"
+   xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+   xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+   xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+   width="100" height="50.123456" inkscape:version="1.3 (0e150ed, 2023-07-21)">
+  <sodipodi:namedview id="namedview1" pagecolor="#ffffff" inkscape:zoom="1.5"/>
+  <metadata id="metadata1"><rdf:RDF/></metadata>
+  <defs id="defs1">
+    <linearGradient id="fade"><stop offset="0.50000001" style="stop-color:#000"/></linearGradient>
+    <linearGradient id="leftover"/>
+    <marker id="arrow"><path d="M 0,0 L 1,1"/></marker>
+  </defs>
+  <g id="layer1" inkscape:label="Layer 1" inkscape:groupmode="layer">
+    <path id="path123" d="M 10.123456,20.987654 L -0.0001,0.5" marker-end="url(#arrow)"
+       style="fill:url(#fade);-inkscape-font-specification:Sans" sodipodi:nodetypes="cc"/>
+    <g id="step1" class="fragment" data-fragment-index="1"><rect x="1.00000" width="2" height="2"/></g>
+    <text x="1" y="2" xml:space="preserve">Hello <tspan>world</tspan> !</text>
+  </g>
+</svg>
+"""
+
+
+class TestOptimiseSvg:
+    def test_removes_editor_state(self):
+        out = optimise_svg(INKSCAPE_SVG)
+        for gone in ("inkscape", "sodipodi", "metadata", "rdf", "leftover", "Created with"):
+            assert gone not in out
+        assert out.startswith('<svg xmlns="http://www.w3.org/2000/svg"')
+        assert len(out) < len(INKSCAPE_SVG) / 2
+
+    def test_keeps_what_is_drawn(self):
+        out = optimise_svg(INKSCAPE_SVG)
+        assert 'id="fade"' in out and 'id="arrow"' in out
+        assert 'd="M 10.123,20.988 L 0,.5"' in out
+        assert 'style="fill:url(#fade)"' in out
+        assert "Hello <tspan>world</tspan> !" in out
+
+    def test_safe_mode_keeps_ids_and_fragments(self):
+        safe = optimise_svg(INKSCAPE_SVG, "safe")
+        assert 'id="layer1"' in safe and 'id="step1"' in safe
+        aggressive = optimise_svg(INKSCAPE_SVG, "aggressive")
+        assert 'id="layer1"' not in aggressive and 'id="path123"' not in aggressive
+        assert 'class="fragment" data-fragment-index="1"' in aggressive
+        assert 'id="fade"' in aggressive
+
+    def test_unparsable_or_minimal_svg_unchanged(self):
+        assert optimise_svg("<svg><g></svg>") == "<svg><g></svg>"
+        minimal = '<svg xmlns="http://www.w3.org/2000/svg"/>'
+        assert optimise_svg(minimal) == minimal
+
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            ("M1.23456,-0.98765", "M1.235,-.988"),
+            ("1.00000 2.50", "1 2.5"),
+            ("-0.0001 1.5.5", "0 1.5.5"),
+            ("1.23456e-5", "1.23456e-5"),
+        ],
+    )
+    def test_round_numbers(self, value, expected):
+        assert round_numbers(value) == expected
+
+
+class TestPublishing:
+    @pytest.fixture
+    def diagram(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("LAMD_CACHE_DIR", str(tmp_path / "cache"))
+        path = tmp_path / "diagrams" / "ml" / "gp.svg"
+        path.parent.mkdir(parents=True)
+        path.write_text(INKSCAPE_SVG)
+        return path
+
+    def test_cached_by_content(self, diagram):
+        first = optimised_content(str(diagram))
+        with patch("lamd.diagrams.optimise.optimise_svg") as optimise:
+            assert optimised_content(str(diagram)) == first
+        optimise.assert_not_called()
+        assert optimised_content(str(diagram), "aggressive") != first
+
+    def test_sync_publishes_optimised_svgs(self, diagram, tmp_path):
+        target = tmp_path / "slides" / "diagrams"
+        sync = sync_diagrams("talk", [str(diagram)], str(target), optimise="safe")
+        published = (target / "ml" / "gp.svg").read_text()
+        assert published == optimise_svg(INKSCAPE_SVG)
+        assert sync.saved == len(INKSCAPE_SVG) - len(published)
+        assert sync_diagrams("talk", [str(diagram)], str(target), optimise="safe").copied == []
+        assert sync_diagrams("talk", [str(diagram)], str(target)).copied == ["ml/gp.svg"]
+        assert (target / "ml" / "gp.svg").read_text() == INKSCAPE_SVG
+
+    def test_cli(self, diagram, tmp_path, capsys):
+        assert main([str(diagram), "--output-dir", str(tmp_path / "out")]) == 0
+        assert (tmp_path / "out" / "gp.svg").read_text() == optimise_svg(INKSCAPE_SVG)
+        assert diagram.read_text() == INKSCAPE_SVG
+        assert "1 files" in capsys.readouterr().err
@@ -0,0 +1,112 @@
+"""Unit tests for lamd.diagrams.raster (responsive image variants) and the responsive image macros."""
+
+import os
+import re
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+import lamd  # noqa: E402
+from lamd.diagrams import raster  # noqa: E402
+from lamd.diagrams.raster import RESPONSIVE_WIDTHS, main, make_variants, responsive_images, variant_path  # noqa: E402
+
+
+def _macros(filename):
+    with open(os.path.join(os.path.dirname(lamd.__file__), "macros", filename)) as f:
+        return f.read()
+
+
+@pytest.fixture
+def talk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LAMD_CACHE_DIR", str(tmp_path / "cache"))
+    (tmp_path / "diagrams" / "ml").mkdir(parents=True)
+    (tmp_path / "_snippets").mkdir()
+    (tmp_path / "talk.md").write_text("\\includepngresponsive{\\diagramsDir/ml/photo}{80%}{}\n\\include{_snippets/intro.md}\n")
+    (tmp_path / "_snippets" / "intro.md").write_text(
+        "\\includejpgresponsive{\\diagramsDir/portrait}{40%}{}\n"
+        "\\includeimgresponsive{\\diagramsDir/ml/photo}{png}{50%}{}\n"
+        "\\includepng{\\diagramsDir/plain}\n"
+    )
+    return tmp_path
+
+
+def _fill_cache(image):
+    """Put every variant of *image* in the raster cache, so no scaling is needed."""
+    digest = raster.file_hash(str(image))
+    for width in RESPONSIVE_WIDTHS:
+        for ext in (".png", ".webp"):
+            cached = raster._cached(str(image), digest, width, ext)
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            with open(cached, "wb") as f:
+                f.write(f"{width}{ext}".encode())
+
+
+class TestResponsiveImages:
+    def test_finds_macros_across_inputs(self, talk):
+        with patch("lynguine.util.talk.extract_inputs", return_value=["_snippets/intro.md"]):
+            assert responsive_images("talk.md", "diagrams") == ["diagrams/ml/photo.png", "diagrams/portrait.jpg"]
+
+    def test_extracted_inputs_are_reused(self, talk):
+        with patch("lynguine.util.talk.extract_inputs") as extract:
+            assert responsive_images("talk.md", "diagrams", inputs=[]) == ["diagrams/ml/photo.png"]
+        extract.assert_not_called()
+
+    def test_variant_names(self):
+        assert variant_path("diagrams/ml/photo.png", 480) == "diagrams/ml/photo-480w.png"
+        assert variant_path("diagrams/ml/photo.png", 960, ".webp") == "diagrams/ml/photo-960w.webp"
+
+
+class TestVariants:
+    def test_cached_variants_need_no_pillow(self, talk, monkeypatch):
+        image = talk / "diagrams" / "ml" / "photo.png"
+        image.write_bytes(b"png")
+        _fill_cache(image)
+        monkeypatch.setattr(raster, "PIL_AVAILABLE", False)
+        assert len(make_variants(str(image))) == 2 * len(RESPONSIVE_WIDTHS)
+        assert (talk / "diagrams" / "ml" / "photo-960w.webp").read_bytes() == b"960.webp"
+        assert make_variants(str(image)) == []
+
+    def test_target_dir_keeps_source_tree_clean(self, talk, monkeypatch):
+        image = talk / "diagrams" / "ml" / "photo.png"
+        image.write_bytes(b"png")
+        _fill_cache(image)
+        monkeypatch.setattr(raster, "PIL_AVAILABLE", False)
+        assert main(["diagrams/ml/photo.png", "--target-dir", "site/diagrams"]) == 0
+        assert (talk / "site" / "diagrams" / "ml" / "photo-480w.webp").read_bytes() == b"480.webp"
+        assert sorted(os.listdir(talk / "diagrams" / "ml")) == ["photo.png"]
+        assert make_variants(str(image), target_dir="site/diagrams") == []
+
+    def test_missing_pillow_is_reported(self, talk, monkeypatch, capsys):
+        (talk / "diagrams" / "ml" / "photo.png").write_bytes(b"png")
+        monkeypatch.setattr(raster, "PIL_AVAILABLE", False)
+        assert main(["diagrams/ml/photo.png", "diagrams/missing.png"]) == 1
+        err = capsys.readouterr().err
+        assert "Image 'diagrams/missing.png' does not exist" in err
+        assert "Pillow is required" in err
+
+    def test_scales_down_never_up(self, talk):
+        Image = pytest.importorskip("PIL.Image")
+        Image.new("RGB", (1200, 600), "red").save(talk / "diagrams" / "ml" / "photo.png")
+        assert main(["diagrams/ml/photo.png"]) == 0
+        with Image.open(talk / "diagrams" / "ml" / "photo-480w.webp") as small:
+            assert small.size == (480, 240)
+        with Image.open(talk / "diagrams" / "ml" / "photo-1600w.png") as large:
+            assert large.size == (1200, 600)
+
+
+class TestMacros:
+    def test_html_macro_matches_variant_widths(self):
+        html = _macros("talk-macros-html.gpp")
+        definition = next(line for line in html.splitlines() if line.startswith("\\define{\\includeimgresponsive"))
+        assert 'loading="lazy"' in definition
+        assert [int(w) for w in re.findall(r"-(\d+)w\.webp", definition)] == list(RESPONSIVE_WIDTHS)
+        assert [int(w) for w in re.findall(r"-(\d+)w\.\\ext", definition)] == list(RESPONSIVE_WIDTHS)
+
+    def test_other_formats_fall_back_to_includeimg(self):
+        assert "\\define{\\includeimgresponsive{stem}{ext}{width}{class}}{\\includeimg{" in _macros("talk-macros-null.gpp")
+        back = _macros("talk-macros-back.gpp")
+        assert "\\define{\\includepngresponsive" in back and "\\define{\\includejpgresponsive" in back
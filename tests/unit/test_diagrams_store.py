@@ -0,0 +1,110 @@
+"""Unit tests for lamd.diagrams.store (shared content-addressed diagram store)."""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.cache import file_hash  # noqa: E402
+from lamd.diagrams.store import INDEX, main, rewrite, store_diagrams, unstored  # noqa: E402
+from lamd.diagrams.sync import main as sync_main  # noqa: E402
+
+WEB = "https://example.org/diagrams"
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "diagrams" / "ml").mkdir(parents=True)
+    (tmp_path / "diagrams" / "ml" / "gp.svg").write_text("<svg>gp</svg>")
+    (tmp_path / "diagrams" / "ml" / "gp-copy.svg").write_text("<svg>gp</svg>")
+    (tmp_path / "diagrams" / "linked.svg").write_text('<svg><image href="photo.png"/></svg>')
+    (tmp_path / "diagrams" / "photo.png").write_text("pixels")
+    (tmp_path / "talk.md").write_text("# Talk\n")
+    return tmp_path
+
+
+def _sources(root, *names):
+    return [str(root / "diagrams" / name) for name in names]
+
+
+class TestStore:
+    def test_identical_content_stored_once(self, site):
+        sources = _sources(site, "ml/gp.svg", "ml/gp-copy.svg", "photo.png")
+        urls, store = store_diagrams(sources, "diagrams", str(site / "store"), "/assets/d/")
+        digest = file_hash(sources[0])
+        assert urls["ml/gp.svg"] == urls["ml/gp-copy.svg"] == f"/assets/d/{digest[:2]}/{digest}.svg"
+        assert len(store.added) == 2
+        assert (site / "store" / digest[:2] / f"{digest}.svg").read_text() == "<svg>gp</svg>"
+
+    def test_unchanged_sources_are_not_read(self, site):
+        sources = _sources(site, "ml/gp.svg", "photo.png")
+        first, _ = store_diagrams(sources, "diagrams", str(site / "store"), "/d")
+        with patch("lamd.diagrams.store.file_hash") as hashed:
+            again, store = store_diagrams(sources, "diagrams", str(site / "store"), "/d")
+        assert again == first
+        assert store.added == []
+        hashed.assert_not_called()
+
+    def test_edited_diagram_gets_a_new_name(self, site):
+        sources = _sources(site, "ml/gp.svg")
+        first, _ = store_diagrams(sources, "diagrams", str(site / "store"), "/d")
+        (site / "diagrams" / "ml" / "gp.svg").write_text("<svg>gp v2</svg>")
+        second, _ = store_diagrams(sources, "diagrams", str(site / "store"), "/d")
+        assert second["ml/gp.svg"] != first["ml/gp.svg"]
+        index = json.loads((site / "store" / INDEX).read_text())
+        assert len(index) == 1
+
+    def test_svgs_linking_local_files_are_not_stored(self, site):
+        urls, _ = store_diagrams(_sources(site, "linked.svg"), "diagrams", str(site / "store"), "/d")
+        assert urls == {}
+
+
+class TestRewrite:
+    def test_html_and_notebook_urls(self):
+        urls = {"ml/gp.svg": "/d/ab/abc.svg"}
+        html = f'<img src="{WEB}/ml/gp.svg"><object data="{WEB}/other.svg"></object>'
+        text, count = rewrite(html, WEB + "/", urls)
+        assert count == 1
+        assert text == '<img src="/d/ab/abc.svg"><object data="https://example.org/diagrams/other.svg"></object>'
+        cell = json.dumps({"source": [f"![]({WEB}/ml/gp.svg)\n"]})
+        assert "/d/ab/abc.svg" in rewrite(cell, WEB, urls)[0]
+
+    def test_cli_rewrites_outputs(self, site, capsys):
+        (site / "talk.posts.html").write_text(f'<img src="{WEB}/ml/gp.svg">')
+        with patch("lamd.diagrams.store.diagram_files", return_value=_sources(site, "ml/gp.svg")):
+            args = ["talk.md", "talk.posts.html", "--store", "store", "--url", "/d", "--diagrams-dir", "diagrams"]
+            assert main(args + ["--diagrams-web", WEB, "-v"]) == 0
+        digest = file_hash(str(site / "diagrams" / "ml" / "gp.svg"))
+        assert (site / "talk.posts.html").read_text() == f'<img src="/d/{digest[:2]}/{digest}.svg">'
+        assert "Rewrote 1 diagram URLs in talk.posts.html" in capsys.readouterr().out
+
+
+class TestStoreWithSync:
+    def test_linked_svg_is_still_published_at_its_usual_url(self, site):
+        sources = _sources(site, "ml/gp.svg", "linked.svg")
+        (site / "talk.posts.html").write_text(f'<img src="{WEB}/ml/gp.svg"><img src="{WEB}/linked.svg">')
+        (site / "slides").mkdir()
+        (site / "_snippets").mkdir()
+        with patch("lamd.diagrams.store.diagram_files", return_value=sources):
+            args = ["talk.md", "talk.posts.html", "--store", "store", "--url", "/d", "--diagrams-dir", "diagrams"]
+            assert main(args + ["--diagrams-web", WEB]) == 0
+        with patch("lamd.diagrams.sync.diagram_files", return_value=sources):
+            args = ["talk.md", "slidediagrams", "slides/diagrams", "slides", "diagrams", "_snippets", "--skip-stored"]
+            assert sync_main(args) == 0
+        digest = file_hash(sources[0])
+        html = (site / "talk.posts.html").read_text()
+        assert html == f'<img src="/d/{digest[:2]}/{digest}.svg"><img src="{WEB}/linked.svg">'
+        assert (site / "slides" / "diagrams" / "linked.svg").read_text() == (site / "diagrams" / "linked.svg").read_text()
+        assert not (site / "slides" / "diagrams" / "ml" / "gp.svg").exists()
+
+    def test_unstored_keeps_diagrams_rewrite_cannot_match(self, site):
+        # published as plot.svg, but stored under ml/diagrams/plot.svg
+        (site / "diagrams" / "ml" / "diagrams").mkdir()
+        (site / "diagrams" / "ml" / "diagrams" / "plot.svg").write_text("<svg>plot</svg>")
+        sources = _sources(site, "ml/gp.svg", "linked.svg", "ml/diagrams/plot.svg")
+        assert unstored(sources, "diagrams") == sources[1:]
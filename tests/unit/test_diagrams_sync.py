@@ -0,0 +1,119 @@
+"""Unit tests for lamd.diagrams.sync (manifest-based diagram publishing)."""
+
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.cache import file_hash  # noqa: E402
+from lamd.diagrams.sync import (  # noqa: E402
+    MANIFEST,
+    DiagramSync,
+    copy_file,
+    main,
+    relative_target,
+    sync_diagrams,
+)
+
+
+@pytest.fixture
+def course(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("ml/gp.svg", "ml/kernel.svg", "bayes.svg"):
+        path = tmp_path / "diagrams" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"<svg>{name}</svg>")
+    (tmp_path / "slides").mkdir()
+    (tmp_path / "_snippets").mkdir()
+    (tmp_path / "talk.md").write_text("# Talk\n")
+    return tmp_path
+
+
+def _sources(root, *names):
+    return [str(root / "diagrams" / name) for name in names]
+
+
+class TestSync:
+    def test_copies_and_records(self, course):
+        target = course / "slides" / "diagrams"
+        sync = sync_diagrams("talk", _sources(course, "ml/gp.svg", "bayes.svg"), str(target))
+        assert sorted(sync.copied) == ["bayes.svg", "ml/gp.svg"]
+        assert (target / "ml" / "gp.svg").read_text() == "<svg>ml/gp.svg</svg>"
+        assert (target / MANIFEST).exists()
+
+    def test_unchanged_files_are_not_read(self, course):
+        target = str(course / "slides" / "diagrams")
+        sources = _sources(course, "ml/gp.svg", "bayes.svg")
+        sync_diagrams("talk", sources, target)
+        (course / "diagrams" / "bayes.svg").write_text("<svg>new</svg>")
+        with patch("lamd.diagrams.sync.file_hash", wraps=file_hash) as hashed:
+            sync = sync_diagrams("talk", sources, target)
+        assert sync.copied == ["bayes.svg"]
+        assert [call.args[0] for call in hashed.call_args_list] == [sources[1]]
+
+    def test_touched_source_with_same_content_is_not_copied(self, course):
+        target = str(course / "slides" / "diagrams")
+        sources = _sources(course, "ml/gp.svg")
+        sync_diagrams("talk", sources, target)
+        os.utime(sources[0], (0, 0))
+        assert sync_diagrams("talk", sources, target).copied == []
+
+    def test_prunes_diagrams_no_longer_used(self, course):
+        target = course / "slides" / "diagrams"
+        sync_diagrams("talk", _sources(course, "ml/gp.svg", "bayes.svg"), str(target))
+        sync_diagrams("other", _sources(course, "bayes.svg"), str(target))
+        (target / "unpublished.svg").write_text("mine")
+        sync = sync_diagrams("talk", _sources(course, "ml/kernel.svg"), str(target))
+        assert sync.pruned == ["ml/gp.svg"]
+        assert (target / "bayes.svg").exists()
+        assert (target / "unpublished.svg").exists()
+        assert sorted(os.listdir(target / "ml")) == ["kernel.svg"]
+
+    def test_keeps_edited_copies_and_no_prune(self, course):
+        target = course / "slides" / "diagrams"
+        sync_diagrams("talk", _sources(course, "ml/gp.svg", "bayes.svg"), str(target))
+        (target / "bayes.svg").write_text("edited by hand")
+        assert sync_diagrams("talk", _sources(course, "ml/gp.svg"), str(target)).pruned == []
+        assert sync_diagrams("talk", [], str(target), prune=False).pruned == []
+        assert (target / "ml" / "gp.svg").exists()
+
+    def test_corrupt_manifest_resyncs(self, course):
+        target = course / "slides" / "diagrams"
+        target.mkdir()
+        (target / MANIFEST).write_text("not json")
+        sync = sync_diagrams("talk", _sources(course, "bayes.svg"), str(target))
+        assert sync.copied == ["bayes.svg"]
+        sync = DiagramSync(str(target))
+        sync.load()
+        assert sync.talks == {"talk": ["bayes.svg"]}
+
+
+class TestCopy:
+    @pytest.mark.parametrize("link", ["auto", "hard", "copy"])
+    def test_link_modes(self, course, link):
+        source = str(course / "diagrams" / "bayes.svg")
+        destination = str(course / "out" / "bayes.svg")
+        copy_file(source, destination, link)
+        assert open(destination).read() == "<svg>bayes.svg</svg>"
+        assert os.path.samefile(source, destination) == (link == "hard")
+        assert os.listdir(course / "out") == ["bayes.svg"]
+
+    def test_relative_target(self):
+        assert relative_target("../diagrams/ml/gp.svg") == "ml/gp.svg"
+        assert relative_target("/course/diagrams/old/diagrams/gp.svg") == "gp.svg"
+
+
+class TestMain:
+    def test_publishes_talk_diagrams(self, course):
+        args = ["talk.md", "slidediagrams", "slides/diagrams", "slides", "diagrams", "_snippets"]
+        with patch("lamd.diagrams.sync.diagram_files", return_value=_sources(course, "bayes.svg")) as files:
+            assert main(args) == 0
+        assert files.call_args.args[:2] == ("talk.md", "slidediagrams")
+        assert (course / "slides" / "diagrams" / "bayes.svg").exists()
+
+    def test_missing_directory(self, course, capsys):
+        assert main(["talk.md", "texdiagrams", "tex/diagrams", "missing", "diagrams", "_snippets"]) == 1
+        assert "Slides directory 'missing' does not exist" in capsys.readouterr().err
@@ -13,7 +13,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 
 import lynguine.util.yaml as ny
 
-from lamd.flags import main, resolve_reference_doc
+from lamd.flags import flags_for, main, resolve_reference_doc
 
 
 class TestFlags:
@@ -315,3 +315,35 @@ class TestResolveReferenceDoc:
 
     def test_missing_path_returned_unchanged(self):
         assert resolve_reference_doc("nonexistent-template.potx") == "nonexistent-template.potx"
+
+
+class TestManimFlags:
+    """The 'manim:' field holds render flags, a render profile, or both."""
+
+    @staticmethod
+    def _flags(output, manim):
+        def header_field(field, *args, **kwargs):
+            if field == "manim" and manim is not None:
+                return manim
+            raise ny.FileFormatError(1, f"no {field}")
+
+        with patch("lynguine.util.yaml.header_fields", return_value={}):
+            with patch("lynguine.util.yaml.header_field", side_effect=header_field):
+                return flags_for(output, "test")
+
+    def test_flags_string(self):
+        assert self._flags("manim", "--disable_caching") == "--disable_caching"
+        assert self._flags("manim-profile", "--disable_caching") is None
+
+    def test_profile_name(self):
+        assert self._flags("manim", "final") is None
+        assert self._flags("manim-profile", "final") == "final"
+
+    def test_mapping(self):
+        manim = {"profile": "draft", "flags": "-v WARNING"}
+        assert self._flags("manim", manim) == "-v WARNING"
+        assert self._flags("manim-profile", manim) == "draft"
+
+    def test_missing(self):
+        assert self._flags("manim", None) is None
+        assert self._flags("manim-profile", None) is None
@@ -0,0 +1,159 @@
+"""Unit tests for the typesetting cache and keyframes of lamd.util.lamd_manim_helper (Manim is faked)."""
+
+import copy
+import importlib
+import json
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+
+class _Mobject:
+    built = 0
+
+    def __init__(self, source, font_size=36, **kwargs):
+        type(self).built += 1
+        self.source = source
+        self.font_size = font_size
+        self.kwargs = kwargs
+
+    def copy(self):
+        return copy.copy(self)
+
+
+class _VGroup:
+    def __init__(self, *mobjects):
+        self.mobjects = list(mobjects)
+
+    def arrange(self, *args, **kwargs):
+        return self
+
+
+@pytest.fixture
+def manim(monkeypatch, tmp_path):
+    fake = types.ModuleType("manim")
+    fake.MarkupText = type("MarkupText", (_Mobject,), {"built": 0})
+    fake.MathTex = type("MathTex", (_Mobject,), {"built": 0})
+    fake.VGroup = _VGroup
+    fake.DOWN = (0, -1, 0)
+    fake.LEFT = (-1, 0, 0)
+    fake.config = {}
+    monkeypatch.setitem(sys.modules, "manim", fake)
+    monkeypatch.setenv("LAMD_MANIM_CACHE", str(tmp_path / "manim"))
+    return fake
+
+
+@pytest.fixture
+def helper(manim):
+    import lamd.util.lamd_manim_helper as mod
+
+    # A fresh module: no memoised mobjects and no shared cache configured yet
+    return importlib.reload(mod)
+
+
+class TestTypesettingCache:
+    def test_repeated_notation_built_once(self, helper, manim):
+        first = helper.lamd_display_math("e^{i\\pi}")
+        second = helper.lamd_text("$$e^{i\\pi}$$")
+        helper.lamd_display_math("e^{i\\pi}", font_size=60)
+        assert manim.MathTex.built == 2
+        assert first is not second
+        assert second.source == "e^{i\\pi}"
+
+    def test_kwargs_are_part_of_the_key(self, helper, manim):
+        first = helper.lamd_text("Hello", color="RED")
+        second = helper.lamd_text("Hello", color="BLUE")
+        assert manim.MarkupText.built == 2
+        assert len(helper._MEMO) == 2
+        assert (first.kwargs, second.kwargs) == ({"color": "RED"}, {"color": "BLUE"})
+
+    def test_memoised_returns_copies(self, helper, manim):
+        first = helper._memoised(manim.MathTex, "x", 48, {})
+        first.font_size = 10
+        assert helper._memoised(manim.MathTex, "x", 48, {}).font_size == 48
+        assert manim.MathTex.built == 1
+
+    def test_manim_directories_point_at_shared_cache(self, helper, manim, tmp_path):
+        helper.lamd_display_math("x")
+        root = tmp_path / "manim"
+        assert manim.config == {"tex_dir": str(root / "Tex"), "text_dir": str(root / "texts")}
+        assert len(os.listdir(root / "locks")) == 1
+        assert helper._use_shared_cache() == str(root)
+
+    def test_typesetting_lock_is_per_string(self, helper, tmp_path):
+        with helper._typesetting_lock("MathTex", "x"):
+            with helper._typesetting_lock("MathTex", "y"):
+                pass
+        assert len(os.listdir(tmp_path / "manim" / "locks")) == 2
+
+    def test_cache_can_be_turned_off(self, helper, manim, monkeypatch, tmp_path):
+        monkeypatch.setenv("LAMD_MANIM_CACHE", "off")
+        helper.lamd_display_math("x")
+        helper.lamd_display_math("x")
+        assert manim.config == {}
+        assert helper._use_shared_cache() is None
+        assert manim.MathTex.built == 1
+        assert not (tmp_path / "manim").exists()
+
+
+class _Scene:
+    """Records the plays and waits that reach the real Scene."""
+
+    def __init__(self):
+        self.renderer = types.SimpleNamespace(num_plays=0)
+        self.calls = []
+
+    def play(self, *animations, **kwargs):
+        self.calls.append(("play", [type(a).__name__ for a in animations]))
+        self.renderer.num_plays += 1
+
+    def wait(self, duration=1.0):
+        self.calls.append(("wait", duration))
+        self.renderer.num_plays += 1
+
+
+def _animation(name, run_time=1.0):
+    steps = []
+    animation = type(name, (), {"run_time": run_time})()
+    animation._setup_scene = lambda scene: steps.append("setup")
+    animation.begin = lambda: steps.append("begin")
+    animation.finish = lambda: steps.append("finish")
+    animation.clean_up_from_scene = lambda scene: steps.append("clean_up")
+    animation.steps = steps
+    return animation
+
+
+class TestKeyframeMixin:
+    @pytest.fixture
+    def scene(self, helper, manim, monkeypatch, tmp_path):
+        monkeypatch.setattr(manim, "config", types.SimpleNamespace(media_dir=str(tmp_path / "media"), frame_rate=15))
+
+        class Talk(helper.KeyframeMixin, _Scene):
+            pass
+
+        return Talk()
+
+    def test_simple_animations_become_keyframes(self, scene, tmp_path):
+        write = _animation("Write", run_time=2.0)
+        scene.play(write)
+        scene.play(_animation("Create"))
+        scene.play(_animation("FadeIn"), _animation("Transform"), run_time=0.5)
+        assert write.steps == ["setup", "begin", "finish", "clean_up"]
+        assert scene.calls == [("wait", 1 / 15), ("play", ["Create"]), ("wait", 1 / 15)]
+        recorded = json.loads((tmp_path / "media" / "svg" / "Talk" / "keyframes.json").read_text())
+        assert recorded == {
+            "animation_0": {"transition": "wipe", "duration": 2.0},
+            "animation_2": {"transition": "fade", "duration": 0.5},
+        }
+
+    def test_mixed_and_empty_plays_are_played(self, scene, tmp_path):
+        fade = _animation("FadeIn")
+        scene.play(fade, _animation("Create"))
+        scene.play()
+        assert fade.steps == []
+        assert scene.calls == [("play", ["FadeIn", "Create"]), ("play", [])]
+        assert not (tmp_path / "media").exists()
@@ -0,0 +1,140 @@
+"""Unit tests for lamd.latex (incremental LaTeX builds).
+
+pdflatex and bibtex are simulated: the fake engine writes an ``.aux`` with
+the document's citations, and a ``\\bibcite`` line for each once a ``.bbl``
+exists, as pdflatex with natbib does.
+"""
+
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.latex import bibtex_input, build, main  # noqa: E402
+
+
+class FakeTeX:
+    def __init__(self, citations, logs=()):
+        self.citations = citations
+        self.logs = list(logs)
+        self.calls = []
+
+    def __call__(self, command, **kwargs):
+        self.calls.append(command[0] + " " + command[-1])
+        if command[0] == "bibtex":
+            with open(command[-1] + ".bbl", "w") as f:
+                f.write("".join(f"\\bibitem{{{key}}}\n" for key in self.citations))
+            return 0
+        job = os.path.splitext(command[-1])[0]
+        cited = os.path.exists(job + ".bbl")
+        with open(job + ".aux", "w") as f:
+            f.write("\\relax\n")
+            f.writelines(f"\\citation{{{key}}}\n" for key in self.citations)
+            f.writelines(f"\\bibcite{{{key}}}{{1}}\n" for key in self.citations if cited)
+            f.write("\\bibdata{refs}\n\\bibstyle{plain}\n")
+        with open(job + ".log", "w") as f:
+            f.write(self.logs.pop(0) if self.logs else f"Output written on {job}.pdf\n")
+        return 0
+
+
+@pytest.fixture
+def talk(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "talk.notes.tex").write_text("\\documentclass{article}\n")
+    (tmp_path / "refs.bib").write_text("@book{smith20, title={A}}\n")
+    return tmp_path
+
+
+def _build(tex, fake, **kwargs):
+    with patch("lamd.latex.subprocess.call", side_effect=fake):
+        return build(tex, **kwargs)
+
+
+class TestBuild:
+    def test_first_build_runs_bibtex_and_settles(self, talk):
+        fake = FakeTeX(["smith20"])
+        assert _build("talk.notes.tex", fake) == 0
+        assert fake.calls == [
+            "pdflatex talk.notes.tex",
+            "bibtex talk.notes",
+            "pdflatex talk.notes.tex",
+            "pdflatex talk.notes.tex",
+        ]
+
+    def test_unchanged_references_take_one_pass(self, talk):
+        _build("talk.notes.tex", FakeTeX(["smith20"]))
+        fake = FakeTeX(["smith20"])
+        assert _build("talk.notes.tex", fake) == 0
+        assert fake.calls == ["pdflatex talk.notes.tex"]
+
+    def test_new_citation_or_bib_edit_reruns_bibtex(self, talk):
+        _build("talk.notes.tex", FakeTeX(["smith20"]))
+        fake = FakeTeX(["smith20", "jones19"])
+        _build("talk.notes.tex", fake)
+        assert fake.calls.count("bibtex talk.notes") == 1
+
+        (talk / "refs.bib").write_text("@book{smith20, title={B}}\n")
+        fake = FakeTeX(["smith20", "jones19"])
+        _build("talk.notes.tex", fake)
+        assert fake.calls[:2] == ["pdflatex talk.notes.tex", "bibtex talk.notes"]
+
+    def test_paper_uses_its_own_job(self, talk):
+        (talk / "talk.paper.tex").write_text("\\documentclass{article}\n")
+        fake = FakeTeX(["smith20"])
+        _build("talk.paper.tex", fake)
+        assert "bibtex talk.paper" in fake.calls
+        assert not (talk / "talk.notes.bbl").exists()
+
+    def test_log_rerun_request(self, talk):
+        _build("talk.notes.tex", FakeTeX([]))
+        fake = FakeTeX([], logs=["LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.\n"])
+        _build("talk.notes.tex", fake)
+        assert fake.calls == ["pdflatex talk.notes.tex"] * 2
+
+    def test_unresolved_bib_reruns_bibtex_once_per_build(self, talk):
+        (talk / "refs.bib").unlink()
+        for _ in range(2):
+            fake = FakeTeX(["smith20"])
+            with patch("lamd.latex.subprocess.run", side_effect=FileNotFoundError("kpsewhich")):
+                _build("talk.notes.tex", fake)
+            assert fake.calls.count("bibtex talk.notes") == 1
+
+    def test_engine_failure(self, talk, capsys):
+        (talk / "talk.notes.log").write_text("! Undefined control sequence.\nl.3 \\foo\n\n")
+        with patch("lamd.latex.subprocess.call", return_value=1):
+            assert main(["talk.notes.tex", "--shell-escape"]) == 1
+        assert "! Undefined control sequence." in capsys.readouterr().err
+
+
+class TestBibtexInput:
+    def test_no_bibliography(self, talk):
+        (talk / "talk.notes.aux").write_text("\\relax\n\\newlabel{sec}{{1}{1}}\n")
+        assert bibtex_input("talk.notes") is None
+
+    def test_ignores_labels(self, talk):
+        (talk / "talk.notes.aux").write_text("\\citation{a}\n\\bibdata{refs}\n")
+        first = bibtex_input("talk.notes")
+        (talk / "talk.notes.aux").write_text("\\citation{a}\n\\newlabel{sec}{{1}{1}}\n\\bibdata{refs}\n")
+        assert bibtex_input("talk.notes") == first
+
+    def test_bib_found_with_kpsewhich(self, talk):
+        shared = talk / "texmf" / "shared.bib"
+        shared.parent.mkdir()
+        shared.write_text("@book{jones19, title={A}}\n")
+        (talk / "talk.notes.aux").write_text("\\citation{a}\n\\bibdata{refs,shared}\n")
+        found = subprocess.CompletedProcess(["kpsewhich"], 0, stdout=f"{shared}\n")
+        with patch("lamd.latex.subprocess.run", return_value=found) as kpsewhich:
+            first = bibtex_input("talk.notes")
+            shared.write_text("@book{jones19, title={B}}\n")
+            assert bibtex_input("talk.notes") not in (first, "")
+        assert kpsewhich.call_args[0][0] == ["kpsewhich", "shared.bib"]
+
+    def test_unresolved_bib(self, talk):
+        (talk / "talk.notes.aux").write_text("\\citation{a}\n\\bibdata{missing}\n")
+        missing = subprocess.CompletedProcess(["kpsewhich"], 1, stdout="")
+        with patch("lamd.latex.subprocess.run", return_value=missing):
+            assert bibtex_input("talk.notes") == ""
@@ -26,6 +26,7 @@ class TestMakeCV(unittest.TestCase):
         """
         # Set up mocks
         mock_args.return_value.filename = "example_cv.md"
+        mock_args.return_value.jobs = None
         mock_dirname.return_value = "/mock/path"
         mock_exists.return_value = True
         mock_interface = MagicMock()
@@ -65,6 +66,7 @@ class TestMakeCV(unittest.TestCase):
         Test the main function when talk_field succeeds for both fields.
         """
         mock_args.return_value.filename = "example_cv.md"
+        mock_args.return_value.jobs = None
         mock_dirname.return_value = "/mock/path"
         mock_exists.return_value = True
         mock_interface = MagicMock()
@@ -103,6 +105,7 @@ class TestMakeCV(unittest.TestCase):
         Test the main function when a field is not present in the interface.
         """
         mock_args.return_value.filename = "empty_field_cv.md"
+        mock_args.return_value.jobs = None
         mock_dirname.return_value = "/mock/path"
         mock_exists.return_value = True
         mock_interface = MagicMock()
@@ -2,6 +2,7 @@
 Unit tests for the maketalk module.
 """
 
+import argparse
 import os
 import sys
 import tempfile
@@ -12,7 +13,7 @@ import pytest
 # Add the parent directory to the path so we can import the module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from lamd.maketalk import main
+from lamd.maketalk import first_target, main, make_goal
 
 
 class TestMaketalk:
@@ -218,3 +219,44 @@ This is a test paragraph.
 
             # Verify no make commands were run
             mock_system.assert_not_called()
+
+
+def _args(format=None, to=None):
+    return argparse.Namespace(format=format, to=to)
+
+
+class TestMakeGoal:
+    """Test selection of the make goal from --format/--to."""
+
+    def test_all_by_default(self):
+        assert make_goal(_args(), "talk") == "all"
+
+    def test_format_and_to(self):
+        assert make_goal(_args("slides", "html"), "talk") == "talk.slides.html"
+        assert make_goal(_args("notes"), "talk") == "notes"
+        assert make_goal(_args(to="pptx"), "talk") == "pptx"
+
+    def test_manim_ignores_format(self):
+        assert make_goal(_args("slides", "manim-video"), "talk") == "talk.manim-video.mp4"
+        assert make_goal(_args(to="manim-svg"), "talk") == "manim-svg"
+
+
+class TestFirstTarget:
+    """Test selection of the --first priority target."""
+
+    @pytest.fixture(autouse=True)
+    def in_tmp_path(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+    def test_named_choice(self):
+        assert first_target("pdf", "talk") == "talk.notes.pdf"
+
+    def test_auto_defaults_to_slides(self):
+        assert first_target("auto", "talk") == "talk.slides.html"
+
+    def test_auto_picks_most_recently_viewed(self):
+        for name, viewed in (("talk.slides.html", 150), ("talk.notes.html", 200), ("talk.pptx", None)):
+            with open(name, "w"):
+                pass
+            os.utime(name, (viewed or 50, 100))
+        assert first_target("auto", "talk") == "talk.notes.html"
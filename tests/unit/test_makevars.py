@@ -0,0 +1,101 @@
+"""Unit tests for lamd.makevars (cached parse-time make variables)."""
+
+import os
+import shutil
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd import makevars  # noqa: E402
+from lamd.makevars import escape_make, talk_variables, write_vars  # noqa: E402
+
+
+class TestEscapeMake:
+    def test_dollar_and_hash_are_escaped(self):
+        assert escape_make("--css a#b $x") == r"--css a\#b $$x"
+
+    def test_whitespace_is_collapsed(self):
+        assert escape_make("  a\n b  ") == "a b"
+
+
+class TestTalkVariables:
+    @patch("lamd.makevars.flags_for", side_effect=lambda output, base: None if output == "manim" else f"<{output}>")
+    @patch("lamd.makevars.extract_batch")
+    @patch("lamd.makevars.resolve_diagrams_dir", return_value="./diagrams")
+    @patch("lamd.makevars.mdfield.extract_fields_batch")
+    def test_collects_fields_dependencies_and_flags(self, mock_fields, mock_diagrams_dir, mock_batch, mock_flags):
+        fields = {field: "" for _, field in makevars.FIELD_VARIABLES}
+        fields.update({"date": "2024-05-01", "snippetsdir": "../_snippets", "diagramsdir": "./diagrams"})
+        mock_fields.return_value = fields
+        mock_batch.return_value = {
+            "inputs": ["intro.md"],
+            "diagrams": ["./diagrams/a.svg", "./diagrams/b.pdf"],
+            "docxdiagrams": [],
+            "pptxdiagrams": [],
+            "texdiagrams": ["./diagrams/b.pdf"],
+            "rasterimages": [],
+            "all": ["talk.slides.html"],
+        }
+
+        values = talk_variables("talk")
+
+        mock_batch.assert_called_once_with("talk.md", "./diagrams", "../_snippets")
+        assert values["DATE"] == "2024-05-01"
+        assert values["DIAGDEPS"] == "./diagrams/a.svg ./diagrams/b.pdf"
+        assert values["DYNAMIC_DEPS"] == "talk.slides.html"
+        assert values["RASTERDEPS"] == ""
+        assert (values["MANIMDIR_preview"], values["MANIMDIR_final"]) == ("480p15", "1080p30")
+        assert values["FLAGS_PREFIX"] == "<prefix>"
+        assert values["FLAGS_MANIM"] == ""
+        assert values["LAMDVARS_INPUTS"] == "intro.md"
+
+
+class TestWriteVars:
+    def test_creates_directory_and_fragment(self, tmp_path):
+        path = tmp_path / ".lamd" / "talk.vars.mk"
+        write_vars("talk", str(path), {"DATE": "2024-05-01", "DEPS": "intro.md"})
+        lines = path.read_text().splitlines()
+        assert lines[0].startswith("#")
+        assert lines[1:] == ["DATE:=2024-05-01", "DEPS:=intro.md"]
+        assert os.listdir(path.parent) == ["talk.vars.mk"]
+
+    @pytest.mark.skipif(shutil.which("make") is None, reason="make not installed")
+    def test_make_reads_values_back(self, tmp_path):
+        flags = "--css https://example.com/a.css#top --metadata x=$HOME"
+        write_vars("talk", str(tmp_path / "talk.vars.mk"), {"SLIDEFLAGS": flags})
+        (tmp_path / "makefile").write_text("include talk.vars.mk\nshow:\n\t@echo '$(SLIDEFLAGS)'\n")
+        result = subprocess.run(["make", "-s", "show"], cwd=tmp_path, capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == flags
+
+
+@pytest.mark.skipif(shutil.which("make") is None, reason="make not installed")
+class TestManimProfileStamp:
+    """The stamp is rewritten as make reads the makefile, so a dry run sees unchanged scenes as up to date."""
+
+    @pytest.fixture
+    def talk(self, tmp_path):
+        (tmp_path / "talk.md").write_text("# Talk\n")
+        values = {f"MANIMDIR_{name}": directory for name, directory in (("preview", "480p15"), ("final", "1080p30"))}
+        write_vars("talk", str(tmp_path / ".lamd" / "talk.vars.mk"), values)
+        makefiles = os.path.join(os.path.dirname(makevars.__file__), "makefiles")
+        (tmp_path / "makefile").write_text(
+            f"BASE=talk\nMAKEFILESDIR={makefiles}\ninclude $(MAKEFILESDIR)/make-talk-flags.mk\n"
+            "scene.py: $(MANIMPROFILESTAMP)\n\ttouch $@\n"
+        )
+        return tmp_path
+
+    def _make(self, talk, *args):
+        return subprocess.run(["make", "-s", *args], cwd=talk, capture_output=True, text=True).returncode
+
+    def test_stamp_records_profile_and_render_directory(self, talk):
+        assert self._make(talk, "scene.py", "MANIMPROFILE=final") == 0
+        assert (talk / ".lamd" / "talk.manim-profile").read_text() == "final 1080p30\n"
+
+    def test_only_a_new_profile_makes_scenes_stale(self, talk):
+        assert self._make(talk, "scene.py") == 0
+        assert self._make(talk, "-q", "scene.py") == 0
+        assert self._make(talk, "-q", "scene.py", "MANIMPROFILE=final") == 1
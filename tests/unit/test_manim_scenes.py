@@ -0,0 +1,137 @@
+"""Unit tests for lamd.manim_scenes (per-slide Manim scenes rendered on change)."""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.manim_scenes import SCENE_PREFIX, main, render, scene_names, split_scenes  # noqa: E402
+
+HEADER = "from manim import *\nfrom manim_slides import Slide\nfrom _lamd_manim import lamd_text, lamd_display_math\n\n"
+
+
+def _talk(*slides, base="Slide", intro=""):
+    body = intro
+    for title, code in slides:
+        body += (
+            f'        # lamd-slide\n        self.next_slide()\n        self.play(FadeIn(lamd_text(r"""{title}""")))\n{code}'
+        )
+    return HEADER + f"class Talk({base}):\n    def construct(self):\n" + body
+
+
+SLIDE_ONE = ("Introduction", '        self.play(FadeIn(lamd_text(r"""Hello""")))\n')
+SLIDE_TWO = ("Second", "        _fig = SVGMobject('diagrams/gp.svg')\n        self.play(FadeIn(_fig))\n")
+
+
+class TestSplitScenes:
+    def test_one_scene_per_slide(self, tmp_path):
+        source, scenes = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO), str(tmp_path))
+        assert len(scenes) == 2 and all(name.startswith(SCENE_PREFIX) for name in scenes)
+        assert "class Talk" not in source and "self.next_slide()" not in source
+        assert f"class {scenes[0]}(Slide):\n    def construct(self):\n" in source
+        assert source.startswith(HEADER)
+        compile(source, "talk.manim.py", "exec")
+
+    def test_names_change_only_for_edited_slides(self, tmp_path):
+        _, before = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO), str(tmp_path))
+        _, after = split_scenes(_talk(SLIDE_ONE, ("Second, edited", SLIDE_TWO[1])), str(tmp_path))
+        assert after[0] == before[0] and after[1] != before[1]
+        _, moved = split_scenes(_talk(("New", ""), SLIDE_ONE, SLIDE_TWO), str(tmp_path))
+        assert moved[1:] == before
+
+    def test_loaded_diagrams_are_hashed(self, tmp_path):
+        (tmp_path / "diagrams").mkdir()
+        (tmp_path / "diagrams" / "gp.svg").write_text("<svg>v1</svg>")
+        _, before = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO), str(tmp_path))
+        (tmp_path / "diagrams" / "gp.svg").write_text("<svg>v2</svg>")
+        _, after = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO), str(tmp_path))
+        assert after[0] == before[0] and after[1] != before[1]
+
+    def test_identical_slides_share_a_scene(self, tmp_path):
+        source, scenes = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO, SLIDE_ONE), str(tmp_path))
+        assert scenes[0] == scenes[2]
+        assert source.count(f"class {scenes[0]}(") == 1
+
+    def test_content_before_first_slide_and_empty_talk(self, tmp_path):
+        intro = '        self.play(FadeIn(lamd_text(r"""Title""")))\n'
+        _, scenes = split_scenes(_talk(SLIDE_ONE, base="Scene", intro=intro), str(tmp_path))
+        assert len(scenes) == 2
+        source, scenes = split_scenes(_talk(base="Scene"), str(tmp_path))
+        assert len(scenes) == 1 and "        pass\n" in source
+
+    def test_requires_talk_class(self):
+        with pytest.raises(ValueError):
+            split_scenes("print('no talk')\n")
+
+
+class TestRender:
+    @pytest.fixture
+    def talk(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("LAMD_RESOURCES", json.dumps({"manim": {"jobs": 2, "memory": None}}))
+        source, scenes = split_scenes(_talk(SLIDE_ONE, SLIDE_TWO, SLIDE_ONE), str(tmp_path))
+        (tmp_path / "talk.manim.py").write_text(source)
+        return scenes
+
+    @staticmethod
+    def _write_outputs(command, check):
+        scene = command[-1]
+        os.makedirs("slides", exist_ok=True)
+        with open(os.path.join("slides", f"{scene}.json"), "w") as f:
+            json.dump({}, f)
+        animation = os.path.join(command[command.index("--media_dir") + 1], "svg", scene, "animation_0")
+        os.makedirs(animation)
+        with open(os.path.join(animation, "animation.json"), "w") as f:
+            json.dump({}, f)
+
+    def test_scene_names_read_without_import(self, talk):
+        assert scene_names("talk.manim.py") == talk
+
+    def test_renders_only_stale_scenes(self, talk):
+        command = ["manim-slides", "render", "-ql"]
+        with patch("lamd.manim_scenes.subprocess.run", side_effect=self._write_outputs) as run:
+            assert sorted(render("talk.manim.py", "slides", command)) == sorted(talk[:2])
+            assert render("talk.manim.py", "slides", command) == {}
+            os.remove(os.path.join("slides", f"{talk[1]}.json"))
+            assert list(render("talk.manim.py", "slides", command)) == [talk[1]]
+            assert len(render("talk.manim.py", "slides", ["manim-slides", "render", "-qh"])) == 2
+        args = run.call_args_list[0].args[0]
+        assert args[:3] == command and args[-2] == "talk.manim.py" and args[-1] in talk
+
+    def test_svg_output_collected_from_private_media_dirs(self, talk):
+        with patch("lamd.manim_scenes.subprocess.run", side_effect=self._write_outputs) as run:
+            timings = render("talk.manim.py", "svg", ["manim", "--renderer", "svg"], jobs=2)
+        assert set(timings) == set(talk)
+        media_dirs = {call.args[0][call.args[0].index("--media_dir") + 1] for call in run.call_args_list}
+        assert len(media_dirs) == 2 and not any(os.path.exists(d) for d in media_dirs)
+        for scene in talk:
+            assert os.path.isfile(os.path.join("media", "svg", scene, "animation_0", "animation.json"))
+        state = json.load(open(os.path.join(".lamd", "manim-scenes.svg.json")))
+        assert state[talk[0]]["command"] == "manim --renderer svg" and "seconds" in state[talk[0]]
+
+    def test_failed_scene_does_not_stop_the_others(self, talk, capsys):
+        def fail_second(command, check):
+            if command[-1] == talk[1]:
+                raise subprocess.CalledProcessError(2, command)
+            self._write_outputs(command, check)
+
+        with patch("lamd.manim_scenes.subprocess.run", side_effect=fail_second):
+            with pytest.raises(subprocess.CalledProcessError):
+                render("talk.manim.py", "slides", ["manim-slides", "render"])
+        assert f"{talk[1]} failed" in capsys.readouterr().err
+        with patch("lamd.manim_scenes.subprocess.run", side_effect=self._write_outputs):
+            assert list(render("talk.manim.py", "slides", ["manim-slides", "render"])) == [talk[1]]
+
+    def test_cli(self, talk, capsys):
+        assert main(["list", "talk.manim.py", "--prefix", "media/svg/"]) == 0
+        assert capsys.readouterr().out.split() == ["media/svg/" + name for name in talk]
+        with patch("lamd.manim_scenes.subprocess.run", side_effect=self._write_outputs):
+            assert main(["render", "talk.manim.py", "-v", "--", "manim-slides", "render"]) == 0
+        err = capsys.readouterr().err
+        assert "rendering 2 of 2 scenes" in err and f"{talk[0]} rendered in" in err
+        assert main(["list", "missing.py"]) == 1
@@ -10,7 +10,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../.
 
 import frontmatter as fm
 
-from lamd.mdpp import main, process_content, setup_gpp_arguments
+from lamd.mdpp import main, manim_header, process_content, setup_gpp_arguments
 from lamd.validation import check_dependency, check_version
 
 # Set LAMD_MACROS environment variable for testing
@@ -268,6 +268,41 @@ def test_format_flags():
     assert "-DMAGICCODE=1" in gpp_args
 
 
+def test_manim_header_render_profiles():
+    """Render profiles are applied after the header's own config, ahead of the scene class."""
+    plain = manim_header(argparse.Namespace(to="manim", keyframes=False, render_profile=None))
+    assert "config.quality" not in plain
+
+    final = manim_header(argparse.Namespace(to="manim-video", keyframes=False, render_profile="final"))
+    assert 'config.quality = "high_quality"\nconfig.frame_rate = 30\n' in final
+    assert final.index("config.disable_caching = True") < final.index("class Talk(Scene):")
+
+    draft = manim_header(argparse.Namespace(to="manim-svg", keyframes=False, render_profile="draft"))
+    assert draft.index("config.frame_rate = 15") < draft.index("config.frame_rate = 10")
+    assert "class Talk(KeyframeScene):" in draft
+    compile(draft + "        pass\n", "talk.manim-svg.py", "exec")
+
+
+def test_manim_header_keyframes():
+    """--keyframes swaps in the KeyframeMixin scene for manim-svg only."""
+    svg = manim_header(argparse.Namespace(to="manim-svg", keyframes=False, render_profile=None))
+    assert "KeyframeMixin" not in svg
+    assert "class Talk(Scene):" in svg
+
+    keyframes = manim_header(argparse.Namespace(to="manim-svg", keyframes=True, render_profile=None))
+    assert "from _lamd_manim import lamd_text, lamd_display_math, KeyframeMixin\n" in keyframes
+    assert "class KeyframeScene(KeyframeMixin, Scene):" in keyframes
+    assert keyframes.endswith("class Talk(KeyframeScene):\n    def construct(self):\n")
+    compile(keyframes + "        pass\n", "talk.manim-svg.py", "exec")
+
+    # A profile without keyframes does not turn the flag off
+    preview = manim_header(argparse.Namespace(to="manim-svg", keyframes=True, render_profile="preview"))
+    assert "class Talk(KeyframeScene):" in preview
+
+    for to in ("manim", "manim-video"):
+        assert "KeyframeMixin" not in manim_header(argparse.Namespace(to=to, keyframes=True, render_profile=None))
+
+
 class TestFrontmatterFileMode:
     """Regression tests for the gpp.markdown temporary-file write path.
 
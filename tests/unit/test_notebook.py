@@ -0,0 +1,135 @@
+"""Unit tests for lamd.notebook (direct nbformat output from mdpp ipynb markdown)."""
+
+import json
+import os
+import sys
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.notebook import build_notebook, header_cells, main, split_cells  # noqa: E402
+
+TALK = """---
+title: Gaussian Processes
+author:
+- given: Neil D.
+  family: Lawrence
+  url: http://inverseprobability.com
+  institute: University of Cambridge
+date: 2024-05-01
+abstract: >
+  An introduction.
+---
+
+::: {.cell .markdown}
+## Setup
+
+:::: {.centered}
+See [@smith20].
+::::
+:::
+
+::: {.cell .code}
+```{.python}
+import numpy as np
+
+x = np.zeros(3)  # ::: not a div
+```
+:::
+
+Loose text between cells.
+"""
+
+
+class TestSplitCells:
+    def test_cells_from_divs(self):
+        body = TALK.split("---\n", 2)[2]
+        assert split_cells(body) == [
+            ("markdown", "## Setup\n\nSee [@smith20]."),
+            ("code", "import numpy as np\n\nx = np.zeros(3)  # ::: not a div"),
+            ("markdown", "Loose text between cells."),
+        ]
+
+    def test_fenced_div_markers_inside_code_are_kept(self):
+        body = "::: {.cell .markdown}\n```\n:::\n```\n:::\n"
+        assert split_cells(body) == [("markdown", "```\n:::\n```")]
+
+    def test_empty_cells_are_dropped(self):
+        assert split_cells("::: {.cell .markdown}\n\n:::\n::: {.cell .code}\n:::\n") == []
+
+
+class TestHeaderCells:
+    def test_title_authors_date_and_abstract(self):
+        notebook = build_notebook(TALK)
+        assert header_cells({}) == []
+        assert "".join(notebook["cells"][0]["source"]) == (
+            "# Gaussian Processes\n\n"
+            "### [Neil D. Lawrence](http://inverseprobability.com), University of Cambridge\n\n"
+            "### 2024-05-01"
+        )
+        assert "".join(notebook["cells"][1]["source"]) == "**Abstract**: An introduction."
+
+
+class TestBuildNotebook:
+    def test_nbformat_structure(self):
+        notebook = build_notebook(TALK)
+        assert notebook["nbformat"] == 4 and notebook["nbformat_minor"] == 5
+        code = notebook["cells"][3]
+        assert code["cell_type"] == "code"
+        assert code["outputs"] == [] and code["execution_count"] is None
+        assert code["source"][0] == "import numpy as np\n"
+        ids = [cell["id"] for cell in notebook["cells"]]
+        assert len(set(ids)) == len(ids)
+
+    def test_pandoc_not_run_without_citations(self):
+        with patch("lamd.notebook.pandoc_server.run") as run:
+            build_notebook("No citations here, mail me@example.org.\n", ["--citeproc"])
+        run.assert_not_called()
+
+    def test_decorator_is_not_a_citation(self, tmp_path):
+        refs = tmp_path / "talk.bib.json"
+        refs.write_text(json.dumps([{"id": "smith20"}]))
+        decorated = "::: {.cell .code}\n```{.python}\n@property\ndef mean(self):\n    return 0\n```\n:::\n"
+
+        def pandoc(argv):
+            with open(argv[argv.index("--output") + 1], "w") as f:
+                f.write("See (Smith, 2020).\n")
+            return 0
+
+        with patch("lamd.notebook.pandoc_server.run", side_effect=pandoc) as run:
+            notebook = build_notebook(decorated, ["--citeproc", f"--bibliography={refs}"])
+            assert "".join(notebook["cells"][0]["source"]).startswith("@property\n")
+            run.assert_not_called()
+            build_notebook(decorated + "\nSee [@smith20].\n", ["--citeproc", "--bibliography", str(refs)])
+            run.assert_called_once()
+
+    def test_citations_rendered_in_one_pandoc_run(self):
+        def pandoc(argv):
+            output = argv[argv.index("--output") + 1]
+            with open(output, "w") as f:
+                f.write("::: {.cell .markdown}\nSee (Smith, 2020).\n:::\n\n::: {#refs .references}\nSmith (2020)\n:::\n")
+            return 0
+
+        with patch("lamd.notebook.pandoc_server.run", side_effect=pandoc) as run:
+            notebook = build_notebook(TALK, ["--citeproc", "--csl=style.csl"])
+        assert run.call_count == 1
+        assert "--csl=style.csl" in run.call_args[0][0]
+        sources = ["".join(cell["source"]) for cell in notebook["cells"][2:]]
+        assert sources == ["See (Smith, 2020).", "Smith (2020)"]
+
+
+class TestMain:
+    def test_writes_notebook(self, tmp_path):
+        source = tmp_path / "talk.notes.ipynb.markdown"
+        source.write_text(TALK)
+        output = tmp_path / "talk.ipynb"
+        assert main([str(source), "--out", str(output)]) == 0
+        notebook = json.loads(output.read_text())
+        assert [cell["cell_type"] for cell in notebook["cells"]] == ["markdown", "markdown", "markdown", "code", "markdown"]
+
+    def test_pandoc_failure(self, tmp_path):
+        source = tmp_path / "talk.notes.ipynb.markdown"
+        source.write_text(TALK)
+        with patch("lamd.notebook.pandoc_server.run", return_value=64):
+            assert main([str(source), "-o", str(tmp_path / "talk.ipynb"), "--citeproc"]) == 1
+        assert not (tmp_path / "talk.ipynb").exists()
@@ -0,0 +1,125 @@
+"""Unit tests for lamd.pandoc_server (pooled pandoc execution).
+
+A small HTTP server stands in for ``pandoc server``; pandoc itself is not run.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd import pandoc_server  # noqa: E402
+from lamd.pandoc_server import Unsupported, build_request, run  # noqa: E402
+
+
+@pytest.fixture
+def talk_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "talk.slides.html.markdown").write_text("# Slide\n\nSee [@smith20].\n")
+    (tmp_path / "pandoc-revealjs-template.revealjs").write_text("$body$\n")
+    (tmp_path / "style.csl").write_text("<style/>\n")
+    (tmp_path / "refs.json").write_text("[]\n")
+    return tmp_path
+
+
+class TestBuildRequest:
+    def test_slides_rule(self, talk_dir):
+        argv = (
+            "--template pandoc-revealjs-template -s --citeproc --csl=style.csl --bibliography=refs.json "
+            "--mathjax=https://cdn/mathjax.js --slide-level 2 --variable theme=black --css a.css "
+            "-t revealjs -o talk.slides.html talk.slides.html.markdown"
+        ).split()
+        request, output = build_request(argv)
+        assert output == "talk.slides.html"
+        assert request["to"] == "revealjs"
+        assert request["from"] == "markdown"
+        assert request["template"] == "$body$\n"
+        assert request["standalone"] is True and request["citeproc"] is True
+        assert request["slide-level"] == 2
+        assert request["variables"] == {"theme": "black"}
+        assert request["css"] == ["a.css"]
+        assert request["html-math-method"] == {"method": "mathjax", "url": "https://cdn/mathjax.js"}
+        assert set(request["files"]) == {"style.csl", "refs.json"}
+        assert request["text"].startswith("# Slide")
+
+    def test_format_from_output_extension_and_metadata(self, talk_dir):
+        request, _ = build_request(
+            ["--metadata", "week=3", "-M", "draft=true", "--out", "x.html", "talk.slides.html.markdown"]
+        )
+        assert request["to"] == "html"
+        assert request["metadata"] == {"week": "3", "draft": True}
+
+    @pytest.mark.parametrize(
+        "argv",
+        [
+            ["-t", "pptx", "-o", "talk.pptx", "talk.slides.html.markdown"],
+            ["--resource-path", ".", "-o", "talk.html", "talk.slides.html.markdown"],
+            ["-o", "talk.html", "a.markdown", "b.markdown"],
+        ],
+    )
+    def test_unsupported_conversions(self, talk_dir, argv):
+        with pytest.raises(Unsupported):
+            build_request(argv)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests: list = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        reply = json.dumps({"output": f"<{body['to']}>", "base64": False, "messages": []}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestRun:
+    @pytest.fixture
+    def server(self):
+        _Handler.requests = []
+        httpd = HTTPServer(("127.0.0.1", 0), _Handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{httpd.server_address[1]}"
+        httpd.shutdown()
+        httpd.server_close()
+
+    def test_conversion_goes_to_server(self, talk_dir, server):
+        with patch("lamd.pandoc_server.subprocess.call") as call:
+            assert run(["-t", "html", "-o", "out.html", "talk.slides.html.markdown"], url=server) == 0
+        call.assert_not_called()
+        assert (talk_dir / "out.html").read_text() == "<html>"
+        assert len(_Handler.requests) == 1
+
+    def test_unsupported_runs_pandoc(self, talk_dir, server):
+        with patch("lamd.pandoc_server.subprocess.call", return_value=0) as call:
+            assert run(["-t", "docx", "-o", "out.docx", "talk.slides.html.markdown"], url=server) == 0
+        call.assert_called_once_with(["pandoc", "-t", "docx", "-o", "out.docx", "talk.slides.html.markdown"])
+        assert _Handler.requests == []
+
+    def test_unreachable_server_runs_pandoc(self, talk_dir):
+        with patch("lamd.pandoc_server.subprocess.call", return_value=0) as call:
+            assert run(["-o", "out.html", "talk.slides.html.markdown"], url="http://127.0.0.1:9") == 0
+        call.assert_called_once()
+
+    def test_client_script_does_not_import_lamd(self, talk_dir, server):
+        """The makefiles run pandoc_server.py as a script, so each conversion skips loading lamd and lynguine."""
+        command = [sys.executable, "-P", "-X", "importtime", pandoc_server.__file__, "-t", "html", "-o", "out.html"]
+        env = dict(os.environ, LAMD_PANDOC_SERVER=server)
+        result = subprocess.run(command + ["talk.slides.html.markdown"], env=env, capture_output=True, text=True, check=True)
+        assert (talk_dir / "out.html").read_text() == "<html>"
+        imported = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in result.stderr.splitlines()}
+        assert "lamd" not in imported and "lynguine" not in imported
@@ -0,0 +1,76 @@
+"""Unit tests for lamd.plan and the timing history in lamd.profiler."""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.plan import format_plan, format_plan_json, parse_make_debug  # noqa: E402
+from lamd.profiler import (  # noqa: E402
+    HISTORY_SAMPLES,
+    BuildProfiler,
+    estimate_duration,
+    load_history,
+)
+
+_DEBUG_OUTPUT = """\
+Updating goal targets....
+Considering target file 'all'.
+ File 'all' does not exist.
+   Prerequisite 'talk.md' is older than target 'talk.slides.html'.
+   Prerequisite 'snippet.md' is newer than target 'talk.slides.html'.
+  Must remake target 'talk.slides.html'.
+     File 'talk.notes.tex' does not exist.
+    Must remake target 'talk.notes.tex'.
+   Prerequisite 'talk.notes.tex' is newer than target 'talk.notes.pdf'.
+  Must remake target 'talk.notes.pdf'.
+Must remake target 'all'.
+"""
+
+
+class TestParseMakeDebug:
+    def test_targets_and_reasons_in_build_order(self):
+        plan = parse_make_debug(_DEBUG_OUTPUT)
+        assert [e["target"] for e in plan] == ["talk.slides.html", "talk.notes.tex", "talk.notes.pdf"]
+        assert plan[0]["reasons"] == ["snippet.md changed"]
+        assert plan[1]["reasons"] == ["output missing"]
+
+    def test_phony_goals_are_skipped(self):
+        assert parse_make_debug("Must remake target 'check-bibdir'.\nMust remake target 'all'.\n") == []
+
+    def test_old_make_quoting(self):
+        plan = parse_make_debug("File `talk.pptx' does not exist.\nMust remake target `talk.pptx'.\n")
+        assert plan == [{"target": "talk.pptx", "reasons": ["output missing"]}]
+
+    def test_format_plan_totals_known_estimates(self):
+        plan = [
+            {"target": "a.html", "reasons": ["a.md changed"], "estimate": 2.0},
+            {"target": "a.pdf", "reasons": ["output missing"], "estimate": None},
+        ]
+        text = format_plan(plan, "all")
+        assert "Estimated total: 2.0s" in text
+        assert "+1 targets without history" in text
+        assert json.loads(format_plan_json(plan, "all"))["estimate"] == 2.0
+        assert "Nothing to rebuild" in format_plan([], "all")
+
+
+class TestTimingHistory:
+    def test_save_history_keeps_recent_samples(self, tmp_path):
+        history_file = str(tmp_path / "history.json")
+        for run in range(HISTORY_SAMPLES + 2):
+            profiler = BuildProfiler(enabled=True)
+            profiler.target_profile_file = str(tmp_path / f"targets{run}.log")
+            with open(profiler.target_profile_file, "w") as f:
+                f.write(f"1.0|talk.slides.html\n{run}|talk.slides.html\n")
+            profiler.save_history(history_file)
+
+        history = load_history(history_file)
+        samples = history["talk.slides.html"]["samples"]
+        assert len(samples) == HISTORY_SAMPLES
+        assert samples[-1] == 1.0 + HISTORY_SAMPLES + 1
+        assert estimate_duration(history, "talk.slides.html") == 5.0
+        assert estimate_duration(history, "talk.pptx") is None
+
+    def test_missing_history_is_empty(self, tmp_path):
+        assert load_history(str(tmp_path / "missing.json")) == {}
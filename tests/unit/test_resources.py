@@ -0,0 +1,92 @@
+"""Unit tests for lamd.resources (resource-class concurrency limits)."""
+
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd import resources  # noqa: E402
+from lamd.resources import (  # noqa: E402
+    RESOURCE_CLASSES,
+    ResourceSlot,
+    makefile_export,
+    parse_memory,
+    resource_limits,
+    run,
+)
+
+
+class TestResourceLimits:
+    def test_parse_memory(self):
+        assert parse_memory(None) is None
+        assert parse_memory(1024) == 1024
+        assert parse_memory("512M") == 512 * 1024**2
+        assert parse_memory("4G") == 4 * 1024**3
+        assert parse_memory("1.5gb") == int(1.5 * 1024**3)
+
+    def test_defaults_cover_all_classes(self):
+        limits = resource_limits(None)
+        assert set(limits) == set(RESOURCE_CLASSES)
+        assert limits["manim"]["jobs"] == 1
+
+    def test_user_config_overrides_and_budget_caps_jobs(self):
+        limits = resource_limits({"manim": {"jobs": 8, "memory": "3G", "budget": "7G"}, "ffmpeg": {"jobs": 2}})
+        assert limits["manim"]["jobs"] == 2
+        assert limits["manim"]["memory"] == 3 * 1024**3
+        assert limits["ffmpeg"]["jobs"] == 2
+
+    def test_rejects_non_mapping_class(self):
+        with pytest.raises(ValueError):
+            resource_limits({"manim": 2})
+
+    def test_makefile_export_is_single_line_json(self):
+        export, runner = makefile_export({"resources": {"latex": {"jobs": 3}}}).splitlines()
+        assert export.startswith("export LAMD_RESOURCES=")
+        assert json.loads(export.split("=", 1)[1])["latex"]["jobs"] == 3
+        assert runner == f"LAMDRUN={sys.executable} -P {resources.__file__}"
+
+    def test_serial_build_without_resources_runs_tools_directly(self):
+        assert makefile_export({}) == ""
+        assert makefile_export({}, jobs=1) == ""
+        assert "LAMDRUN=" in makefile_export({}, jobs=4)
+
+
+class TestResourceSlot:
+    @pytest.fixture(autouse=True)
+    def slots_in_tmp_path(self, tmp_path):
+        self.lock_dir = str(tmp_path)
+        with patch("lamd.resources.lock_dir", return_value=self.lock_dir):
+            yield
+
+    def test_slots_are_exclusive(self):
+        limits = {"latex": {"jobs": 2, "memory": None}}
+        with ResourceSlot("latex", limits), ResourceSlot("latex", limits):
+            assert not ResourceSlot("latex", limits)._try_acquire()
+        with ResourceSlot("latex", limits) as slot:
+            assert slot.handle is not None
+
+    def test_memory_reservation_waits_only_when_others_run(self):
+        limits = {"manim": {"jobs": 2, "memory": 8 * 1024**3}}
+        with patch("lamd.resources.available_memory", return_value=1024**3):
+            with ResourceSlot("manim", limits):
+                assert not ResourceSlot("manim", limits)._try_acquire()
+
+    def test_run_returns_exit_code(self):
+        rc = run("pandoc", ["sh", "-c", "exit 3"], limits={"pandoc": {"jobs": 1, "memory": None}})
+        assert rc == 3
+        assert os.path.exists(os.path.join(self.lock_dir, "pandoc.0.lock"))
+
+
+def test_runner_script_does_not_import_lamd():
+    """The makefiles run resources.py as a script, so each tool call skips loading lamd and lynguine."""
+    env = dict(os.environ, LAMD_RESOURCES=json.dumps({"latex": {"jobs": 1, "memory": None}}))
+    command = [sys.executable, "-P", "-X", "importtime", resources.__file__, "--show"]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout)["latex"]["jobs"] == 1
+    imported = {line.rsplit("|", 1)[-1].strip().split(".")[0] for line in result.stderr.splitlines()}
+    assert "lamd" not in imported and "lynguine" not in imported
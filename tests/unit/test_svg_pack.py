@@ -0,0 +1,278 @@
+"""Unit tests for lamd.util.svg_pack (packed manim-svg frames) and the HTML that plays them.
+
+Keyframe animations, played with CSS transitions instead, are covered here too.
+
+Synthetic animation directories stand in for ``manim --renderer svg`` output;
+no manim installation is required.
+"""
+
+import base64
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.util import svg_pack, svg_to_html  # noqa: E402
+from lamd.util.svg_pack import apply_delta, pack_animation  # noqa: E402
+from lamd.util.svg_to_html import (  # noqa: E402
+    animation_summary,
+    find_animations,
+    generate_html,
+    keyframe_entries,
+    write_manifest,
+)
+
+HOLD = '<svg xmlns="http://www.w3.org/2000/svg"><text x="10">Title</text><rect width="{w}"/></svg>'
+
+# A fade over five frames, then a 40-frame hold, then the first frame again
+FRAMES = [HOLD.format(w=w) for w in range(5)] + [HOLD.format(w=5)] * 40 + [HOLD.format(w=0)]
+
+
+def _anim_dir(root, frames, index=0):
+    """Create ``animation_<index>/`` under *root* holding *frames* as frame_NNNN.svg files."""
+    anim = root / f"animation_{index}"
+    anim.mkdir(parents=True, exist_ok=True)
+    (anim / "animation.json").write_text(json.dumps({"fps": 15, "frame_count": len(frames), "width": 1920, "height": 1080}))
+    for i, frame in enumerate(frames):
+        (anim / f"frame_{i:04d}.svg").write_text(frame)
+    return anim
+
+
+def _unpack(anim):
+    """Rebuild the full frame sequence from a packed animation, as the player does."""
+    manifest = json.loads((anim / "pack.json").read_text())
+    entries = json.loads(gzip.decompress((anim / manifest["archive"]).read_bytes()))
+    distinct, previous = [], ""
+    for entry in entries:
+        previous = apply_delta(previous, entry)
+        distinct.append(previous)
+    return [distinct[index] for index, count in manifest["sequence"] for _ in range(count)]
+
+
+def _unpacked_root(tmp_path):
+    """A second animation root whose single animation is left unpacked."""
+    root = tmp_path / "media" / "svg" / "Other"
+    _anim_dir(root, [HOLD.format(w=w) for w in range(4)])
+    return root
+
+
+def _embedded(html):
+    """Return the text of the script element ``--bundle`` embeds (the player's own comment names it too)."""
+    start = html.rindex('id="lamd-svg-bundle">') + len('id="lamd-svg-bundle">')
+    return html[start : html.index("</script>", start)]
+
+
+def _bundle(html):
+    return json.loads(_embedded(html))
+
+
+@pytest.fixture
+def keyframe_talk(tmp_path):
+    """Three one-frame animations, the first two recorded as keyframes."""
+    root = tmp_path / "media" / "svg" / "Talk"
+    for index in range(3):
+        _anim_dir(root, [HOLD.format(w=index)], index)
+    keyframes = {
+        "animation_0": {"transition": "wipe", "duration": 1.0},
+        "animation_1": {"transition": "fade", "duration": 0.5},
+    }
+    (root / "keyframes.json").write_text(json.dumps(keyframes))
+    return root, tmp_path / "talk.html"
+
+
+@pytest.fixture
+def talk(tmp_path):
+    """A talk's animation root with one three-frame hold, and where its HTML goes."""
+    root = tmp_path / "media" / "svg" / "Talk"
+    _anim_dir(root, [HOLD.format(w=1)] * 3)
+    return root, tmp_path / "talk.html"
+
+
+class TestPackAnimation:
+    def test_runs_collapse_and_frames_dedupe(self, tmp_path):
+        anim = _anim_dir(tmp_path, FRAMES)
+        manifest = pack_animation(anim)
+        assert manifest["frame_count"] == 46
+        assert manifest["unique"] == 6
+        assert manifest["sequence"][-2:] == [[5, 40], [0, 1]]
+        assert manifest["duration"] == pytest.approx(46 / 15, abs=0.01)
+        assert _unpack(anim) == FRAMES
+
+    def test_delta_frames_round_trip(self, tmp_path):
+        anim = _anim_dir(tmp_path, FRAMES)
+        manifest = pack_animation(anim, use_delta=True, keyframe_interval=4)
+        entries = json.loads(gzip.decompress((anim / "frames.json.gz").read_bytes()))
+        assert isinstance(entries[0], str) and isinstance(entries[4], str)
+        assert isinstance(entries[1], list)
+        assert manifest["bytes"] == (anim / "frames.json.gz").stat().st_size
+        assert _unpack(anim) == FRAMES
+
+    def test_up_to_date_pack_is_kept_and_prune_removes_frames(self, tmp_path):
+        anim = _anim_dir(tmp_path, FRAMES)
+        assert pack_animation(anim, prune=True) is not None
+        assert list(anim.glob("*.svg")) == []
+        assert pack_animation(anim) is None
+        assert _unpack(anim) == FRAMES
+
+
+class TestPackedHtml:
+    def test_cli_packs_and_html_uses_player(self, talk):
+        root, output = talk
+        assert svg_pack.main([str(root), "--delta"]) == 0
+        generate_html(root, output, js_src=output.parent / "missing.js")
+        html = output.read_text()
+        assert 'data-lamd-svg="media/svg/Talk/animation_0"' in html
+        assert '<script src="lamd-svg-player.js"></script>' in html
+        assert "plugins: [LamdSVG]" in html
+        assert "manim-svg.js" not in html
+        assert (output.parent / "lamd-svg-player.js").is_file()
+
+
+class TestManifest:
+    def test_summaries_of_packed_and_plain_animations(self, talk, tmp_path):
+        root, output = talk
+        packed = root / "animation_0"
+        pack_animation(packed)
+        plain = _unpacked_root(tmp_path) / "animation_0"
+        summary = animation_summary(packed, output)
+        assert summary["path"] == "media/svg/Talk/animation_0"
+        assert summary["packed"] is True
+        assert (summary["unique"], summary["sequence"], summary["archive"]) == (1, [[0, 3]], "frames.json.gz")
+        assert summary["bytes"] == (packed / "frames.json.gz").stat().st_size
+        summary = animation_summary(plain, output)
+        assert summary["packed"] is False
+        assert (summary["frame_count"], summary["duration"]) == (4, round(4 / 15, 3))
+        assert summary["bytes"] == sum(f.stat().st_size for f in plain.glob("*.svg"))
+
+    def test_write_manifest_totals(self, talk, tmp_path):
+        root, output = talk
+        pack_animation(root / "animation_0")
+        anims = [root / "animation_0", _unpacked_root(tmp_path) / "animation_0"]
+        path = write_manifest(anims, output)
+        assert path == tmp_path / "talk.json"
+        manifest = json.loads(path.read_text())
+        packed, other = manifest["animations"]
+        assert manifest["frame_count"] == 7
+        assert manifest["bytes"] == packed["bytes"] + other["bytes"]
+        assert manifest["duration"] == round(packed["duration"] + other["duration"], 3)
+
+    def test_html_points_player_at_manifest(self, talk, tmp_path):
+        root, output = talk
+        pack_animation(root / "animation_0")
+        other = _unpacked_root(tmp_path)
+        js = tmp_path / "js" / "manim-svg.js"
+        js.parent.mkdir()
+        js.write_text("var ManimSVG = {};")
+        generate_html([root, other], output, js_src=js, prefetch=2)
+        html = output.read_text()
+        assert 'lamdSvg: { manifest: "talk.json", prefetch: 2 }' in html
+        assert "plugins: [LamdSVG, ManimSVG]" in html
+        assert [a["path"] for a in json.loads((tmp_path / "talk.json").read_text())["animations"]] == [
+            "media/svg/Talk/animation_0",
+            "media/svg/Other/animation_0",
+        ]
+
+
+class TestBundle:
+    def test_bundle_embeds_player_and_frames(self, talk, tmp_path):
+        root, output = talk
+        assert svg_to_html.main([str(root), str(output), "--bundle"]) == 0
+        html = output.read_text()
+        assert "var LamdSVG" in html
+        assert "plugins: [LamdSVG]" in html
+        assert '<script src="lamd-svg-player.js"' not in html
+        assert not (tmp_path / "lamd-svg-player.js").exists()
+        assert not (tmp_path / "talk.json").exists()
+        (entry,) = _bundle(html)["animations"]
+        assert entry["path"] == "media/svg/Talk/animation_0"
+        assert entry["sequence"] == [[0, 3]]
+        assert json.loads(gzip.decompress(base64.b64decode(entry["data"]))) == [HOLD.format(w=1)]
+
+    def test_embedded_json_cannot_close_the_script(self, tmp_path):
+        root = tmp_path / "media" / "svg" / "Talk<"
+        _anim_dir(root, [HOLD.format(w=1)])
+        output = tmp_path / "talk.html"
+        generate_html(root, output, bundle=True)
+        html = output.read_text()
+        assert "</" not in _embedded(html)
+        assert "Talk<\\/animation_0" in _embedded(html)
+        (entry,) = _bundle(html)["animations"]
+        assert entry["path"] == "media/svg/Talk</animation_0"
+
+    def test_keyframe_only_bundle(self, keyframe_talk, tmp_path):
+        root, output = keyframe_talk
+        (root / "animation_2" / "animation.json").unlink()
+        generate_html(root, output, js_src=tmp_path / "missing.js", bundle=True)
+        html = output.read_text()
+        assert _bundle(html)["animations"] == []
+        # the first keyframe wipes in its frame, the second fades from the first's to its own
+        assert html.count('src="data:image/svg+xml;base64,') == 3
+        assert 'data-lamd-svg="media' not in html and 'data-manim-svg="media' not in html
+        assert not (root / "animation_0" / "pack.json").exists()
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["media", "talk.html"]
+
+
+class TestSceneRoots:
+    def test_cli_stitches_scene_roots_in_order(self, talk, tmp_path):
+        root, output = talk
+        second = tmp_path / "media" / "svg" / "Second"
+        _anim_dir(second, [HOLD.format(w=2)], 0)
+        _anim_dir(second, [HOLD.format(w=3)], 1)
+        js = tmp_path / "js" / "manim-svg.js"
+        js.parent.mkdir()
+        js.write_text("var ManimSVG = {};")
+        assert svg_to_html.main([str(second), str(root), str(output), "--js-src", str(js)]) == 0
+        html = output.read_text()
+        assert html.count("data-manim-svg=") == 3
+        assert html.index("Second/animation_1") < html.index("Talk/animation_0")
+
+
+class TestKeyframes:
+    def test_keyframe_entries(self, keyframe_talk, tmp_path):
+        root, _ = keyframe_talk
+        anims = find_animations(root)
+        assert keyframe_entries(anims) == {
+            root / "animation_0": {"transition": "wipe", "duration": 1.0},
+            root / "animation_1": {"transition": "fade", "duration": 0.5},
+        }
+        assert keyframe_entries(find_animations(_unpacked_root(tmp_path))) == {}
+
+    def test_keyframes_become_css_transitions(self, keyframe_talk, tmp_path):
+        root, output = keyframe_talk
+        js = tmp_path / "js" / "manim-svg.js"
+        js.parent.mkdir()
+        js.write_text("var ManimSVG = {};")
+        generate_html(root, output, js_src=js)
+        html = output.read_text()
+        assert "@keyframes lamd-wipe" in html
+        assert 'data-lamd-keyframe="wipe"' in html
+        assert (
+            '<img class="lamd-keyframe-from" src="media/svg/Talk/animation_0/frame_0000.svg" alt="" />\n'
+            '      <img class="lamd-keyframe-to" src="media/svg/Talk/animation_1/frame_0000.svg" alt=""'
+            ' style="animation-duration: 0.5s" />'
+        ) in html
+        assert html.count("lamd-keyframe-from") == 1
+        assert 'data-manim-svg="media/svg/Talk/animation_2"' in html
+        manifest = json.loads((tmp_path / "talk.json").read_text())
+        assert [a["path"] for a in manifest["animations"]] == ["media/svg/Talk/animation_2"]
+
+    def test_keyframe_only_talk_needs_no_player(self, keyframe_talk, tmp_path):
+        root, output = keyframe_talk
+        (root / "animation_2" / "animation.json").unlink()
+        generate_html(root, output, js_src=tmp_path / "missing.js")
+        html = output.read_text()
+        assert "@keyframes lamd-fade" in html
+        assert '<script src="lamd-svg-player.js"' not in html and '<script src="manim-svg.js"' not in html
+        assert "plugins: []" in html
+        assert not (tmp_path / "lamd-svg-player.js").exists()
+        assert json.loads((tmp_path / "talk.json").read_text())["animations"] == []
+
+    def test_plain_talk_has_no_keyframe_styles(self, talk):
+        root, output = talk
+        pack_animation(root / "animation_0")
+        generate_html(root, output)
+        assert "lamd-keyframe" not in output.read_text()
@@ -0,0 +1,114 @@
+"""Unit tests for lamd.validate_notebook (batch notebook validation)."""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd import validate_notebook as validate_notebook_module  # noqa: E402
+from lamd.validate_notebook import main, validate_notebook, validate_notebooks  # noqa: E402
+
+
+def _notebook(cells, **top):
+    notebook = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    notebook.update(top)
+    return notebook
+
+
+def _markdown(cell_id, text="Text"):
+    return {"cell_type": "markdown", "id": cell_id, "metadata": {}, "source": [text]}
+
+
+def _code(cell_id, source="x = 1"):
+    return {"cell_type": "code", "id": cell_id, "metadata": {}, "source": source, "outputs": [], "execution_count": None}
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(name, notebook):
+        path = tmp_path / name
+        path.write_text(notebook if isinstance(notebook, str) else json.dumps(notebook))
+        return str(path)
+
+    return write
+
+
+class TestValidateNotebook:
+    def test_valid_notebook(self, write):
+        path = write("talk.ipynb", _notebook([_markdown("a"), _code("b"), _code("c")]))
+        report = validate_notebook(path, min_cells=3, min_code=2)
+        assert report["ok"], report["errors"]
+        assert report["cells"] == 3
+        assert report["types"] == {"markdown": 1, "code": 2}
+
+    def test_cell_counts(self, write):
+        path = write("talk.ipynb", _notebook([_markdown("a")]))
+        report = validate_notebook(path, min_cells=2, min_code=1)
+        assert not report["ok"]
+        assert report["errors"] == ["1 cells (expected >= 2)", "0 code cells (expected >= 1)"]
+
+    def test_schema_errors(self, write):
+        bad_code = _code("b")
+        del bad_code["outputs"]
+        cells = [
+            _markdown("a"),
+            bad_code,
+            _markdown("a"),
+            {"cell_type": "heading", "source": ""},
+            dict(_markdown("d"), outputs=[]),
+        ]
+        report = validate_notebook(write("talk.ipynb", _notebook(cells, nbformat=3, extra=1)))
+        assert report["errors"] == [
+            "cell 1: outputs must be a list",
+            "cell 2: duplicate id 'a' (cell 0)",
+            "cell 3: unknown cell_type 'heading'",
+            "cell 4: unexpected keys ['outputs']",
+            "unexpected top-level keys ['extra']",
+            "nbformat must be 4, not 3",
+            "1 cells have no id (required by nbformat 4.5)",
+        ]
+
+    def test_ids_optional_before_4_5(self, write):
+        cell = _markdown("a")
+        del cell["id"]
+        assert validate_notebook(write("old.ipynb", _notebook([cell], nbformat_minor=4)))["ok"]
+
+    def test_unreadable_notebooks(self, write, tmp_path):
+        for report in validate_notebooks([write("broken.ipynb", '{"cells": ['), str(tmp_path / "missing.ipynb")]):
+            assert not report["ok"]
+            assert report["errors"][0].startswith("cannot read notebook")
+
+    def test_streaming_matches_full_parse(self, write):
+        pytest.importorskip("ijson")
+        cells = [_markdown("a"), _code("b", ["import numpy\n", "x = 1"]), _code("b")]
+        path = write("talk.ipynb", _notebook(cells, metadata={"kernelspec": {"name": "python3"}}))
+        streamed = validate_notebook(path, stream=True)
+        loaded = validate_notebook(path, stream=False)
+        assert streamed["streamed"] and not loaded["streamed"]
+        assert {k: v for k, v in streamed.items() if k != "streamed"} == {k: v for k, v in loaded.items() if k != "streamed"}
+        assert streamed["errors"] == ["cell 2: duplicate id 'b' (cell 1)"]
+
+    def test_large_notebook_without_ijson_is_loaded_whole(self, write, monkeypatch):
+        monkeypatch.setattr(validate_notebook_module, "IJSON_AVAILABLE", False)
+        monkeypatch.setattr(validate_notebook_module, "STREAM_THRESHOLD", 0)
+        report = validate_notebook(write("talk.ipynb", _notebook([_markdown("a"), _code("a")])))
+        assert not report["streamed"]
+        assert report["cells"] == 2
+        assert report["errors"] == ["cell 1: duplicate id 'a' (cell 0)"]
+
+
+class TestMain:
+    def test_batch_exit_code_and_json(self, write, capsys):
+        good = write("good.ipynb", _notebook([_markdown("a")]))
+        empty = write("empty.ipynb", _notebook([]))
+        assert main([good]) == 0
+        assert "✅" in capsys.readouterr().out
+        assert main([good, empty, "--json"]) == 1
+        reports = json.loads(capsys.readouterr().out)
+        assert [report["ok"] for report in reports] == [True, False]
+
+    def test_no_notebooks(self):
+        assert main([]) == 0
@@ -0,0 +1,139 @@
+"""Unit tests for lamd.watch.
+
+The watcher is exercised with the polling backend on temporary files.
+Rebuilds are checked with a scripted watcher and ``sleep`` standing in for
+``make``.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from lamd.watch import PollingWatcher, WatchBuilder, collect_watch_paths  # noqa: E402
+
+
+class TestPollingWatcher:
+    @pytest.fixture
+    def talk(self, tmp_path):
+        path = tmp_path / "talk.md"
+        path.write_text("# Talk\n")
+        return path
+
+    def test_no_change_times_out_empty(self, talk):
+        watcher = PollingWatcher([str(talk)], interval=0.01)
+        assert watcher.changes(timeout=0.05) == set()
+
+    def test_detects_modification(self, talk):
+        watcher = PollingWatcher([str(talk)], interval=0.01)
+        mtime = os.stat(talk).st_mtime
+        os.utime(talk, (mtime + 5, mtime + 5))
+        assert watcher.changes(timeout=0.5) == {str(talk)}
+        # The change is only reported once
+        assert watcher.changes(timeout=0.05) == set()
+
+    def test_detects_creation_of_watched_file(self, tmp_path):
+        missing = tmp_path / "include.md"
+        watcher = PollingWatcher([str(missing)], interval=0.01)
+        missing.write_text("included\n")
+        assert watcher.changes(timeout=0.5) == {str(missing)}
+
+
+class TestWatchBuilder:
+    @pytest.fixture(autouse=True)
+    def talk_dir(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "talk.md").write_text("# Talk\n")
+        (tmp_path / "_lamd.yml").write_text("snippetsdir: .\n")
+        self.macros = tmp_path / "macros"
+        self.macros.mkdir()
+        (self.macros / "talk-macros.gpp").write_text("")
+
+    def _builder(self):
+        with patch("lamd.watch.nt.extract_inputs", return_value=[]):
+            return WatchBuilder("talk.md", "talk.slides.html", macros_dir=str(self.macros), polling=True)
+
+    def test_watch_paths_include_config_and_macros(self):
+        with patch("lamd.watch.nt.extract_inputs", return_value=[]):
+            paths = collect_watch_paths("talk.md", macros_dir=str(self.macros))
+        assert os.path.abspath("talk.md") in paths
+        assert os.path.abspath("_lamd.yml") in paths
+        assert str(self.macros / "talk-macros.gpp") in paths
+
+    def test_source_change_is_plain_make(self):
+        builder = self._builder()
+        assert builder.make_command({os.path.abspath("talk.md")}) == ["make", "talk.slides.html"]
+
+    def test_macro_or_config_change_forces_source(self):
+        builder = self._builder()
+        for changed in (str(self.macros / "talk-macros.gpp"), os.path.abspath("_lamd.yml")):
+            assert builder.make_command({changed}) == ["make", "-W", "talk.md", "talk.slides.html"]
+
+
+class _ScriptedWatcher:
+    """Stand-in watcher returning scripted change sets, then stopping the loop."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.timeouts = []
+
+    def changes(self, timeout=None):
+        self.timeouts.append(timeout)
+        if not self.script:
+            raise KeyboardInterrupt
+        return self.script.pop(0)
+
+    def update(self, paths):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestRebuilds:
+    @pytest.fixture
+    def builder(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "talk.md").write_text("# Talk\n")
+        with patch("lamd.watch.nt.extract_inputs", return_value=[]):
+            builder = WatchBuilder("talk.md", "talk.slides.html", debounce=0.2, polling=True)
+        yield builder
+        if isinstance(builder.process, subprocess.Popen):
+            builder.cancel_build()
+
+    def test_burst_of_events_is_debounced_into_one_build(self, builder):
+        builder.watcher = _ScriptedWatcher([{"a.md"}, {"b.md"}, {"a.md", "c.md"}, set()])
+        with patch.object(builder, "start_build") as start_build, patch.object(builder, "_paths", return_value=set()):
+            assert builder.run() == 0
+        start_build.assert_called_once_with({"a.md", "b.md", "c.md"})
+        # The first wait blocks; the following ones wait for the debounce interval only
+        assert builder.watcher.timeouts[:4] == [None, 0.2, 0.2, 0.2]
+
+    def test_new_change_cancels_running_build(self, builder):
+        with patch.object(builder, "make_command", return_value=["sleep", "30"]):
+            builder.start_build({"talk.md"})
+            first = builder.process
+            builder.start_build({"talk.md"})
+        assert first.returncode == -signal.SIGTERM
+        assert builder.process is not first and builder.process.poll() is None
+
+    def test_build_ignoring_sigterm_is_killed(self, builder):
+        process = MagicMock(pid=4321)
+        process.poll.return_value = None
+        process.wait.side_effect = [subprocess.TimeoutExpired("make", 5), -signal.SIGKILL]
+        builder.process = process
+        with patch("lamd.watch.os.killpg") as killpg:
+            builder.cancel_build()
+        assert killpg.call_args_list == [call(4321, signal.SIGTERM), call(4321, signal.SIGKILL)]
+
+    def test_finished_build_is_not_cancelled(self, builder):
+        builder.process = MagicMock(pid=4321)
+        builder.process.poll.return_value = 0
+        with patch("lamd.watch.os.killpg") as killpg:
+            builder.cancel_build()
+        killpg.assert_not_called()